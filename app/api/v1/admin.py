@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Query, Body, WebSocket
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, NamedTuple, Optional
 
 from app.core.auth import verify_api_key
 from app.core.config import config, get_config
@@ -10,29 +10,37 @@ import os
 from pathlib import Path
 import aiofiles
 import asyncio
-import json
+import base64
+import binascii
+from contextlib import aclosing
+import hashlib
+import hmac
+from functools import lru_cache
+from itertools import chain
 import time
 import uuid
 import orjson
 from starlette.websockets import WebSocketDisconnect, WebSocketState
-from app.core.logger import logger
+from app.core.logger import LOG_DIR, logger
 from app.services.register import get_auto_register_manager
 from app.services.register.account_settings_refresh import (
     refresh_account_settings_for_tokens,
     normalize_sso_token as normalize_refresh_token,
 )
 from app.services.api_keys import api_key_manager
+from app.services.grok.assets import DeleteService, DownloadService, ListService
 from app.services.grok.model import ModelService
 from app.services.grok.imagine_generation import (
-    collect_experimental_generation_images,
+    iter_experimental_generation_images,
     is_valid_image_value as is_valid_imagine_image_value,
     resolve_aspect_ratio as resolve_imagine_aspect_ratio,
 )
+from app.services.request_stats import request_stats
 from app.services.token import get_token_manager
 from app.core.auth import _load_legacy_api_keys
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 TEMPLATE_DIR = Path(__file__).parent.parent.parent / "static"
 
@@ -41,15 +49,32 @@ class AdminLoginBody(BaseModel):
     username: str | None = None
     password: str | None = None
 
-async def render_template(filename: str):
-    """渲染指定模板"""
+# filename -> (mtime, content, etag)
+_template_cache: dict[str, tuple[float, str, str]] = {}
+
+
+async def render_template(filename: str, request: Request | None = None):
+    """渲染指定模板（按 mtime 缓存文件内容，支持 ETag/304）"""
     template_path = TEMPLATE_DIR / filename
-    if not template_path.exists():
+    try:
+        mtime = template_path.stat().st_mtime
+    except OSError:
+        _template_cache.pop(filename, None)
         return HTMLResponse(f"Template {filename} not found.", status_code=404)
-    
-    async with aiofiles.open(template_path, "r", encoding="utf-8") as f:
-        content = await f.read()
-    return HTMLResponse(content)
+
+    cached = _template_cache.get(filename)
+    if not cached or cached[0] != mtime:
+        async with aiofiles.open(template_path, "r", encoding="utf-8") as f:
+            content = await f.read()
+        etag = f'"{hashlib.md5(content.encode("utf-8")).hexdigest()}"'
+        cached = (mtime, content, etag)
+        _template_cache[filename] = cached
+
+    _, content, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content, headers=headers)
 
 @router.get("/", include_in_schema=False)
 async def root_redirect():
@@ -58,9 +83,9 @@ async def root_redirect():
 
 
 @router.get("/login", response_class=HTMLResponse, include_in_schema=False)
-async def login_page():
+async def login_page(request: Request):
     """Login page (default)."""
-    return await render_template("login/login.html")
+    return await render_template("login/login.html", request)
 
 
 @router.get("/admin", response_class=HTMLResponse, include_in_schema=False)
@@ -69,42 +94,63 @@ async def admin_login_page():
     return RedirectResponse(url="/login", status_code=302)
 
 @router.get("/admin/config", response_class=HTMLResponse, include_in_schema=False)
-async def admin_config_page():
+async def admin_config_page(request: Request):
     """配置管理页"""
-    return await render_template("config/config.html")
+    return await render_template("config/config.html", request)
 
 @router.get("/admin/token", response_class=HTMLResponse, include_in_schema=False)
-async def admin_token_page():
+async def admin_token_page(request: Request):
     """Token 管理页"""
-    return await render_template("token/token.html")
+    return await render_template("token/token.html", request)
 
 @router.get("/admin/datacenter", response_class=HTMLResponse, include_in_schema=False)
-async def admin_datacenter_page():
+async def admin_datacenter_page(request: Request):
     """数据中心页"""
-    return await render_template("datacenter/datacenter.html")
+    return await render_template("datacenter/datacenter.html", request)
 
 @router.get("/admin/keys", response_class=HTMLResponse, include_in_schema=False)
-async def admin_keys_page():
+async def admin_keys_page(request: Request):
     """API Key 管理页"""
-    return await render_template("keys/keys.html")
+    return await render_template("keys/keys.html", request)
 
 @router.get("/chat", response_class=HTMLResponse, include_in_schema=False)
-async def chat_page():
+async def chat_page(request: Request):
     """在线聊天页（公开入口）"""
-    return await render_template("chat/chat.html")
+    return await render_template("chat/chat.html", request)
 
 @router.get("/admin/chat", response_class=HTMLResponse, include_in_schema=False)
-async def admin_chat_page():
+async def admin_chat_page(request: Request):
     """在线聊天页（后台入口）"""
-    return await render_template("chat/chat_admin.html")
+    return await render_template("chat/chat_admin.html", request)
+
+
+def _s(value: Any) -> str:
+    """等价于 str(value or "").strip()，字符串走快速路径"""
+    return value.strip() if type(value) is str else str(value or "").strip()
+
+
+# (config.version, key, default) -> 规范化后的字符串配置
+_app_config_cache: dict[tuple[int, str, str], str] = {}
+
+
+def _get_app_config_str(key: str, default: str = "") -> str:
+    """读取字符串配置并按 config.version 缓存，配置更新后自动失效"""
+    cache_key = (config.version, key, default)
+    value = _app_config_cache.get(cache_key)
+    if value is None:
+        if _app_config_cache and next(iter(_app_config_cache))[0] != config.version:
+            _app_config_cache.clear()
+        value = _s(get_config(key, default) or default)
+        _app_config_cache[cache_key] = value
+    return value
 
 
 async def _verify_ws_api_key(websocket: WebSocket) -> bool:
-    api_key = str(get_config("app.api_key", "") or "").strip()
+    api_key = _get_app_config_str("app.api_key")
     legacy_keys = await _load_legacy_api_keys()
     if not api_key and not legacy_keys:
         return True
-    token = str(websocket.query_params.get("api_key") or "").strip()
+    token = _s(websocket.query_params.get("api_key"))
     if not token:
         return False
     if (api_key and token == api_key) or token in legacy_keys:
@@ -118,15 +164,41 @@ async def _verify_ws_api_key(websocket: WebSocket) -> bool:
     return False
 
 
-async def _collect_imagine_batch(token: str, prompt: str, aspect_ratio: str) -> list[str]:
-    return await collect_experimental_generation_images(
+async def _collect_imagine_batch(token: str, prompt: str, aspect_ratio: str) -> AsyncIterator[str]:
+    async for image in iter_experimental_generation_images(
         token=token,
         prompt=prompt,
         n=6,
         response_format="b64_json",
         aspect_ratio=aspect_ratio,
         concurrency=1,
-    )
+    ):
+        yield image
+
+
+# 超过该大小的入站消息在线程中解析，避免阻塞事件循环
+_WS_INLINE_PARSE_LIMIT = 64_000
+
+
+def _decode_imagine_image(value: str) -> Optional[tuple[str, bytes]]:
+    """将 data URI / 裸 base64 图片解码为 (mime, bytes)，用于二进制帧下发"""
+    mime = "image/png"
+    data = value
+    if value.startswith("data:"):
+        header, _, data = value.partition(",")
+        mime = header[5:].split(";", 1)[0] or mime
+    try:
+        raw = base64.b64decode(data)
+    except (binascii.Error, ValueError):
+        return None
+    if not raw:
+        return None
+    if not value.startswith("data:"):
+        if raw.startswith(b"\xff\xd8"):
+            mime = "image/jpeg"
+        elif raw.startswith(b"RIFF") and raw[8:12] == b"WEBP":
+            mime = "image/webp"
+    return mime, raw
 
 
 @router.websocket("/api/v1/admin/imagine/ws")
@@ -138,11 +210,32 @@ async def admin_imagine_ws(websocket: WebSocket):
     await websocket.accept()
     stop_event = asyncio.Event()
     run_task: Optional[asyncio.Task] = None
+    # 所有发送串行化：控制消息不会插入到图片头与图片字节之间
+    send_lock = asyncio.Lock()
 
     async def _send(payload: dict) -> bool:
+        # 控制消息一律走文本帧，二进制帧只用于图片字节
+        try:
+            async with send_lock:
+                await websocket.send_text(orjson.dumps(payload).decode())
+            return True
+        except Exception:
+            return False
+
+    async def _send_pair(header: dict, data: bytes) -> None:
+        async with send_lock:
+            await websocket.send_text(orjson.dumps(header).decode())
+            await websocket.send_bytes(data)
+
+    async def _send_image_frames(header: dict, data: bytes) -> bool:
+        # 文本帧携带元数据，紧随其后的二进制帧为原始图片字节；
+        # shield 保证停止时不会只发出半对帧
+        pair = asyncio.ensure_future(_send_pair(header, data))
         try:
-            await websocket.send_text(orjson.dumps(payload).decode())
+            await asyncio.shield(pair)
             return True
+        except asyncio.CancelledError:
+            raise
         except Exception:
             return False
 
@@ -151,16 +244,12 @@ async def admin_imagine_ws(websocket: WebSocket):
         stop_event.set()
         if run_task and not run_task.done():
             run_task.cancel()
-            try:
-                await run_task
-            except asyncio.CancelledError:
-                pass
-            except Exception:
-                pass
+            # asyncio.wait 只等待结束、不重新抛出任务异常，无需逐类吞异常
+            await asyncio.wait((run_task,))
         run_task = None
         stop_event.clear()
 
-    async def _run(prompt: str, aspect_ratio: str):
+    async def _run(prompt: str, aspect_ratio: str, binary: bool = False):
         model_id = "grok-imagine-1.0"
         model_info = ModelService.get(model_id)
         if not model_info or not model_info.is_image:
@@ -201,32 +290,40 @@ async def admin_imagine_ws(websocket: WebSocket):
                     await asyncio.sleep(2)
                     continue
 
-                start_at = time.time()
-                images = await _collect_imagine_batch(token, prompt, aspect_ratio)
-                elapsed_ms = int((time.time() - start_at) * 1000)
-
-                sent_any = False
-                for image_b64 in images:
-                    if not is_valid_imagine_image_value(image_b64):
-                        continue
-                    sent_any = True
-                    sequence += 1
-                    ok = await _send(
-                        {
+                start_at = time.monotonic()
+                sent = 0
+                # 每张图完成即下发，不等待整轮结束
+                async with aclosing(_collect_imagine_batch(token, prompt, aspect_ratio)) as images:
+                    async for image_b64 in images:
+                        if stop_event.is_set():
+                            break
+                        if not is_valid_imagine_image_value(image_b64):
+                            continue
+                        header = {
                             "type": "image",
-                            "b64_json": image_b64,
-                            "sequence": sequence,
+                            "sequence": sequence + 1,
                             "created_at": int(time.time() * 1000),
-                            "elapsed_ms": elapsed_ms,
+                            "elapsed_ms": int((time.monotonic() - start_at) * 1000),
                             "aspect_ratio": aspect_ratio,
                             "run_id": run_id,
                         }
-                    )
-                    if not ok:
-                        stop_event.set()
-                        break
-
-                if sent_any:
+                        if binary:
+                            decoded = _decode_imagine_image(image_b64)
+                            if not decoded:
+                                continue
+                            header["binary"] = True
+                            header["mime"], data = decoded
+                            ok = await _send_image_frames(header, data)
+                        else:
+                            header["b64_json"] = image_b64
+                            ok = await _send(header)
+                        sequence += 1
+                        sent += 1
+                        if not ok:
+                            stop_event.set()
+                            break
+
+                if sent:
                     try:
                         await token_mgr.sync_usage(
                             token,
@@ -236,7 +333,7 @@ async def admin_imagine_ws(websocket: WebSocket):
                         )
                     except Exception as e:
                         logger.warning(f"Imagine ws token sync failed: {e}")
-                else:
+                elif not stop_event.is_set():
                     await _send(
                         {
                             "type": "error",
@@ -259,6 +356,36 @@ async def admin_imagine_ws(websocket: WebSocket):
 
         await _send({"type": "status", "status": "stopped", "run_id": run_id})
 
+    async def _on_start(payload: dict):
+        nonlocal run_task
+        prompt = _s(payload.get("prompt"))
+        if not prompt:
+            await _send(
+                {
+                    "type": "error",
+                    "message": "Prompt cannot be empty.",
+                    "code": "empty_prompt",
+                }
+            )
+            return
+        ratio = resolve_imagine_aspect_ratio(str(payload.get("aspect_ratio") or "2:3").strip())
+        binary = bool(payload.get("binary"))
+        await _stop_run()
+        run_task = asyncio.create_task(_run(prompt, ratio, binary))
+
+    async def _on_stop(_payload: dict):
+        await _stop_run()
+
+    async def _on_ping(_payload: dict):
+        await _send({"type": "pong"})
+
+    # 按消息类型查表分发，新增指令只需注册处理函数
+    handlers: dict[str, Callable[[dict], Awaitable[None]]] = {
+        "start": _on_start,
+        "stop": _on_stop,
+        "ping": _on_ping,
+    }
+
     try:
         while True:
             try:
@@ -267,7 +394,10 @@ async def admin_imagine_ws(websocket: WebSocket):
                 break
 
             try:
-                payload = orjson.loads(raw)
+                if len(raw) > _WS_INLINE_PARSE_LIMIT:
+                    payload = await asyncio.to_thread(orjson.loads, raw)
+                else:
+                    payload = orjson.loads(raw)
             except Exception:
                 await _send(
                     {
@@ -278,26 +408,8 @@ async def admin_imagine_ws(websocket: WebSocket):
                 )
                 continue
 
-            msg_type = payload.get("type")
-            if msg_type == "start":
-                prompt = str(payload.get("prompt") or "").strip()
-                if not prompt:
-                    await _send(
-                        {
-                            "type": "error",
-                            "message": "Prompt cannot be empty.",
-                            "code": "empty_prompt",
-                        }
-                    )
-                    continue
-                ratio = resolve_imagine_aspect_ratio(str(payload.get("aspect_ratio") or "2:3").strip())
-                await _stop_run()
-                run_task = asyncio.create_task(_run(prompt, ratio))
-            elif msg_type == "stop":
-                await _stop_run()
-            elif msg_type == "ping":
-                await _send({"type": "pong"})
-            else:
+            handler = handlers.get(payload.get("type"))
+            if handler is None:
                 await _send(
                     {
                         "type": "error",
@@ -305,6 +417,8 @@ async def admin_imagine_ws(websocket: WebSocket):
                         "code": "unknown_command",
                     }
                 )
+                continue
+            await handler(payload)
     except WebSocketDisconnect:
         logger.debug("WebSocket disconnected by client")
     except asyncio.CancelledError:
@@ -328,8 +442,8 @@ async def admin_login_api(request: Request, body: AdminLoginBody | None = Body(d
     - 兼容旧版本：允许 Authorization: Bearer <password> 仅密码登录（用户名默认为 admin）
     """
 
-    admin_username = str(get_config("app.admin_username", "admin") or "admin").strip() or "admin"
-    admin_password = str(get_config("app.app_key", "admin") or "admin").strip()
+    admin_username = _get_app_config_str("app.admin_username", "admin") or "admin"
+    admin_password = _get_app_config_str("app.app_key", "admin")
 
     username = (body.username.strip() if body and isinstance(body.username, str) else "").strip()
     password = (body.password.strip() if body and isinstance(body.password, str) else "").strip()
@@ -345,7 +459,10 @@ async def admin_login_api(request: Request, body: AdminLoginBody | None = Body(d
     if not username or not password:
         raise HTTPException(status_code=400, detail="Missing username or password")
 
-    if username != admin_username or password != admin_password:
+    # 常量时间比较，且两项都比较以免泄露用户名是否命中
+    username_ok = hmac.compare_digest(username.encode("utf-8"), admin_username.encode("utf-8"))
+    password_ok = hmac.compare_digest(password.encode("utf-8"), admin_password.encode("utf-8"))
+    if not (username_ok and password_ok):
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     return {"status": "success", "api_key": get_config("app.api_key", "")}
@@ -382,8 +499,11 @@ def _normalize_limit(v: Any) -> int:
         return -1
 
 
+_VALID_TOKEN_STATUSES = frozenset({"active", "cooling", "invalid", "disabled"})
+
+
 def _pool_to_token_type(pool_name: str) -> str:
-    return "ssoSuper" if str(pool_name or "").strip() == "ssoSuper" else "sso"
+    return "ssoSuper" if _s(pool_name) == "ssoSuper" else "sso"
 
 
 def _parse_quota_value(v: Any) -> tuple[int, bool]:
@@ -406,10 +526,12 @@ def _safe_int(v: Any, default: int = 0) -> int:
 
 
 def _normalize_token_status(raw_status: Any) -> str:
+    if isinstance(raw_status, str) and raw_status in _VALID_TOKEN_STATUSES:
+        return raw_status
     s = str(raw_status or "active").strip().lower()
     if s == "expired":
         return "invalid"
-    if s in ("active", "cooling", "invalid", "disabled"):
+    if s in _VALID_TOKEN_STATUSES:
         return s
     return "active"
 
@@ -439,7 +561,7 @@ def _normalize_admin_token_item(pool_name: str, item: Any) -> dict | None:
     if not isinstance(item, dict):
         return None
 
-    token = str(item.get("token") or "").strip()
+    token = _s(item.get("token"))
     if not token:
         return None
     if token.startswith("sso="):
@@ -462,23 +584,37 @@ def _normalize_admin_token_item(pool_name: str, item: Any) -> dict | None:
     }
 
 
-def _collect_tokens_from_pool_payload(payload: Any) -> list[str]:
+def _build_normalized_token_pools(data: dict) -> dict[str, list[dict]]:
+    out: dict[str, list[dict]] = {}
+    for pool_name, raw_items in data.items():
+        arr = raw_items if isinstance(raw_items, list) else []
+        normalized: list[dict] = []
+        for item in arr:
+            obj = _normalize_admin_token_item(pool_name, item)
+            if obj:
+                normalized.append(obj)
+        out[str(pool_name)] = normalized
+    return out
+
+
+def _iter_pool_payload_tokens(payload: Any) -> Iterator[str]:
+    """按池遍历 payload，逐个产出规范化后的非空 token"""
     if not isinstance(payload, dict):
-        return []
-
-    collected: list[str] = []
-    seen: set[str] = set()
-    for raw_items in payload.values():
-        if not isinstance(raw_items, list):
-            continue
-        for item in raw_items:
-            token_raw = item if isinstance(item, str) else (item.get("token") if isinstance(item, dict) else "")
-            token = normalize_refresh_token(str(token_raw or "").strip())
-            if not token or token in seen:
-                continue
-            seen.add(token)
-            collected.append(token)
-    return collected
+        return iter(())
+
+    items = chain.from_iterable(v for v in payload.values() if isinstance(v, list))
+    tokens = (
+        normalize_refresh_token(
+            _s(item if isinstance(item, str) else (item.get("token") if isinstance(item, dict) else ""))
+        )
+        for item in items
+    )
+    return filter(None, tokens)
+
+
+def _collect_tokens_from_pool_payload(payload: Any) -> list[str]:
+    # dict.fromkeys 保序去重
+    return list(dict.fromkeys(_iter_pool_payload_tokens(payload)))
 
 
 def _resolve_nsfw_refresh_concurrency(override: Any = None) -> int:
@@ -555,22 +691,21 @@ async def list_api_keys():
             "video": None if video_limit < 0 else max(0, video_limit - video_used),
         }
 
-        out.append({
-            **row,
-            "is_active": bool(row.get("is_active", True)),
-            "display_key": _display_key(key),
-            "usage_today": {
-                "chat_used": chat_used,
-                "heavy_used": heavy_used,
-                "image_used": image_used,
-                "video_used": video_used,
-            },
-            "remaining_today": remaining,
-            "day": day,
-        })
+        # get_all_keys() 返回的是副本，直接原地补充字段，省去一次 dict 拷贝
+        row["is_active"] = bool(row.get("is_active", True))
+        row["display_key"] = _display_key(key)
+        row["usage_today"] = {
+            "chat_used": chat_used,
+            "heavy_used": heavy_used,
+            "image_used": image_used,
+            "video_used": video_used,
+        }
+        row["remaining_today"] = remaining
+        row["day"] = day
+        out.append(row)
 
     # New UI expects { success: true, data: [...] }
-    return {"success": True, "data": out}
+    return ORJSONResponse(content={"success": True, "data": out})
 
 
 @router.post("/api/v1/admin/keys", dependencies=[Depends(verify_api_key)])
@@ -652,9 +787,10 @@ async def delete_api_key(data: dict):
         raise HTTPException(status_code=404, detail="Key not found")
     return {"success": True}
 
-@router.get("/api/v1/admin/storage", dependencies=[Depends(verify_api_key)])
-async def get_storage_info():
-    """获取当前存储模式"""
+_STORAGE_TYPE_CACHE: str | None = None
+
+
+def _resolve_storage_type() -> str:
     storage_type = os.getenv("SERVER_STORAGE_TYPE", "local").lower()
     logger.info(f"Storage type: {storage_type}")
     if not storage_type:
@@ -672,7 +808,16 @@ async def get_storage_info():
                 storage_type = "pgsql"
             else:
                 storage_type = storage.dialect
-    return {"type": storage_type or "local"}
+    return storage_type or "local"
+
+
+@router.get("/api/v1/admin/storage", dependencies=[Depends(verify_api_key)])
+async def get_storage_info():
+    """获取当前存储模式（存储后端运行期不会变化，首次解析后缓存）"""
+    global _STORAGE_TYPE_CACHE
+    if _STORAGE_TYPE_CACHE is None:
+        _STORAGE_TYPE_CACHE = _resolve_storage_type()
+    return {"type": _STORAGE_TYPE_CACHE}
 
 @router.get("/api/v1/admin/tokens", dependencies=[Depends(verify_api_key)])
 async def get_tokens_api():
@@ -680,41 +825,29 @@ async def get_tokens_api():
     storage = get_storage()
     tokens = await storage.load_tokens()
     data = tokens if isinstance(tokens, dict) else {}
-    out: dict[str, list[dict]] = {}
-    for pool_name, raw_items in data.items():
-        arr = raw_items if isinstance(raw_items, list) else []
-        normalized: list[dict] = []
-        for item in arr:
-            obj = _normalize_admin_token_item(pool_name, item)
-            if obj:
-                normalized.append(obj)
-        out[str(pool_name)] = normalized
-    return out
+    # 大号池的逐项规范化为纯 CPU 计算，放到线程中避免阻塞事件循环
+    out = await asyncio.to_thread(_build_normalized_token_pools, data)
+    return ORJSONResponse(content=out)
 
 @router.post("/api/v1/admin/tokens", dependencies=[Depends(verify_api_key)])
 async def update_tokens_api(data: dict):
     """Update token payload and trigger background account-settings refresh for new tokens."""
     storage = get_storage()
     try:
-        from app.services.token.manager import get_token_manager
 
         posted_data = data if isinstance(data, dict) else {}
-        existing_tokens: list[str] = []
-        added_tokens: list[str] = []
+        # 纯 CPU 的收集/差集计算放在锁外，锁内只保留 load/save/reload
+        new_tokens = _collect_tokens_from_pool_payload(posted_data)
 
         async with storage.acquire_lock("tokens_save", timeout=10):
             old_data = await storage.load_tokens()
-            existing_tokens = _collect_tokens_from_pool_payload(
-                old_data if isinstance(old_data, dict) else {}
-            )
-
             await storage.save_tokens(posted_data)
             mgr = await get_token_manager()
             await mgr.reload()
 
-            new_tokens = _collect_tokens_from_pool_payload(posted_data)
-            existing_set = set(existing_tokens)
-            added_tokens = [token for token in new_tokens if token not in existing_set]
+        # 旧数据只做成员判断，直接构建 frozenset，不经过中间列表
+        existing_tokens = frozenset(_iter_pool_payload_tokens(old_data))
+        added_tokens = [token for token in new_tokens if token not in existing_tokens]
 
         concurrency = _resolve_nsfw_refresh_concurrency()
         retries = _resolve_nsfw_refresh_retries()
@@ -740,7 +873,6 @@ async def update_tokens_api(data: dict):
 @router.post("/api/v1/admin/tokens/refresh", dependencies=[Depends(verify_api_key)])
 async def refresh_tokens_api(data: dict):
     """刷新 Token 状态"""
-    from app.services.token.manager import get_token_manager
     
     try:
         mgr = await get_token_manager()
@@ -755,14 +887,18 @@ async def refresh_tokens_api(data: dict):
              
         unique_tokens = list(set(tokens))
         
-        sem = asyncio.Semaphore(10)
-        
-        async def _refresh_one(t):
-            async with sem:
-                return t, await mgr.sync_usage(t, "grok-3", consume_on_fail=False, is_usage=False)
-        
-        results_list = await asyncio.gather(*[_refresh_one(t) for t in unique_tokens])
-        results = dict(results_list)
+        # 固定数量的 worker 从队列取 token，任务数不随 token 数增长
+        queue: asyncio.Queue = asyncio.Queue()
+        for t in unique_tokens:
+            queue.put_nowait(t)
+        results = {}
+
+        async def _worker():
+            while not queue.empty():
+                t = queue.get_nowait()
+                results[t] = await mgr.sync_usage(t, "grok-3", consume_on_fail=False, is_usage=False)
+
+        await asyncio.gather(*[_worker() for _ in range(min(10, len(unique_tokens)))])
             
         return {"status": "success", "results": results}
     except Exception as e:
@@ -775,32 +911,21 @@ async def refresh_tokens_nsfw_api(data: dict):
     payload = data if isinstance(data, dict) else {}
     mgr = await get_token_manager()
 
-    tokens: list[str] = []
-    seen: set[str] = set()
-
     if bool(payload.get("all")):
-        for pool in mgr.pools.values():
-            for info in pool.list():
-                token = normalize_refresh_token(str(info.token or "").strip())
-                if not token or token in seen:
-                    continue
-                seen.add(token)
-                tokens.append(token)
+        # 直接迭代池内部视图（同步消费，期间无 await），不为每个池复制列表
+        raw_tokens = (info.token for pool in mgr.pools.values() for info in pool)
     else:
-        candidates: list[str] = []
         single = payload.get("token")
-        if isinstance(single, str):
-            candidates.append(single)
         batch = payload.get("tokens")
-        if isinstance(batch, list):
-            candidates.extend([item for item in batch if isinstance(item, str)])
+        raw_tokens = chain(
+            (single,) if isinstance(single, str) else (),
+            (item for item in batch if isinstance(item, str)) if isinstance(batch, list) else (),
+        )
 
-        for raw in candidates:
-            token = normalize_refresh_token(str(raw or "").strip())
-            if not token or token in seen:
-                continue
-            seen.add(token)
-            tokens.append(token)
+    # 生成器管线：原始串保序去重 -> 规范化 -> 过滤空值 -> 再按 sso 保序去重
+    # 重复的原始 Cookie 串只解析一次
+    unique_raw = dict.fromkeys(_s(raw) for raw in raw_tokens)
+    tokens = list(dict.fromkeys(filter(None, map(normalize_refresh_token, unique_raw))))
 
     if not tokens:
         raise HTTPException(status_code=400, detail="No tokens provided")
@@ -873,106 +998,224 @@ async def auto_register_stop_api(job_id: str | None = None):
     return {"status": "stopping"}
 
 @router.get("/admin/cache", response_class=HTMLResponse, include_in_schema=False)
-async def admin_cache_page():
+async def admin_cache_page(request: Request):
     """缓存管理页"""
-    return await render_template("cache/cache.html")
+    return await render_template("cache/cache.html", request)
 
-@router.get("/api/v1/admin/cache", dependencies=[Depends(verify_api_key)])
-async def get_cache_stats_api(request: Request):
-    """获取缓存统计"""
-    from app.services.grok.assets import DownloadService, ListService
-    from app.services.token.manager import get_token_manager
-    
+_LOCAL_STATS_TTL = 3.0
+@lru_cache(maxsize=1)
+def _get_download_service() -> DownloadService:
+    """本地缓存目录操作只涉及文件系统，进程内共享一个实例即可"""
+    return DownloadService()
+
+
+# kind -> (monotonic ts, stats)
+_local_stats_cache: dict[str, tuple[float, dict]] = {}
+
+
+async def _cached_local_stats(kind: str) -> dict:
+    """本地缓存目录统计：在线程中扫描目录，并做短 TTL 缓存以应对前端轮询"""
+    cached = _local_stats_cache.get(kind)
+    if cached and time.monotonic() - cached[0] < _LOCAL_STATS_TTL:
+        return cached[1]
+
+    stats = await asyncio.to_thread(_get_download_service().get_stats, kind)
+    _local_stats_cache[kind] = (time.monotonic(), stats)
+    return stats
+
+
+async def _local_media_stats() -> tuple[dict, dict]:
+    """并行获取图片/视频两类本地缓存统计"""
+    image_stats, video_stats = await asyncio.gather(
+        _cached_local_stats("image"), _cached_local_stats("video")
+    )
+    return image_stats, video_stats
+
+
+def _invalidate_local_stats(kind: str | None = None) -> None:
+    if kind is None:
+        _local_stats_cache.clear()
+    else:
+        _local_stats_cache.pop(kind, None)
+
+
+_ASSET_COUNT_TTL = 60.0
+_ASSET_COUNT_CACHE_MAX = 1024
+# token -> (monotonic ts, count)；按写入顺序淘汰最旧条目
+_asset_count_cache: dict[str, tuple[float, int]] = {}
+# token -> 进行中的查询，合并同一 token 的并发请求
+_asset_count_inflight: dict[str, asyncio.Future] = {}
+
+
+async def _single_flight(inflight: dict, key, factory):
+    """合并同 key 的并发调用：首个调用者执行 factory，其余等待同一结果"""
+    while (pending := inflight.get(key)) is not None:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # 执行者被取消（如客户端断开）而自身未被取消时，由等待者接手重新执行
+            task = asyncio.current_task()
+            if not pending.cancelled() or (task is not None and task.cancelling()):
+                raise
+
+    future = asyncio.get_running_loop().create_future()
+    # 无人等待时也标记异常已读取，避免 "exception was never retrieved"
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    inflight[key] = future
     try:
-        dl_service = DownloadService()
-        image_stats = dl_service.get_stats("image")
-        video_stats = dl_service.get_stats("video")
+        result = await factory()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        inflight.pop(key, None)
+    future.set_result(result)
+    return result
+
+
+async def _cached_asset_count(token: str, fetch) -> int:
+    """带 TTL 的在线资产数缓存，避免后台轮询反复请求上游"""
+    cached = _asset_count_cache.get(token)
+    if cached and time.monotonic() - cached[0] < _ASSET_COUNT_TTL:
+        return cached[1]
+
+    count = await _single_flight(_asset_count_inflight, token, lambda: fetch(token))
+
+    _asset_count_cache.pop(token, None)
+    _asset_count_cache[token] = (time.monotonic(), count)
+    while len(_asset_count_cache) > _ASSET_COUNT_CACHE_MAX:
+        _asset_count_cache.pop(next(iter(_asset_count_cache)))
+    return count
+
+
+def _invalidate_asset_count(token: str) -> None:
+    _asset_count_cache.pop(token, None)
+
+
+# (config.version, batch_size)
+_assets_batch_size_cache: tuple[int, int] | None = None
+
+
+def _resolve_admin_assets_batch_size() -> int:
+    """解析 performance.admin_assets_batch_size，配置版本不变时直接复用"""
+    global _assets_batch_size_cache
+    cached = _assets_batch_size_cache
+    if cached is not None and cached[0] == config.version:
+        return cached[1]
+    batch_size = get_config("performance.admin_assets_batch_size", 10)
+    try:
+        batch_size = int(batch_size)
+    except Exception:
+        batch_size = 10
+    batch_size = max(1, batch_size)
+    _assets_batch_size_cache = (config.version, batch_size)
+    return batch_size
+
+
+class _AssetDetail(NamedTuple):
+    """单个 token 的在线资产统计，仅在输出边界转换为 dict"""
+
+    token: str
+    token_masked: str
+    count: int
+    status: str
+    last_asset_clear_at: int | None
+
+
+async def _fetch_asset_detail(list_service, token: str, account: dict | None) -> _AssetDetail:
+    masked = account["token_masked"] if account else token
+    last_clear = account["last_asset_clear_at"] if account else None
+    try:
+        count = await _cached_asset_count(token, list_service.count)
+        return _AssetDetail(token, masked, count, "ok", last_clear)
+    except Exception as e:
+        return _AssetDetail(token, masked, 0, f"error: {str(e)}", last_clear)
+
+
+# (scope, token, tokens, refresh) -> 进行中的统计，合并多标签页/快速刷新的相同请求
+_cache_stats_inflight: dict[tuple, asyncio.Future] = {}
+
+_ALL_SCOPE_SNAPSHOT_TTL = 30.0
+# scope=all 的在线统计快照：(state_key, monotonic ts, online_stats, online_details)
+_all_scope_snapshot: tuple[int, float, dict, list] | None = None
+
+
+def _accounts_state_key(accounts: tuple[dict, ...]) -> int:
+    # 账号列表与各自的清理时间都未变化时，在线统计可直接复用
+    return hash(tuple((a["token"], a["last_asset_clear_at"]) for a in accounts))
+
+
+async def _compute_cache_stats(
+    scope: str | None,
+    selected_token: str | None,
+    selected_tokens: list[str],
+    refresh: bool = False,
+) -> dict:
+    global _all_scope_snapshot
+
+    # 整个请求共享一个 ListService（及其连接），结束时统一关闭
+    list_service = ListService()
+    try:
+        image_stats, video_stats = await _local_media_stats()
         
         mgr = await get_token_manager()
-        pools = mgr.pools
-        accounts = []
-        for pool_name, pool in pools.items():
-            for info in pool.list():
-                raw_token = info.token[4:] if info.token.startswith("sso=") else info.token
-                masked = f"{raw_token[:8]}...{raw_token[-16:]}" if len(raw_token) > 24 else raw_token
-                accounts.append({
-                    "token": raw_token,
-                    "token_masked": masked,
-                    "pool": pool_name,
-                    "status": info.status,
-                    "last_asset_clear_at": info.last_asset_clear_at
-                })
-
-        scope = request.query_params.get("scope")
-        selected_token = request.query_params.get("token")
-        tokens_param = request.query_params.get("tokens")
-        selected_tokens = []
-        if tokens_param:
-            selected_tokens = [t.strip() for t in tokens_param.split(",") if t.strip()]
+        accounts = mgr.accounts_snapshot()
 
         online_stats = {"count": 0, "status": "unknown", "token": None, "last_asset_clear_at": None}
         online_details = []
         account_map = {a["token"]: a for a in accounts}
-        batch_size = get_config("performance.admin_assets_batch_size", 10)
-        try:
-            batch_size = int(batch_size)
-        except Exception:
-            batch_size = 10
-        batch_size = max(1, batch_size)
+        batch_size = _resolve_admin_assets_batch_size()
 
         async def _fetch_assets(token: str):
-            list_service = ListService()
-            try:
-                return await list_service.count(token)
-            finally:
-                await list_service.close()
+            return await _cached_asset_count(token, list_service.count)
 
-        async def _fetch_detail(token: str):
-            account = account_map.get(token)
-            try:
-                count = await _fetch_assets(token)
-                return ({
-                    "token": token,
-                    "token_masked": account["token_masked"] if account else token,
-                    "count": count,
-                    "status": "ok",
-                    "last_asset_clear_at": account["last_asset_clear_at"] if account else None
-                }, count)
-            except Exception as e:
-                return ({
-                    "token": token,
-                    "token_masked": account["token_masked"] if account else token,
-                    "count": 0,
-                    "status": f"error: {str(e)}",
-                    "last_asset_clear_at": account["last_asset_clear_at"] if account else None
-                }, 0)
+        # 信号量限流 + 单个 TaskGroup，避免分块屏障；请求被取消时同组任务一并取消
+        sem = asyncio.Semaphore(batch_size)
+
+        async def _guarded_detail(token: str):
+            async with sem:
+                return await _fetch_asset_detail(list_service, token, account_map.get(token))
 
         if selected_tokens:
             total = 0
-            for i in range(0, len(selected_tokens), batch_size):
-                chunk = selected_tokens[i:i + batch_size]
-                results = await asyncio.gather(*[_fetch_detail(token) for token in chunk])
-                for detail, count in results:
-                    online_details.append(detail)
-                    total += count
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(_guarded_detail(token)) for token in selected_tokens]
+            for task in tasks:
+                detail = task.result()
+                online_details.append(detail._asdict())
+                total += detail.count
             online_stats = {"count": total, "status": "ok" if selected_tokens else "no_token", "token": None, "last_asset_clear_at": None}
             scope = "selected"
         elif scope == "all":
-            total = 0
-            tokens = [account["token"] for account in accounts]
-            for i in range(0, len(tokens), batch_size):
-                chunk = tokens[i:i + batch_size]
-                results = await asyncio.gather(*[_fetch_detail(token) for token in chunk])
-                for detail, count in results:
-                    online_details.append(detail)
-                    total += count
-            online_stats = {"count": total, "status": "ok" if accounts else "no_token", "token": None, "last_asset_clear_at": None}
+            state_key = _accounts_state_key(accounts)
+            snapshot = _all_scope_snapshot
+            if (
+                not refresh
+                and snapshot is not None
+                and snapshot[0] == state_key
+                and time.monotonic() - snapshot[1] < _ALL_SCOPE_SNAPSHOT_TTL
+            ):
+                online_stats, online_details = snapshot[2], snapshot[3]
+            else:
+                total = 0
+                tokens = [account["token"] for account in accounts]
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [tg.create_task(_guarded_detail(token)) for token in tokens]
+                for task in tasks:
+                    detail = task.result()
+                    online_details.append(detail._asdict())
+                    total += detail.count
+                online_stats = {"count": total, "status": "ok" if accounts else "no_token", "token": None, "last_asset_clear_at": None}
+                _all_scope_snapshot = (state_key, time.monotonic(), online_stats, online_details)
         else:
             token = selected_token
             if token:
                 try:
                     count = await _fetch_assets(token)
-                    match = next((a for a in accounts if a["token"] == token), None)
+                    match = account_map.get(token)
                     online_stats = {
                         "count": count,
                         "status": "ok",
@@ -981,7 +1224,7 @@ async def get_cache_stats_api(request: Request):
                         "last_asset_clear_at": match["last_asset_clear_at"] if match else None
                     }
                 except Exception as e:
-                    match = next((a for a in accounts if a["token"] == token), None)
+                    match = account_map.get(token)
                     online_stats = {
                         "count": 0,
                         "status": f"error: {str(e)}",
@@ -1000,18 +1243,124 @@ async def get_cache_stats_api(request: Request):
             "online_scope": scope or "none",
             "online_details": online_details
         }
+    finally:
+        await list_service.close()
+
+
+_DISCONNECT_POLL_INTERVAL = 0.5
+
+
+async def _run_unless_disconnected(request: Request, coro):
+    """执行 coro，期间定期检查客户端是否已断开；断开则取消并返回 None"""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait((task,), timeout=_DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.wait((task,))
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+@router.get("/api/v1/admin/cache", dependencies=[Depends(verify_api_key)])
+async def get_cache_stats_api(request: Request):
+    """获取缓存统计"""
+    scope = request.query_params.get("scope")
+    selected_token = request.query_params.get("token")
+    tokens_param = request.query_params.get("tokens")
+    selected_tokens = []
+    if tokens_param:
+        selected_tokens = [t.strip() for t in tokens_param.split(",") if t.strip()]
+
+    # refresh=1 跳过 scope=all 的快照，强制重新查询上游
+    refresh = request.query_params.get("refresh") in ("1", "true")
+
+    key = (scope, selected_token, tuple(sorted(selected_tokens)), refresh)
+    try:
+        result = await _run_unless_disconnected(
+            request,
+            _single_flight(
+                _cache_stats_inflight,
+                key,
+                lambda: _compute_cache_stats(scope, selected_token, selected_tokens, refresh),
+            ),
+        )
+        if result is None:
+            return Response(status_code=499)
+        # 直接交给 orjson 序列化，跳过 jsonable_encoder 对大列表的逐项遍历
+        return ORJSONResponse(content=result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/api/v1/admin/cache/stream", dependencies=[Depends(verify_api_key)])
+async def stream_cache_stats_api(request: Request):
+    """流式获取缓存统计（NDJSON）
+
+    首行为 header（本地缓存统计 + 账号列表），之后每完成一个 token 输出一行 detail，
+    最后一行为 summary。`tokens` 指定 token（逗号分隔），缺省为全部账号。
+    """
+
+    mgr = await get_token_manager()
+    accounts = mgr.accounts_snapshot()
+    account_map = {a["token"]: a for a in accounts}
+
+    tokens_param = request.query_params.get("tokens")
+    if tokens_param:
+        tokens = [t.strip() for t in tokens_param.split(",") if t.strip()]
+    else:
+        tokens = [a["token"] for a in accounts]
+
+    local_image, local_video = await _local_media_stats()
+    header = {
+        "type": "header",
+        "local_image": local_image,
+        "local_video": local_video,
+        "online_accounts": accounts,
+        "online_scope": "selected" if tokens_param else "all",
+        "total": len(tokens),
+    }
+
+    async def _iter_lines():
+        list_service = ListService()
+        sem = asyncio.Semaphore(_resolve_admin_assets_batch_size())
+
+        async def _guarded_detail(token: str):
+            async with sem:
+                return await _fetch_asset_detail(list_service, token, account_map.get(token))
+
+        tasks = [asyncio.create_task(_guarded_detail(token)) for token in tokens]
+        try:
+            yield orjson.dumps(header) + b"\n"
+            total = 0
+            for next_done in asyncio.as_completed(tasks):
+                detail = await next_done
+                total += detail.count
+                yield orjson.dumps({"type": "detail", **detail._asdict()}) + b"\n"
+            yield orjson.dumps(
+                {"type": "summary", "count": total, "status": "ok" if tokens else "no_token"}
+            ) + b"\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            await list_service.close()
+
+    return StreamingResponse(_iter_lines(), media_type="application/x-ndjson")
+
 @router.post("/api/v1/admin/cache/clear", dependencies=[Depends(verify_api_key)])
 async def clear_local_cache_api(data: dict):
     """清理本地缓存"""
-    from app.services.grok.assets import DownloadService
     cache_type = data.get("type", "image")
     
     try:
-        dl_service = DownloadService()
+        dl_service = _get_download_service()
         result = dl_service.clear(cache_type)
+        _invalidate_local_stats()
         return {"status": "success", "result": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1024,11 +1373,10 @@ async def list_local_cache_api(
     page_size: int = 1000
 ):
     """列出本地缓存文件"""
-    from app.services.grok.assets import DownloadService
     try:
         if type_:
             cache_type = type_
-        dl_service = DownloadService()
+        dl_service = _get_download_service()
         result = dl_service.list_files(cache_type, page, page_size)
         return {"status": "success", **result}
     except Exception as e:
@@ -1037,14 +1385,14 @@ async def list_local_cache_api(
 @router.post("/api/v1/admin/cache/item/delete", dependencies=[Depends(verify_api_key)])
 async def delete_local_cache_item_api(data: dict):
     """删除单个本地缓存文件"""
-    from app.services.grok.assets import DownloadService
     cache_type = data.get("type", "image")
     name = data.get("name")
     if not name:
         raise HTTPException(status_code=400, detail="Missing file name")
     try:
-        dl_service = DownloadService()
+        dl_service = _get_download_service()
         result = dl_service.delete_file(cache_type, name)
+        _invalidate_local_stats()
         return {"status": "success", "result": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1052,8 +1400,6 @@ async def delete_local_cache_item_api(data: dict):
 @router.post("/api/v1/admin/cache/online/clear", dependencies=[Depends(verify_api_key)])
 async def clear_online_cache_api(data: dict):
     """清理在线缓存"""
-    from app.services.grok.assets import DeleteService
-    from app.services.token.manager import get_token_manager
     
     delete_service = None
     try:
@@ -1067,26 +1413,21 @@ async def clear_online_cache_api(data: dict):
                 raise HTTPException(status_code=400, detail="No tokens provided")
 
             results = {}
-            batch_size = get_config("performance.admin_assets_batch_size", 10)
-            try:
-                batch_size = int(batch_size)
-            except Exception:
-                batch_size = 10
-            batch_size = max(1, batch_size)
+            sem = asyncio.Semaphore(_resolve_admin_assets_batch_size())
 
             async def _clear_one(t: str):
-                try:
-                    result = await delete_service.delete_all(t)
-                    await mgr.mark_asset_clear(t)
-                    return t, {"status": "success", "result": result}
-                except Exception as e:
-                    return t, {"status": "error", "error": str(e)}
+                async with sem:
+                    try:
+                        result = await delete_service.delete_all(t)
+                        _invalidate_asset_count(t)
+                        await mgr.mark_asset_clear(t)
+                        return t, {"status": "success", "result": result}
+                    except Exception as e:
+                        return t, {"status": "error", "error": str(e)}
 
-            for i in range(0, len(token_list), batch_size):
-                chunk = token_list[i:i + batch_size]
-                res_list = await asyncio.gather(*[_clear_one(t) for t in chunk])
-                for t, res in res_list:
-                    results[t] = res
+            res_list = await asyncio.gather(*[_clear_one(t) for t in token_list])
+            for t, res in res_list:
+                results[t] = res
 
             return {"status": "success", "results": results}
 
@@ -1095,6 +1436,7 @@ async def clear_online_cache_api(data: dict):
             raise HTTPException(status_code=400, detail="No available token to perform cleanup")
 
         result = await delete_service.delete_all(token)
+        _invalidate_asset_count(token)
         await mgr.mark_asset_clear(token)
         return {"status": "success", "result": result}
     except Exception as e:
@@ -1108,44 +1450,25 @@ async def clear_online_cache_api(data: dict):
 async def get_metrics_api():
     """数据中心：聚合常用指标（token/cache/request_stats）。"""
     try:
-        from app.services.request_stats import request_stats
-        from app.services.token.manager import get_token_manager
-        from app.services.token.models import TokenStatus
-        from app.services.grok.assets import DownloadService
 
         mgr = await get_token_manager()
         await mgr.reload_if_stale()
 
-        total = 0
-        active = 0
-        cooling = 0
-        expired = 0
-        disabled = 0
-        chat_quota = 0
-        total_calls = 0
-
-        for pool in mgr.pools.values():
-            for info in pool.list():
-                total += 1
-                total_calls += int(getattr(info, "use_count", 0) or 0)
-                if info.status == TokenStatus.ACTIVE:
-                    active += 1
-                    chat_quota += int(getattr(info, "quota", 0) or 0)
-                elif info.status == TokenStatus.COOLING:
-                    cooling += 1
-                elif info.status == TokenStatus.EXPIRED:
-                    expired += 1
-                elif info.status == TokenStatus.DISABLED:
-                    disabled += 1
-
-        dl = DownloadService()
-        local_image = dl.get_stats("image")
-        local_video = dl.get_stats("video")
+        counts = mgr.status_counts()
+        total = counts["total"]
+        active = counts["active"]
+        cooling = counts["cooling"]
+        expired = counts["expired"]
+        disabled = counts["disabled"]
+        chat_quota = counts["chat_quota"]
+        total_calls = counts["total_calls"]
+
+        local_image, local_video = await _local_media_stats()
 
         await request_stats.init()
         stats = request_stats.get_stats(hours=24, days=7)
 
-        return {
+        return ORJSONResponse(content={
             "tokens": {
                 "total": total,
                 "active": active,
@@ -1161,7 +1484,7 @@ async def get_metrics_api():
                 "local_video": local_video,
             },
             "request_stats": stats,
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1169,12 +1492,8 @@ async def get_metrics_api():
 @router.get("/api/v1/admin/cache/local", dependencies=[Depends(verify_api_key)])
 async def get_cache_local_stats_api():
     """仅获取本地缓存统计（用于前端实时刷新）。"""
-    from app.services.grok.assets import DownloadService
-
     try:
-        dl_service = DownloadService()
-        image_stats = dl_service.get_stats("image")
-        video_stats = dl_service.get_stats("video")
+        image_stats, video_stats = await _local_media_stats()
         return {"local_image": image_stats, "local_video": video_stats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1182,7 +1501,6 @@ async def get_cache_local_stats_api():
 
 def _safe_log_file_path(name: str) -> Path:
     """Resolve a log file name under ./logs safely."""
-    from app.core.logger import LOG_DIR
 
     name = (name or "").strip()
     if not name:
@@ -1203,16 +1521,16 @@ def _format_log_line(raw: str) -> str:
     raw = (raw or "").rstrip("\r\n")
     if not raw:
         return ""
+    # Plain-text lines can never be JSON objects; skip the parse attempt.
+    if raw[0] != "{":
+        return raw
 
     # Try JSON log line (our file sink uses json lines).
     try:
-        obj = json.loads(raw)
+        obj = orjson.loads(raw)
         if not isinstance(obj, dict):
             return raw
-        ts = str(obj.get("time", "") or "")
-        ts = ts.replace("T", " ")
-        if len(ts) >= 19:
-            ts = ts[:19]
+        ts = str(obj.get("time", "") or "")[:19].replace("T", " ")
         level = str(obj.get("level", "") or "").upper()
         caller = str(obj.get("caller", "") or "")
         msg = str(obj.get("msg", "") or "")
@@ -1223,6 +1541,11 @@ def _format_log_line(raw: str) -> str:
         return raw
 
 
+_TAIL_BLOCK_SIZE = 32 * 1024
+# 流式 tail 最多回溯的字节数
+_TAIL_MAX_BYTES = 1024 * 1024
+
+
 def _tail_lines(path: Path, max_lines: int = 2000, max_bytes: int = 1024 * 1024) -> list[str]:
     """Best-effort tail for a text file."""
     try:
@@ -1232,13 +1555,23 @@ def _tail_lines(path: Path, max_lines: int = 2000, max_bytes: int = 1024 * 1024)
     max_lines = max(1, min(5000, max_lines))
     max_bytes = max(16 * 1024, min(5 * 1024 * 1024, int(max_bytes)))
 
+    # 从文件末尾按块倒读，凑够 max_lines+1 个换行即停止，避免解码整个窗口
+    chunks: list[bytes] = []
+    newlines = 0
+    read = 0
     with open(path, "rb") as f:
         f.seek(0, os.SEEK_END)
-        end = f.tell()
-        start = max(0, end - max_bytes)
-        f.seek(start, os.SEEK_SET)
-        data = f.read()
-
+        start = f.tell()
+        while start > 0 and read < max_bytes and newlines <= max_lines:
+            size = min(_TAIL_BLOCK_SIZE, start, max_bytes - read)
+            start -= size
+            f.seek(start, os.SEEK_SET)
+            chunk = f.read(size)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+            read += size
+
+    data = b"".join(reversed(chunks))
     text = data.decode("utf-8", errors="replace")
     lines = text.splitlines()
     # If we read from the middle of a line, drop the first partial line.
@@ -1248,27 +1581,94 @@ def _tail_lines(path: Path, max_lines: int = 2000, max_bytes: int = 1024 * 1024)
     return [_format_log_line(ln) for ln in lines if ln is not None]
 
 
+_LOG_LISTING_TTL = 2.0
+# (monotonic ts, items)，按 mtime 倒序
+_log_listing_cache: tuple[float, list[dict]] | None = None
+
+
+def _scan_log_files(log_dir: Path) -> list[dict]:
+    items = []
+    try:
+        it = os.scandir(log_dir)
+    except FileNotFoundError:
+        return items
+    with it:
+        for entry in it:
+            if entry.name.startswith(".") or not entry.name.endswith(".log"):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            items.append(
+                {
+                    "name": entry.name,
+                    "size_bytes": stat.st_size,
+                    "mtime_ms": int(stat.st_mtime * 1000),
+                }
+            )
+    items.sort(key=lambda x: x["mtime_ms"], reverse=True)
+    return items
+
+
+async def _list_log_files(log_dir: Path) -> list[dict]:
+    """日志文件列表：线程中 scandir，短 TTL 缓存应对轮询"""
+    global _log_listing_cache
+    cached = _log_listing_cache
+    if cached and time.monotonic() - cached[0] < _LOG_LISTING_TTL:
+        return cached[1]
+    items = await asyncio.to_thread(_scan_log_files, log_dir)
+    _log_listing_cache = (time.monotonic(), items)
+    return items
+
+
+def _tail_start_offset(f, max_lines: int, max_bytes: int) -> tuple[int, int]:
+    """倒序按块扫描换行，返回最后 max_lines 行的起始偏移与当前文件末尾 (start, end)"""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    if end == 0:
+        return 0, 0
+    f.seek(end - 1, os.SEEK_SET)
+    # 末尾换行属于最后一行，需要多找一个
+    needed = max_lines + (1 if f.read(1) == b"\n" else 0)
+    limit = max(0, end - max_bytes)
+    pos = end
+    found = 0
+    while pos > limit:
+        size = min(_TAIL_BLOCK_SIZE, pos - limit)
+        pos -= size
+        f.seek(pos, os.SEEK_SET)
+        chunk = f.read(size)
+        idx = len(chunk)
+        while True:
+            idx = chunk.rfind(b"\n", 0, idx)
+            if idx < 0:
+                break
+            found += 1
+            if found == needed:
+                return pos + idx + 1, end
+    if limit == 0:
+        return 0, end
+    # 命中 max_bytes 上限：丢弃窗口开头不完整的一行
+    f.seek(limit, os.SEEK_SET)
+    head = f.read(min(_TAIL_BLOCK_SIZE, end - limit))
+    idx = head.find(b"\n")
+    return (limit + idx + 1 if idx >= 0 else end), end
+
+
+def _read_tail_block(f, pos: int, end: int) -> bytes:
+    f.seek(pos, os.SEEK_SET)
+    return f.read(min(_TAIL_BLOCK_SIZE, end - pos))
+
+
 @router.get("/api/v1/admin/logs/files", dependencies=[Depends(verify_api_key)])
 async def list_log_files_api():
     """列出可查看的日志文件（logs/*.log）。"""
-    from app.core.logger import LOG_DIR
 
     try:
-        items = []
-        for p in LOG_DIR.glob("*.log"):
-            try:
-                stat = p.stat()
-                items.append(
-                    {
-                        "name": p.name,
-                        "size_bytes": stat.st_size,
-                        "mtime_ms": int(stat.st_mtime * 1000),
-                    }
-                )
-            except Exception:
-                continue
-        items.sort(key=lambda x: x["mtime_ms"], reverse=True)
-        return {"files": items}
+        return {"files": await _list_log_files(LOG_DIR)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1276,16 +1676,15 @@ async def list_log_files_api():
 @router.get("/api/v1/admin/logs/tail", dependencies=[Depends(verify_api_key)])
 async def tail_log_api(file: str | None = None, lines: int = 500):
     """读取后台日志（尾部）。"""
-    from app.core.logger import LOG_DIR
 
     try:
         # Default to latest log.
         if not file:
-            candidates = sorted(LOG_DIR.glob("*.log"), key=lambda p: p.stat().st_mtime if p.exists() else 0, reverse=True)
+            candidates = await _list_log_files(LOG_DIR)
             if not candidates:
                 return {"file": None, "lines": []}
-            path = candidates[0]
-            file = path.name
+            file = candidates[0]["name"]
+            path = LOG_DIR / file
         else:
             path = _safe_log_file_path(file)
 
@@ -1297,3 +1696,61 @@ async def tail_log_api(file: str | None = None, lines: int = 500):
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/api/v1/admin/logs/tail/stream", dependencies=[Depends(verify_api_key)])
+async def stream_tail_log_api(file: str | None = None, lines: int = 500):
+    """流式读取后台日志尾部（NDJSON）：首行 {"file": ...}，之后每行 {"line": ...}。"""
+
+    try:
+        if not file:
+            candidates = await _list_log_files(LOG_DIR)
+            if not candidates:
+                file = None
+                path = None
+            else:
+                file = candidates[0]["name"]
+                path = LOG_DIR / file
+        else:
+            path = _safe_log_file_path(file)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Log file not found")
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    try:
+        max_lines = max(1, min(5000, int(lines)))
+    except Exception:
+        max_lines = 2000
+
+    async def _iter_lines():
+        yield orjson.dumps({"file": file}) + b"\n"
+        if path is None:
+            return
+        try:
+            f = await asyncio.to_thread(open, path, "rb")
+        except FileNotFoundError:
+            return
+        try:
+            pos, end = await asyncio.to_thread(_tail_start_offset, f, max_lines, _TAIL_MAX_BYTES)
+            # 只在内存中保留一个块和上一块的残行
+            rest = b""
+            while pos < end:
+                block = await asyncio.to_thread(_read_tail_block, f, pos, end)
+                if not block:
+                    break
+                pos += len(block)
+                parts = (rest + block).split(b"\n")
+                rest = parts.pop()
+                for raw in parts:
+                    yield orjson.dumps(
+                        {"line": _format_log_line(raw.decode("utf-8", errors="replace"))}
+                    ) + b"\n"
+            if rest:
+                yield orjson.dumps(
+                    {"line": _format_log_line(rest.decode("utf-8", errors="replace"))}
+                ) + b"\n"
+        finally:
+            f.close()
+
+    return StreamingResponse(_iter_lines(), media_type="application/x-ndjson")
@@ -5,19 +5,21 @@ Image Generation API 路由
 import asyncio
 import base64
 import random
+import time
 from pathlib import Path
 from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 
+import anyio
 import orjson
 from fastapi import APIRouter, Depends, File, Form, UploadFile
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field, ValidationError
 
 from app.core.auth import verify_api_key
 from app.core.config import get_config
 from app.core.exceptions import AppException, ErrorType, UpstreamException, ValidationException
 from app.core.logger import logger
-from app.services.grok.assets import UploadService
+from app.services.grok.assets import get_upload_service
 from app.services.grok.chat import GrokChatService
 from app.services.grok.imagine_experimental import (
     IMAGE_METHOD_IMAGINE_WS_EXPERIMENTAL,
@@ -29,6 +31,8 @@ from app.services.grok.imagine_generation import (
     call_experimental_generation_once,
     collect_experimental_generation_images,
     dedupe_images as dedupe_imagine_images,
+    gather_limited as gather_imagine_limited,
+    get_imagine_service,
     is_valid_image_value as is_valid_imagine_image_value,
     resolve_aspect_ratio as resolve_imagine_aspect_ratio,
 )
@@ -40,7 +44,11 @@ from app.services.token import get_token_manager
 
 
 router = APIRouter(tags=["Images"])
-ALLOWED_RESPONSE_FORMATS = {"b64_json", "base64", "url"}
+_now = time.time
+# 负载均为 str/int 组成的 dict，无需 default/option
+_dumps = orjson.dumps
+ALLOWED_RESPONSE_FORMATS: frozenset[str] = frozenset(("b64_json", "base64", "url"))
+_ALLOWED_FORMATS_MSG = f"response_format must be one of {sorted(ALLOWED_RESPONSE_FORMATS)}"
 
 
 class ImageGenerationRequest(BaseModel):
@@ -96,16 +104,11 @@ def validate_generation_request(request: ImageGenerationRequest):
             code="empty_prompt",
         )
 
+    # n/concurrency 的取值范围已由 Field(ge/le) 校验，这里只补默认值
     if request.n is None:
         request.n = 1
-    if request.n < 1 or request.n > 10:
-        raise ValidationException(
-            message="n must be between 1 and 10",
-            param="n",
-            code="invalid_n",
-        )
 
-    if request.stream and request.n not in [1, 2]:
+    if request.stream and request.n not in (1, 2):
         raise ValidationException(
             message="Streaming is only supported when n=1 or n=2",
             param="stream",
@@ -114,18 +117,11 @@ def validate_generation_request(request: ImageGenerationRequest):
 
     if request.concurrency is None:
         request.concurrency = 1
-    if request.concurrency < 1 or request.concurrency > 3:
-        raise ValidationException(
-            message="concurrency must be between 1 and 3",
-            param="concurrency",
-            code="invalid_concurrency",
-        )
 
-    if request.response_format:
-        candidate = request.response_format.lower()
-        if candidate not in ALLOWED_RESPONSE_FORMATS:
+    if request.response_format and request.response_format not in ALLOWED_RESPONSE_FORMATS:
+        if request.response_format.lower() not in ALLOWED_RESPONSE_FORMATS:
             raise ValidationException(
-                message=f"response_format must be one of {sorted(ALLOWED_RESPONSE_FORMATS)}",
+                message=_ALLOWED_FORMATS_MSG,
                 param="response_format",
                 code="invalid_response_format",
             )
@@ -156,27 +152,21 @@ def validate_edit_request(request: ImageEditRequest, images: List[UploadFile]):
             code="empty_prompt",
         )
 
+    # n 的取值范围已由 Field(ge=1, le=10) 校验，这里只补默认值
     if request.n is None:
         request.n = 1
-    if request.n < 1 or request.n > 10:
-        raise ValidationException(
-            message="n must be between 1 and 10",
-            param="n",
-            code="invalid_n",
-        )
 
-    if request.stream and request.n not in [1, 2]:
+    if request.stream and request.n not in (1, 2):
         raise ValidationException(
             message="Streaming is only supported when n=1 or n=2",
             param="stream",
             code="invalid_stream_n",
         )
 
-    if request.response_format:
-        candidate = request.response_format.lower()
-        if candidate not in ALLOWED_RESPONSE_FORMATS:
+    if request.response_format and request.response_format not in ALLOWED_RESPONSE_FORMATS:
+        if request.response_format.lower() not in ALLOWED_RESPONSE_FORMATS:
             raise ValidationException(
-                message=f"response_format must be one of {sorted(ALLOWED_RESPONSE_FORMATS)}",
+                message=_ALLOWED_FORMATS_MSG,
                 param="response_format",
                 code="invalid_response_format",
             )
@@ -195,16 +185,19 @@ def validate_edit_request(request: ImageEditRequest, images: List[UploadFile]):
         )
 
 
-def resolve_response_format(response_format: Optional[str]) -> str:
+def resolve_response_format(response_format: Optional[str], default_format: Any = None) -> str:
     candidate = response_format
     if not candidate:
-        candidate = get_config("app.image_format", "url")
+        candidate = default_format if default_format is not None else get_config("app.image_format", "url")
+    # 常见情况客户端已传小写值，命中则跳过 lower()
+    if candidate in ALLOWED_RESPONSE_FORMATS:
+        return candidate
     if isinstance(candidate, str):
         candidate = candidate.lower()
     if candidate in ALLOWED_RESPONSE_FORMATS:
         return candidate
     raise ValidationException(
-        message=f"response_format must be one of {sorted(ALLOWED_RESPONSE_FORMATS)}",
+        message=_ALLOWED_FORMATS_MSG,
         param="response_format",
         code="invalid_response_format",
     )
@@ -213,18 +206,25 @@ def resolve_response_format(response_format: Optional[str]) -> str:
 def resolve_image_response_format(
     response_format: Optional[str],
     image_method: str,
+    default_format: Any = None,
 ) -> str:
     """
     Keep legacy behavior, but for experimental imagine path:
     if caller does not explicitly provide response_format and global default is `url`,
     prefer `b64_json` to avoid loopback URL rendering issues in local deployments.
+
+    `default_format` (app.image_format) is read at most once per request and passed down.
     """
     raw = response_format if not isinstance(response_format, str) else response_format.strip()
-    if not raw and image_method == IMAGE_METHOD_IMAGINE_WS_EXPERIMENTAL:
-        default_format = str(get_config("app.image_format", "url") or "url").strip().lower()
-        if default_format == "url":
+    if not raw:
+        if default_format is None:
+            default_format = get_config("app.image_format", "url")
+        if (
+            image_method == IMAGE_METHOD_IMAGINE_WS_EXPERIMENTAL
+            and str(default_format or "url").strip().lower() == "url"
+        ):
             return "b64_json"
-    return resolve_response_format(response_format)
+    return resolve_response_format(response_format, default_format)
 
 
 def response_field_name(response_format: str) -> str:
@@ -235,6 +235,10 @@ def response_field_name(response_format: str) -> str:
     return "b64_json"
 
 
+def _imagine_service() -> ImagineExperimentalService:
+    return get_imagine_service()
+
+
 def _image_generation_method() -> str:
     return resolve_image_generation_method(
         get_config("grok.image_generation_method", IMAGE_METHOD_LEGACY)
@@ -257,13 +261,7 @@ async def _gather_limited(
     task_factories: List[Callable[[], Awaitable[List[str]]]],
     max_concurrency: int,
 ) -> List[Any]:
-    sem = asyncio.Semaphore(max(1, int(max_concurrency or 1)))
-
-    async def _run(factory: Callable[[], Awaitable[List[str]]]) -> Any:
-        async with sem:
-            return await factory()
-
-    return await asyncio.gather(*[_run(factory) for factory in task_factories], return_exceptions=True)
+    return await gather_imagine_limited(task_factories, max_concurrency)
 
 
 async def call_grok_legacy(
@@ -323,7 +321,7 @@ async def call_grok_experimental_edit(
     file_uris: List[str],
     response_format: str = "b64_json",
 ) -> List[str]:
-    service = ImagineExperimentalService()
+    service = _imagine_service()
     response = await service.chat_edit(token=token, prompt=prompt, file_uris=file_uris)
     processor = ImageCollectProcessor(
         model_id,
@@ -360,23 +358,23 @@ async def _experimental_stream_generation(
     aspect_ratio: str,
     state: dict[str, Any],
 ):
-    service = ImagineExperimentalService()
-    queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+    service = _imagine_service()
+    # 单生产者/单消费者，内存流比 asyncio.Queue 轻量且自带背压；发送端关闭即结束
+    send_stream, recv_stream = anyio.create_memory_object_stream[bytes](32)
     index_map: Dict[int, int] = {}
-    map_lock = asyncio.Lock()
     next_output_index = 0
 
-    async def _resolve_output_index(raw_index: int) -> int:
+    # 同步函数内没有 await，单事件循环下天然原子，无需加锁
+    def _resolve_output_index(raw_index: int) -> int:
         nonlocal next_output_index
-        async with map_lock:
-            if raw_index not in index_map:
-                index_map[raw_index] = min(next_output_index, max(0, n - 1))
-                next_output_index += 1
-            return index_map[raw_index]
+        if raw_index not in index_map:
+            index_map[raw_index] = min(next_output_index, max(0, n - 1))
+            next_output_index += 1
+        return index_map[raw_index]
 
     async def _progress_cb(raw_index: int, progress: float):
-        idx = await _resolve_output_index(raw_index)
-        await queue.put(
+        idx = _resolve_output_index(raw_index)
+        await send_stream.send(
             _sse_event(
                 "image_generation.partial_image",
                 {
@@ -389,7 +387,7 @@ async def _experimental_stream_generation(
         )
 
     async def _completed_cb(raw_index: int, raw_url: str):
-        idx = await _resolve_output_index(raw_index)
+        idx = _resolve_output_index(raw_index)
         converted = await service.convert_url(
             token=token,
             url=raw_url,
@@ -399,19 +397,14 @@ async def _experimental_stream_generation(
             return
 
         state["success"] = True
-        await queue.put(
+        await send_stream.send(
             _sse_event(
                 "image_generation.completed",
                 {
                     "type": "image_generation.completed",
                     response_field: converted,
                     "index": idx,
-                    "usage": {
-                        "total_tokens": 50,
-                        "input_tokens": 25,
-                        "output_tokens": 25,
-                        "input_tokens_details": {"text_tokens": 5, "image_tokens": 20},
-                    },
+                    "usage": _USAGE_COMPLETED,
                 },
             )
         )
@@ -420,27 +413,26 @@ async def _experimental_stream_generation(
 
     async def _producer():
         nonlocal producer_error
-        try:
-            await service.generate_ws(
-                token=token,
-                prompt=prompt,
-                n=n,
-                aspect_ratio=aspect_ratio,
-                progress_cb=_progress_cb,
-                completed_cb=_completed_cb,
-            )
-        except Exception as exc:
-            producer_error = exc
-        finally:
-            await queue.put(None)
+        async with send_stream:
+            try:
+                await service.generate_ws(
+                    token=token,
+                    prompt=prompt,
+                    n=n,
+                    aspect_ratio=aspect_ratio,
+                    progress_cb=_progress_cb,
+                    completed_cb=_completed_cb,
+                )
+            except Exception as exc:
+                producer_error = exc
 
     producer_task = asyncio.create_task(_producer())
     try:
-        while True:
-            chunk = await queue.get()
-            if chunk is None:
-                break
-            yield chunk
+        # 先关闭接收端再等待生产者，避免缓冲区满时生产者阻塞在 send 上
+        async with recv_stream:
+            async for chunk in recv_stream:
+                for part in _split_frame(chunk):
+                    yield part
     finally:
         await producer_task
 
@@ -450,8 +442,43 @@ async def _experimental_stream_generation(
         raise UpstreamException("Experimental imagine websocket returned no images")
 
 
-def _sse_event(event: str, data: dict) -> str:
-    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+# 每帧相同的 usage 常量，共享同一对象，避免逐帧重建
+_USAGE_COMPLETED = {
+    "total_tokens": 50,
+    "input_tokens": 25,
+    "output_tokens": 25,
+    "input_tokens_details": {"text_tokens": 5, "image_tokens": 20},
+}
+_USAGE_EMPTY = {
+    "total_tokens": 0,
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "input_tokens_details": {"text_tokens": 0, "image_tokens": 0},
+}
+
+_EVT_PARTIAL = b"event: image_generation.partial_image\ndata: "
+_EVT_COMPLETED = b"event: image_generation.completed\ndata: "
+_SSE_EVENT_PREFIXES = {
+    "image_generation.partial_image": _EVT_PARTIAL,
+    "image_generation.completed": _EVT_COMPLETED,
+}
+
+
+def _sse_event(event: str, data: dict) -> bytes:
+    # 直接拼 bytes，StreamingResponse 原样写出，省去 decode/encode 往返
+    prefix = _SSE_EVENT_PREFIXES.get(event) or b"event: " + event.encode() + b"\ndata: "
+    return prefix + _dumps(data) + b"\n\n"
+
+
+_SSE_WRITE_CHUNK = 64 * 1024
+
+
+def _split_frame(frame: bytes):
+    """大帧（携带 base64 图片）按 64KB 切片分别写出，客户端可边收边解析；小帧原样返回"""
+    if len(frame) <= _SSE_WRITE_CHUNK:
+        return (frame,)
+    # 切成 bytes 而非 memoryview：中间件与 ASGI 服务器只保证处理 bytes
+    return [frame[i : i + _SSE_WRITE_CHUNK] for i in range(0, len(frame), _SSE_WRITE_CHUNK)]
 
 
 async def _synthetic_image_stream(
@@ -472,20 +499,17 @@ async def _synthetic_image_stream(
                 "progress": 100,
             },
         )
-        yield _sse_event(
+        completed = _sse_event(
             "image_generation.completed",
             {
                 "type": "image_generation.completed",
                 response_field: image,
                 "index": idx,
-                "usage": {
-                    "total_tokens": 50,
-                    "input_tokens": 25,
-                    "output_tokens": 25,
-                    "input_tokens_details": {"text_tokens": 5, "image_tokens": 20},
-                },
+                "usage": _USAGE_COMPLETED,
             },
         )
+        for part in _split_frame(completed):
+            yield part
     if not emitted:
         yield _sse_event(
             "image_generation.completed",
@@ -493,16 +517,114 @@ async def _synthetic_image_stream(
                 "type": "image_generation.completed",
                 response_field: "error",
                 "index": 0,
-                "usage": {
-                    "total_tokens": 0,
-                    "input_tokens": 0,
-                    "output_tokens": 0,
-                    "input_tokens_details": {"text_tokens": 0, "image_tokens": 0},
-                },
+                "usage": _USAGE_EMPTY,
             },
         )
 
 
+_UPLOAD_READ_CHUNK = 1 << 20
+
+
+async def _read_upload_limited(item: UploadFile, max_bytes: int) -> bytes:
+    """分块读取上传文件，超过 max_bytes 立即拒绝，不必读完整个文件"""
+    buf = bytearray()
+    while chunk := await item.read(_UPLOAD_READ_CHUNK):
+        buf += chunk
+        if len(buf) > max_bytes:
+            raise ValidationException(
+                message="Image file too large. Maximum is 50MB.",
+                param="image",
+                code="file_too_large",
+            )
+    return bytes(buf)
+
+
+_UPLOAD_MAX_BYTES = 50 * 1024 * 1024
+_ALLOWED_IMAGE_MIMES = frozenset(("image/png", "image/jpeg", "image/webp"))
+_EXT_TO_MIME = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+_UPLOAD_CONCURRENCY = 8
+# 小于该大小时线程切换开销大于编码本身，直接在事件循环中编码
+_UPLOAD_THREAD_ENCODE_MIN = 256 * 1024
+
+
+async def _process_upload(item: UploadFile) -> str:
+    """读取并校验单个上传图片，返回 data URI"""
+    try:
+        content = await _read_upload_limited(item, _UPLOAD_MAX_BYTES)
+    finally:
+        await item.close()
+    if not content:
+        raise ValidationException(
+            message="File content is empty",
+            param="image",
+            code="empty_file",
+        )
+
+    mime = (item.content_type or "").lower()
+    if mime == "image/jpg":
+        mime = "image/jpeg"
+    if mime not in _ALLOWED_IMAGE_MIMES:
+        mime = _EXT_TO_MIME.get(Path(item.filename or "").suffix.lower())
+        if mime is None:
+            raise ValidationException(
+                message="Unsupported image type. Supported: png, jpg, webp.",
+                param="image",
+                code="invalid_image_type",
+            )
+
+    if len(content) >= _UPLOAD_THREAD_ENCODE_MIN:
+        # 大文件的编码与拼接整体放到线程里，避免阻塞事件循环
+        return await asyncio.to_thread(_build_data_uri, mime, content)
+    return _build_data_uri(mime, content)
+
+
+def _build_data_uri(mime: str, content: bytes) -> str:
+    """在单个 bytearray 中拼出 data URI，最后一次性解码为 str"""
+    buf = bytearray(b"data:")
+    buf += mime.encode("ascii")
+    buf += b";base64,"
+    buf += base64.b64encode(content)
+    return buf.decode("ascii")
+
+
+async def _upload_payloads(payloads: List[str], token: str) -> tuple[List[str], List[str]]:
+    """并发上传图片，相同内容只上传一次；按原顺序返回 (file_ids, file_uris)
+
+    任一上传失败时取消其余上传，并抛出该异常。
+    """
+    # 内容相同的 data URI 字符串相等，直接按字符串去重
+    unique: Dict[str, int] = {}
+    order = [unique.setdefault(payload, len(unique)) for payload in payloads]
+    # 按位置写入预分配的结果数组，无需追加或排序
+    ids: List[Optional[str]] = [None] * len(unique)
+    uris: List[Optional[str]] = [None] * len(unique)
+    # 进程级共享 UploadService（复用连接）；上游并发另受 assets 信号量限制
+    upload_service = get_upload_service()
+    sem = asyncio.Semaphore(_UPLOAD_CONCURRENCY)
+
+    async def _upload_at(index: int, payload: str):
+        async with sem:
+            ids[index], uris[index] = await upload_service.upload(payload, token)
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for index, payload in enumerate(unique):
+                tg.create_task(_upload_at(index, payload))
+    except BaseExceptionGroup as eg:
+        error = eg.exceptions[0]
+        logger.warning(f"Image edit upload failed: {error}")
+        raise error
+
+    file_ids = [ids[i] for i in order if ids[i]]
+    file_uris = [uris[i] for i in order if uris[i]]
+    return file_ids, file_uris
+
+
 async def _record_request(model_id: str, success: bool):
     try:
         await request_stats.record_request(model_id, success=success)
@@ -510,6 +632,72 @@ async def _record_request(model_id: str, success: bool):
         pass
 
 
+# 流式响应结束后的计费/统计写入放到后台队列，不阻塞最后一帧与连接关闭
+_ACCOUNTING_QUEUE_SIZE = 1024
+_accounting_state: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Queue, asyncio.Task]] = None
+
+
+async def _apply_accounting(token_mgr, token: str, model_id: str, success: bool):
+    try:
+        if success:
+            await token_mgr.sync_usage(
+                token,
+                model_id,
+                consume_on_fail=True,
+                is_usage=True,
+            )
+        await _record_request(model_id, success)
+    except Exception:
+        pass
+
+
+async def _accounting_worker(queue: asyncio.Queue):
+    while True:
+        item = await queue.get()
+        try:
+            await _apply_accounting(*item)
+        finally:
+            queue.task_done()
+
+
+def _enqueue_accounting(token_mgr, token: str, model_id: str, success: bool):
+    """投递一条计费记录；队列满时记录日志并丢弃"""
+    global _accounting_state
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning(f"No running loop for image accounting, dropping record: {model_id}")
+        return
+    state = _accounting_state
+    if state is None or state[0] is not loop or state[2].done():
+        queue = state[1] if state is not None and state[0] is loop else asyncio.Queue(_ACCOUNTING_QUEUE_SIZE)
+        state = (loop, queue, loop.create_task(_accounting_worker(queue)))
+        _accounting_state = state
+    try:
+        state[1].put_nowait((token_mgr, token, model_id, success))
+    except asyncio.QueueFull:
+        logger.warning(f"Image accounting queue full, dropping record: {model_id}")
+
+
+async def drain_accounting(timeout: float = 5.0):
+    """等待后台计费队列写完并停止 worker（应用关闭时调用）"""
+    global _accounting_state
+    state = _accounting_state
+    _accounting_state = None
+    if state is None or state[0] is not asyncio.get_running_loop():
+        return
+    _, queue, worker = state
+    try:
+        await asyncio.wait_for(queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Image accounting drain timed out, {queue.qsize()} records left")
+    worker.cancel()
+    try:
+        await worker
+    except asyncio.CancelledError:
+        pass
+
+
 async def _get_token_for_model(model_id: str):
     """获取指定模型可用 token，失败时抛出统一异常"""
     try:
@@ -536,30 +724,52 @@ async def _get_token_for_model(model_id: str):
     return token_mgr, token
 
 
+async def _collect_images_until(
+    task_factories: List[Callable[[], Awaitable[List[str]]]],
+    n: int,
+    on_error: Callable[[Exception], None],
+) -> List[str]:
+    """并发执行多次调用，凑够 n 张有效图片后取消其余调用"""
+    tasks = [asyncio.create_task(factory()) for factory in task_factories]
+    all_images: List[str] = []
+    valid = 0
+    try:
+        for fut in asyncio.as_completed(tasks):
+            try:
+                result = await fut
+            except Exception as e:
+                on_error(e)
+                continue
+            if isinstance(result, list):
+                all_images.extend(result)
+                valid += sum(1 for img in result if _is_valid_image_value(img))
+                if valid >= n:
+                    break
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    return all_images
+
+
 def _pick_images(all_images: List[str], n: int) -> List[str]:
-    if len(all_images) >= n:
+    if len(all_images) == n:
+        return all_images
+    if len(all_images) > n:
         return random.sample(all_images, n)
-    selected = all_images.copy()
-    while len(selected) < n:
-        selected.append("error")
-    return selected
-
-
-def _build_image_response(selected_images: List[str], response_field: str) -> JSONResponse:
-    import time
-
-    return JSONResponse(
-        content={
-            "created": int(time.time()),
-            "data": [{response_field: img} for img in selected_images],
-            "usage": {
-                "total_tokens": 0 * len([img for img in selected_images if img != "error"]),
-                "input_tokens": 0,
-                "output_tokens": 0 * len([img for img in selected_images if img != "error"]),
-                "input_tokens_details": {"text_tokens": 0, "image_tokens": 0},
-            },
-        }
-    )
+    return all_images + ["error"] * (n - len(all_images))
+
+
+def _build_image_response(selected_images: List[str], response_field: str) -> Response:
+    # 预先序列化为 bytes，直接返回 Response，不经过 jsonable_encoder
+    payload = {
+        "created": int(_now()),
+        "data": [{response_field: img} for img in selected_images],
+        "usage": _USAGE_EMPTY,
+    }
+    return Response(content=_dumps(payload), media_type="application/json")
 
 
 @router.get("/images/method")
@@ -651,19 +861,9 @@ async def create_image(
                                 yield chunk
                             stream_state["success"] = True
                 finally:
-                    try:
-                        if stream_state.get("success"):
-                            await token_mgr.sync_usage(
-                                token,
-                                model_info.model_id,
-                                consume_on_fail=True,
-                                is_usage=True,
-                            )
-                            await _record_request(model_info.model_id, True)
-                        else:
-                            await _record_request(model_info.model_id, False)
-                    except Exception:
-                        pass
+                    _enqueue_accounting(
+                        token_mgr, token, model_info.model_id, bool(stream_state.get("success"))
+                    )
 
             return StreamingResponse(
                 _wrapped_experimental_stream(),
@@ -699,19 +899,7 @@ async def create_image(
                     yield chunk
                 completed = True
             finally:
-                try:
-                    if completed:
-                        await token_mgr.sync_usage(
-                            token,
-                            model_info.model_id,
-                            consume_on_fail=True,
-                            is_usage=True,
-                        )
-                        await _record_request(model_info.model_id, True)
-                    else:
-                        await _record_request(model_info.model_id, False)
-                except Exception:
-                    pass
+                _enqueue_accounting(token_mgr, token, model_info.model_id, completed)
 
         return StreamingResponse(
             _wrapped_stream(),
@@ -735,17 +923,17 @@ async def create_image(
 
     if not all_images:
         calls_needed = (n + 1) // 2
-        task_factories: List[Callable[[], Awaitable[List[str]]]] = [
-            lambda: call_grok_legacy(
+
+        async def _one_call() -> List[str]:
+            return await call_grok_legacy(
                 token,
                 f"Image Generation: {request.prompt}",
                 model_info,
                 response_format=response_format,
             )
-            for _ in range(calls_needed)
-        ]
+
         results = await _gather_limited(
-            task_factories,
+            [_one_call] * calls_needed,
             max_concurrency=min(calls_needed, concurrency),
         )
 
@@ -793,15 +981,17 @@ async def edit_image(
     同官方 API 格式，仅支持 multipart/form-data 文件上传
     """
     try:
-        edit_request = ImageEditRequest(
-            prompt=prompt,
-            model=model,
-            n=n,
-            size=size,
-            quality=quality,
-            response_format=response_format,
-            style=style,
-            stream=stream,
+        edit_request = ImageEditRequest.model_validate(
+            {
+                "prompt": prompt,
+                "model": model,
+                "n": n,
+                "size": size,
+                "quality": quality,
+                "response_format": response_format,
+                "style": style,
+                "stream": stream,
+            }
         )
     except ValidationError as exc:
         errors = exc.errors()
@@ -832,66 +1022,25 @@ async def edit_image(
 
     await enforce_daily_quota(api_key, model_id, image_count=n)
 
-    max_image_bytes = 50 * 1024 * 1024
-    allowed_types = {"image/png", "image/jpeg", "image/webp", "image/jpg"}
-    image_payloads: List[str] = []
-
-    for item in images:
-        content = await item.read()
-        await item.close()
-        if not content:
-            raise ValidationException(
-                message="File content is empty",
-                param="image",
-                code="empty_file",
-            )
-        if len(content) > max_image_bytes:
-            raise ValidationException(
-                message="Image file too large. Maximum is 50MB.",
-                param="image",
-                code="file_too_large",
-            )
-
-        mime = (item.content_type or "").lower()
-        if mime == "image/jpg":
-            mime = "image/jpeg"
-        ext = Path(item.filename or "").suffix.lower()
-        if mime not in allowed_types:
-            if ext in (".jpg", ".jpeg"):
-                mime = "image/jpeg"
-            elif ext == ".png":
-                mime = "image/png"
-            elif ext == ".webp":
-                mime = "image/webp"
-            else:
-                raise ValidationException(
-                    message="Unsupported image type. Supported: png, jpg, webp.",
-                    param="image",
-                    code="invalid_image_type",
-                )
-
-        image_payloads.append(f"data:{mime};base64,{base64.b64encode(content).decode()}")
+    # 各文件读取/校验相互独立，限流并发处理；按原顺序抛出第一个错误
+    results = await _gather_limited(
+        [lambda item=item: _process_upload(item) for item in images],
+        _UPLOAD_CONCURRENCY,
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    image_payloads: List[str] = results
 
     token_mgr, token = await _get_token_for_model(model_id)
     model_info = ModelService.get(model_id)
 
-    file_ids: List[str] = []
-    file_uris: List[str] = []
-    upload_service = UploadService()
-    try:
-        for payload in image_payloads:
-            file_id, file_uri = await upload_service.upload(payload, token)
-            if file_id:
-                file_ids.append(file_id)
-            if file_uri:
-                file_uris.append(file_uri)
-    finally:
-        await upload_service.close()
+    file_ids, file_uris = await _upload_payloads(image_payloads, token)
 
     if edit_request.stream:
         if image_method == IMAGE_METHOD_IMAGINE_WS_EXPERIMENTAL:
             try:
-                service = ImagineExperimentalService()
+                service = _imagine_service()
                 response = await service.chat_edit(
                     token=token,
                     prompt=edit_request.prompt,
@@ -911,19 +1060,7 @@ async def edit_image(
                             yield chunk
                         completed = True
                     finally:
-                        try:
-                            if completed:
-                                await token_mgr.sync_usage(
-                                    token,
-                                    model_info.model_id,
-                                    consume_on_fail=True,
-                                    is_usage=True,
-                                )
-                                await _record_request(model_info.model_id, True)
-                            else:
-                                await _record_request(model_info.model_id, False)
-                        except Exception:
-                            pass
+                        _enqueue_accounting(token_mgr, token, model_info.model_id, completed)
 
                 return StreamingResponse(
                     _wrapped_experimental_stream(),
@@ -962,19 +1099,7 @@ async def edit_image(
                     yield chunk
                 completed = True
             finally:
-                try:
-                    if completed:
-                        await token_mgr.sync_usage(
-                            token,
-                            model_info.model_id,
-                            consume_on_fail=True,
-                            is_usage=True,
-                        )
-                        await _record_request(model_info.model_id, True)
-                    else:
-                        await _record_request(model_info.model_id, False)
-                except Exception:
-                    pass
+                _enqueue_accounting(token_mgr, token, model_info.model_id, completed)
 
         return StreamingResponse(
             _wrapped_stream(),
@@ -995,22 +1120,20 @@ async def edit_image(
                     response_format=response_format,
                 )
             else:
-                tasks = [
-                    call_grok_experimental_edit(
-                        token=token,
-                        prompt=edit_request.prompt,
-                        model_id=model_info.model_id,
-                        file_uris=file_uris,
-                        response_format=response_format,
-                    )
-                    for _ in range(calls_needed)
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                for result in results:
-                    if isinstance(result, Exception):
-                        logger.warning(f"Experimental image edit call failed: {result}")
-                    elif isinstance(result, list):
-                        all_images.extend(result)
+                all_images = await _collect_images_until(
+                    [
+                        lambda: call_grok_experimental_edit(
+                            token=token,
+                            prompt=edit_request.prompt,
+                            model_id=model_info.model_id,
+                            file_uris=file_uris,
+                            response_format=response_format,
+                        )
+                    ]
+                    * calls_needed,
+                    n,
+                    lambda e: logger.warning(f"Experimental image edit call failed: {e}"),
+                )
             if not all_images:
                 raise UpstreamException("Experimental image edit returned no images")
         except Exception as e:
@@ -1027,23 +1150,20 @@ async def edit_image(
                 response_format=response_format,
             )
         else:
-            tasks = [
-                call_grok_legacy(
-                    token,
-                    f"Image Edit: {edit_request.prompt}",
-                    model_info,
-                    file_attachments=file_ids,
-                    response_format=response_format,
-                )
-                for _ in range(calls_needed)
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            all_images = []
-            for result in results:
-                if isinstance(result, Exception):
-                    logger.error(f"Concurrent call failed: {result}")
-                elif isinstance(result, list):
-                    all_images.extend(result)
+            all_images = await _collect_images_until(
+                [
+                    lambda: call_grok_legacy(
+                        token,
+                        f"Image Edit: {edit_request.prompt}",
+                        model_info,
+                        file_attachments=file_ids,
+                        response_format=response_format,
+                    )
+                ]
+                * calls_needed,
+                n,
+                lambda e: logger.error(f"Concurrent call failed: {e}"),
+            )
 
     selected_images = _pick_images(all_images, n)
     success = any(isinstance(img, str) and img and img != "error" for img in selected_images)
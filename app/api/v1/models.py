@@ -3,8 +3,11 @@ Models API 路由
 """
 
 import time
+from typing import Optional
 
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 
 from app.services.grok.model import ModelService
 
@@ -12,22 +15,31 @@ from app.services.grok.model import ModelService
 router = APIRouter(tags=["Models"])
 
 
+# 模型列表很少变化，按秒缓存序列化结果，突发轮询直接复用同一份 bytes
+_models_cache: Optional[tuple[int, bytes]] = None
+
+
 @router.get("/models")
 async def list_models():
     """OpenAI 兼容 models 列表接口"""
+    global _models_cache
     ts = int(time.time())
-    data = [
-        {
-            "id": m.model_id,
-            "object": "model",
-            "created": ts,
-            "owned_by": "grok2api",
-            "display_name": m.display_name,
-            "description": m.description,
-        }
-        for m in ModelService.list()
-    ]
-    return {"object": "list", "data": data}
+    cached = _models_cache
+    if cached is None or cached[0] != ts:
+        data = [
+            {
+                "id": m.model_id,
+                "object": "model",
+                "created": ts,
+                "owned_by": "grok2api",
+                "display_name": m.display_name,
+                "description": m.description,
+            }
+            for m in ModelService.list()
+        ]
+        cached = (ts, orjson.dumps({"object": "list", "data": data}))
+        _models_cache = cached
+    return Response(cached[1], media_type="application/json")
 
 
 @router.get("/models/{model_id}")
@@ -2,10 +2,12 @@
 Uploads API (used by the web chat UI)
 """
 
+import asyncio
+import shutil
 import uuid
 from pathlib import Path
+from typing import BinaryIO
 
-import aiofiles
 from fastapi import APIRouter, UploadFile, File, HTTPException
 
 from app.services.grok.assets import DownloadService
@@ -17,17 +19,24 @@ BASE_DIR = Path(__file__).parent.parent.parent.parent / "data" / "tmp"
 IMAGE_DIR = BASE_DIR / "image"
 
 
+_MIME_EXT = {
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+}
+
+
 def _ext_from_mime(mime: str) -> str:
-    m = (mime or "").lower()
-    if m == "image/png":
-        return "png"
-    if m == "image/webp":
-        return "webp"
-    if m == "image/gif":
-        return "gif"
-    if m in ("image/jpeg", "image/jpg"):
-        return "jpg"
-    return "jpg"
+    return _MIME_EXT.get((mime or "").lower(), "jpg")
+
+
+def _save_sync(src: BinaryIO, path: Path) -> int:
+    """在线程中整体拷贝上传内容到磁盘，返回写入字节数"""
+    with open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst, length=4 * 1024 * 1024)
+        return dst.tell()
 
 
 @router.post("/uploads/image")
@@ -40,14 +49,7 @@ async def upload_image(file: UploadFile = File(...)):
     name = f"upload-{uuid.uuid4().hex}.{_ext_from_mime(content_type)}"
     path = IMAGE_DIR / name
 
-    size = 0
-    async with aiofiles.open(path, "wb") as f:
-        while True:
-            chunk = await file.read(1024 * 1024)
-            if not chunk:
-                break
-            size += len(chunk)
-            await f.write(chunk)
+    size = await asyncio.to_thread(_save_sync, file.file, path)
 
     # Best-effort: reuse existing cache cleanup policy (size-based).
     try:
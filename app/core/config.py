@@ -226,6 +226,8 @@ class Config:
         self._config = {}
         self._defaults = {}
         self._defaults_loaded = False
+        # 每次配置替换时递增，供调用方做缓存失效判断
+        self.version = 0
 
     def _ensure_defaults(self):
         if self._defaults_loaded:
@@ -286,6 +288,7 @@ class Config:
         except Exception as e:
             logger.error(f"Error loading config: {e}")
             self._config = {}
+        self.version += 1
 
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -315,6 +318,7 @@ class Config:
             merged = _deep_merge(base, new_config or {})
             await storage.save_config(merged)
             self._config = merged
+            self.version += 1
 
 
 # 全局配置实例
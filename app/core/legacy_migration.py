@@ -132,11 +132,12 @@ async def migrate_legacy_account_settings(
 
     data_root = data_dir or (Path(__file__).parent.parent.parent / "data")
     lock_dir = data_root / ".locks"
-    lock_dir.mkdir(parents=True, exist_ok=True)
 
+    # 常见情况：迁移已完成，只做一次 stat 即返回
     done_marker = lock_dir / "legacy_accounts_tos_birth_nsfw_v2.done"
     if done_marker.exists():
         return {"migrated": False, "reason": "already_done"}
+    lock_dir.mkdir(parents=True, exist_ok=True)
 
     lock_file = lock_dir / "legacy_accounts_tos_birth_nsfw_v2.lock"
     fd: int | None = None
@@ -152,6 +153,8 @@ async def migrate_legacy_account_settings(
                 await asyncio.sleep(0.2)
             return {"migrated": False, "reason": "lock_timeout"}
 
+        from curl_cffi import requests as curl_requests
+
         from app.core.config import get_config
         from app.core.storage import get_storage
         from app.services.register.services import (
@@ -222,28 +225,33 @@ async def migrate_legacy_account_settings(
             birth_service = BirthDateService(cf_clearance=cf_clearance)
             nsfw_service = NsfwSettingsService(cf_clearance=cf_clearance)
 
-            tos_result = user_service.accept_tos_version(
-                sso=sso_val,
-                sso_rw=sso_rw_val or sso_val,
-                impersonate="chrome120",
-            )
-            if not tos_result.get("ok"):
-                return False
-
-            birth_result = birth_service.set_birth_date(
-                sso=sso_val,
-                sso_rw=sso_rw_val or sso_val,
-                impersonate="chrome120",
-            )
-            if not birth_result.get("ok"):
-                return False
-
-            nsfw_result = nsfw_service.enable_nsfw(
-                sso=sso_val,
-                sso_rw=sso_rw_val or sso_val,
-                impersonate="chrome120",
-            )
-            return bool(nsfw_result.get("ok"))
+            # Share one session across the three steps to reuse the TLS connection.
+            with curl_requests.Session(impersonate="chrome120") as session:
+                tos_result = user_service.accept_tos_version(
+                    sso=sso_val,
+                    sso_rw=sso_rw_val or sso_val,
+                    impersonate="chrome120",
+                    session=session,
+                )
+                if not tos_result.get("ok"):
+                    return False
+
+                birth_result = birth_service.set_birth_date(
+                    sso=sso_val,
+                    sso_rw=sso_rw_val or sso_val,
+                    impersonate="chrome120",
+                    session=session,
+                )
+                if not birth_result.get("ok"):
+                    return False
+
+                nsfw_result = nsfw_service.enable_nsfw(
+                    sso=sso_val,
+                    sso_rw=sso_rw_val or sso_val,
+                    impersonate="chrome120",
+                    session=session,
+                )
+                return bool(nsfw_result.get("ok"))
 
         sem = asyncio.Semaphore(concurrency)
 
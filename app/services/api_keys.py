@@ -13,6 +13,29 @@ from app.core.logger import logger
 from app.core.config import get_config
 
 
+_USAGE_GEN_KEY = "__wal_gen__"
+_USAGE_COMPACT_EVERY = 500
+_SAVE_DEBOUNCE_SECONDS = 0.1
+_USAGE_WAL_FLUSH_SECONDS = 1.0
+
+
+def _new_usage_row(at_ms: int) -> Dict[str, int]:
+    return {"chat_used": 0, "heavy_used": 0, "image_used": 0, "video_used": 0, "updated_at": at_ms}
+
+
+def _append_bytes(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
 class ApiKeyManager:
     """API Key 管理服务"""
     
@@ -29,23 +52,46 @@ class ApiKeyManager:
             
         self.file_path = Path(__file__).parents[2] / "data" / "api_keys.json"
         self.usage_path = Path(__file__).parents[2] / "data" / "api_key_usage.json"
+        # 追加式 usage 日志：每次计数只追加一行，累计一定条数后再整体落盘快照
+        self.usage_wal_path = Path(__file__).parents[2] / "data" / "api_key_usage.wal"
         self._keys: List[Dict] = []
+        # key -> 行记录，与 _keys 共享同一 dict，供鉴权等按 key 查找使用
+        self._index: Dict[str, Dict] = {}
         self._lock = asyncio.Lock()
         self._loaded = False
+        # 单 Key 修改只标记脏并延迟落盘，突发的多次修改合并为一次写入
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
 
         self._usage: Dict[str, Dict[str, Dict[str, int]]] = {}
         self._usage_lock = asyncio.Lock()
         self._usage_loaded = False
+        self._tz_offset = self._read_tz_offset_minutes()
+        # (tz offset, day index, "YYYY-MM-DD")
+        self._day_cache: Optional[Tuple[int, int, str]] = None
+        # 快照代数：WAL 行记录写入时的代数，加载时只回放不早于快照代数的行
+        self._wal_gen = 0
+        self._wal_appends = 0
+        self._wal_lock = asyncio.Lock()
+        # 计数先更新内存并缓冲 WAL 行，后台每秒合并追加一次，热路径不再等待磁盘写入
+        self._wal_buffer: List[bytes] = []
+        self._wal_flush_task: Optional[asyncio.Task] = None
         
+        # Keys 与 usage 均已加载后置位，热路径只做一次布尔判断
+        self._ready = False
+
         self._initialized = True
         logger.debug(f"[ApiKey] 初始化完成: {self.file_path}")
 
     async def init(self):
-        """初始化加载数据"""
+        """初始化加载数据（幂等，完成后仅做布尔判断）"""
+        if self._ready:
+            return
         if not self._loaded:
             await self._load_data()
         if not self._usage_loaded:
             await self._load_usage_data()
+        self._ready = self._loaded and self._usage_loaded
 
     async def _load_data(self):
         """加载 API Keys"""
@@ -54,6 +100,7 @@ class ApiKeyManager:
 
         if not self.file_path.exists():
             self._keys = []
+            self._reindex()
             self._loaded = True
             return
 
@@ -75,11 +122,13 @@ class ApiKeyManager:
                         self._keys = []
                 else:
                     self._keys = []
+                self._reindex()
                 self._loaded = True
                 logger.debug(f"[ApiKey] 加载了 {len(self._keys)} 个 API Key")
         except Exception as e:
             logger.error(f"[ApiKey] 加载失败: {e}")
             self._keys = []
+            self._reindex()
             self._loaded = True # 即使加载失败也认为已尝试加载，防止后续保存清空数据（或者抛出异常）
 
     async def _save_data(self):
@@ -88,6 +137,7 @@ class ApiKeyManager:
             logger.warning("[ApiKey] 尝试在数据未加载时保存，已取消操作以防覆盖数据")
             return
             
+        self._dirty = False
         try:
             # 确保目录存在
             self.file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -98,6 +148,24 @@ class ApiKeyManager:
         except Exception as e:
             logger.error(f"[ApiKey] 保存失败: {e}")
 
+    def _reindex(self):
+        # 与原先线性查找一致：重复 key 以第一条为准
+        index: Dict[str, Dict] = {}
+        for row in self._keys:
+            index.setdefault(row["key"], row)
+        self._index = index
+
+    def _schedule_flush(self):
+        """标记 Key 数据待保存，并在防抖间隔后统一写入"""
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush(_SAVE_DEBOUNCE_SECONDS))
+
+    async def _delayed_flush(self, delay: float):
+        await asyncio.sleep(delay)
+        if self._dirty:
+            await self._save_data()
+
     def _normalize_limit(self, v: Any) -> int:
         """Normalize a daily limit value. -1 means unlimited."""
         if v is None or v == "":
@@ -125,7 +193,8 @@ class ApiKeyManager:
         out["video_limit"] = self._normalize_limit(out.get("video_limit", -1))
         return out
 
-    def _tz_offset_minutes(self) -> int:
+    @staticmethod
+    def _read_tz_offset_minutes() -> int:
         raw = (os.getenv("CACHE_RESET_TZ_OFFSET_MINUTES", "") or "").strip()
         try:
             n = int(raw)
@@ -133,52 +202,123 @@ class ApiKeyManager:
             n = 480
         return max(-720, min(840, n))
 
+    def _tz_offset_minutes(self) -> int:
+        return self._tz_offset
+
+    def set_tz_offset_minutes(self, minutes: Optional[int] = None):
+        """覆盖时区偏移（None 表示重新读取环境变量），主要用于测试"""
+        self._tz_offset = self._read_tz_offset_minutes() if minutes is None else int(minutes)
+
     def _day_str(self, at_ms: Optional[int] = None, tz_offset_minutes: Optional[int] = None) -> str:
-        now_ms = int(at_ms if at_ms is not None else int(time.time() * 1000))
-        offset = self._tz_offset_minutes() if tz_offset_minutes is None else int(tz_offset_minutes)
-        dt = datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc) + timedelta(minutes=offset)
+        offset = self._tz_offset if tz_offset_minutes is None else int(tz_offset_minutes)
+        if at_ms is None:
+            # 常见路径：按 (偏移, 天序号) 缓存日期字符串，跨天时才重新格式化
+            day_index = (int(time.time()) + offset * 60) // 86400
+            cached = self._day_cache
+            if cached is not None and cached[0] == offset and cached[1] == day_index:
+                return cached[2]
+            day = datetime.fromtimestamp(day_index * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+            self._day_cache = (offset, day_index, day)
+            return day
+        dt = datetime.fromtimestamp(int(at_ms) / 1000, tz=timezone.utc) + timedelta(minutes=offset)
         return dt.strftime("%Y-%m-%d")
 
     async def _load_usage_data(self):
-        """Load per-day per-key usage counters."""
+        """Load per-day per-key usage counters (snapshot + WAL replay)."""
         if self._usage_loaded:
             return
 
-        if not self.usage_path.exists():
-            self._usage = {}
-            self._usage_loaded = True
-            return
-
         try:
             async with self._usage_lock:
+                usage: Dict[str, Any] = {}
                 if self.usage_path.exists():
                     content = await asyncio.to_thread(self.usage_path.read_bytes)
                     if content:
                         data = orjson.loads(content)
                         if isinstance(data, dict):
                             # { day: { key: { chat_used, ... } } }
-                            self._usage = data  # type: ignore[assignment]
-                        else:
-                            self._usage = {}
-                    else:
-                        self._usage = {}
+                            usage = data
+                gen = usage.pop(_USAGE_GEN_KEY, 0)
+                self._wal_gen = gen if isinstance(gen, int) else 0
+                self._usage = usage  # type: ignore[assignment]
+                if self.usage_wal_path.exists():
+                    content = await asyncio.to_thread(self.usage_wal_path.read_bytes)
+                    self._wal_appends = self._replay_usage_wal(content)
                 self._usage_loaded = True
         except Exception as e:
             logger.error(f"[ApiKey] Usage 加载失败: {e}")
             self._usage = {}
             self._usage_loaded = True
 
+    def _replay_usage_wal(self, content: bytes) -> int:
+        """把 WAL 中快照之后的增量回放到内存，返回回放条数"""
+        replayed = 0
+        for line in content.splitlines():
+            try:
+                entry = orjson.loads(line)
+                if entry.get("g", 0) < self._wal_gen:
+                    continue
+                day, key, incs, at_ms = entry["day"], entry["key"], entry["incs"], entry["ts"]
+            except Exception:
+                continue  # 末尾可能有写了一半的行
+            usage = self._usage.setdefault(day, {}).setdefault(key, _new_usage_row(at_ms))
+            for bucket, inc in incs.items():
+                usage[bucket] = int(usage.get(bucket, 0) or 0) + int(inc)
+            usage["updated_at"] = at_ms
+            replayed += 1
+        return replayed
+
+    def _schedule_wal_flush(self):
+        if self._wal_flush_task is None or self._wal_flush_task.done():
+            self._wal_flush_task = asyncio.create_task(self._delayed_wal_flush(_USAGE_WAL_FLUSH_SECONDS))
+
+    async def _delayed_wal_flush(self, delay: float):
+        await asyncio.sleep(delay)
+        await self._flush_usage_wal()
+
+    async def _flush_usage_wal(self):
+        """将缓冲的 usage 行一次性追加到 WAL"""
+        try:
+            async with self._wal_lock:
+                if not self._wal_buffer:
+                    return
+                lines, self._wal_buffer = self._wal_buffer, []
+                await asyncio.to_thread(_append_bytes, self.usage_wal_path, b"".join(lines))
+                self._wal_appends += len(lines)
+                if self._wal_appends >= _USAGE_COMPACT_EVERY:
+                    await self._compact_usage_locked()
+        except Exception as e:
+            logger.error(f"[ApiKey] Usage 日志写入失败: {e}")
+
+    async def _compact_usage_locked(self):
+        """写出完整快照并清空 WAL（调用方持有 _wal_lock）"""
+        async with self._usage_lock:
+            self._wal_gen += 1
+            content = orjson.dumps({_USAGE_GEN_KEY: self._wal_gen, **self._usage})
+            # 缓冲中的计数已包含在快照内
+            self._wal_buffer = []
+        await asyncio.to_thread(_write_atomic, self.usage_path, content)
+        # 快照已带新代数，即使此处截断前崩溃，旧代数的 WAL 行也不会被重复回放
+        await asyncio.to_thread(self.usage_wal_path.write_bytes, b"")
+        self._wal_appends = 0
+
     async def _save_usage_data(self):
+        """立即合并 WAL 到快照"""
         if not self._usage_loaded:
             return
         try:
-            self.usage_path.parent.mkdir(parents=True, exist_ok=True)
-            async with self._usage_lock:
-                content = orjson.dumps(self._usage, option=orjson.OPT_INDENT_2)
-                await asyncio.to_thread(self.usage_path.write_bytes, content)
+            async with self._wal_lock:
+                await self._compact_usage_locked()
         except Exception as e:
             logger.error(f"[ApiKey] Usage 保存失败: {e}")
 
+    async def flush(self):
+        """关闭前落盘：写出待保存的 Key 修改与未合并的 usage 日志"""
+        if self._dirty:
+            await self._save_data()
+        if self._wal_appends or self._wal_buffer:
+            await self._save_usage_data()
+
     def generate_key(self) -> str:
         """生成一个新的 sk- 开头的 key"""
         return f"sk-{secrets.token_urlsafe(24)}"
@@ -213,10 +353,11 @@ class ApiKeyManager:
         }
 
         # Ensure uniqueness
-        if any(k.get("key") == key_val for k in self._keys):
+        if key_val in self._index:
             raise ValueError("Key already exists")
 
         self._keys.append(new_key)
+        self._index[key_val] = new_key
         await self._save_data()
         logger.info(f"[ApiKey] 添加新Key: {name_val}")
         return new_key
@@ -238,26 +379,30 @@ class ApiKeyManager:
             })
         
         self._keys.extend(new_keys)
+        for row in new_keys:
+            self._index.setdefault(row["key"], row)
         await self._save_data()
         logger.info(f"[ApiKey] 批量添加 {count} 个 Key, 前缀: {name_prefix}")
         return new_keys
 
     async def delete_key(self, key: str) -> bool:
         """删除 API Key"""
-        initial_len = len(self._keys)
+        if key not in self._index:
+            return False
         self._keys = [k for k in self._keys if k["key"] != key]
-        
-        if len(self._keys) != initial_len:
-            await self._save_data()
-            logger.info(f"[ApiKey] 删除Key: {key[:10]}...")
-            return True
-        return False
+        self._index.pop(key, None)
+        await self._save_data()
+        logger.info(f"[ApiKey] 删除Key: {key[:10]}...")
+        return True
 
     async def batch_delete_keys(self, keys: List[str]) -> int:
         """批量删除 API Key"""
+        key_set = set(keys)
         initial_len = len(self._keys)
-        self._keys = [k for k in self._keys if k["key"] not in keys]
-        
+        self._keys = [k for k in self._keys if k["key"] not in key_set]
+        for key in key_set:
+            self._index.pop(key, None)
+
         deleted_count = initial_len - len(self._keys)
         if deleted_count > 0:
             await self._save_data()
@@ -266,18 +411,19 @@ class ApiKeyManager:
 
     async def update_key_status(self, key: str, is_active: bool) -> bool:
         """更新 Key 状态"""
-        for k in self._keys:
-            if k["key"] == key:
-                k["is_active"] = is_active
-                await self._save_data()
-                return True
-        return False
+        k = self._index.get(key)
+        if k is None:
+            return False
+        k["is_active"] = is_active
+        self._schedule_flush()
+        return True
         
     async def batch_update_keys_status(self, keys: List[str], is_active: bool) -> int:
         """批量更新 Key 状态"""
+        key_set = set(keys)
         updated_count = 0
         for k in self._keys:
-            if k["key"] in keys:
+            if k["key"] in key_set:
                 if k["is_active"] != is_active:
                     k["is_active"] = is_active
                     updated_count += 1
@@ -289,43 +435,39 @@ class ApiKeyManager:
 
     async def update_key_name(self, key: str, name: str) -> bool:
         """更新 Key 备注"""
-        for k in self._keys:
-            if k["key"] == key:
-                k["name"] = name
-                await self._save_data()
-                return True
-        return False
+        k = self._index.get(key)
+        if k is None:
+            return False
+        k["name"] = name
+        self._schedule_flush()
+        return True
 
     async def update_key_limits(self, key: str, limits: Dict[str, Any]) -> bool:
         """更新 Key 每日额度（-1 表示不限）"""
         limits = limits or {}
-        for k in self._keys:
-            if k.get("key") != key:
-                continue
-            if "chat_limit" in limits or "chat_per_day" in limits:
-                k["chat_limit"] = self._normalize_limit(limits.get("chat_limit", limits.get("chat_per_day")))
-            if "heavy_limit" in limits or "heavy_per_day" in limits:
-                k["heavy_limit"] = self._normalize_limit(limits.get("heavy_limit", limits.get("heavy_per_day")))
-            if "image_limit" in limits or "image_per_day" in limits:
-                k["image_limit"] = self._normalize_limit(limits.get("image_limit", limits.get("image_per_day")))
-            if "video_limit" in limits or "video_per_day" in limits:
-                k["video_limit"] = self._normalize_limit(limits.get("video_limit", limits.get("video_per_day")))
-            await self._save_data()
-            return True
-        return False
+        k = self._index.get(key)
+        if k is None:
+            return False
+        if "chat_limit" in limits or "chat_per_day" in limits:
+            k["chat_limit"] = self._normalize_limit(limits.get("chat_limit", limits.get("chat_per_day")))
+        if "heavy_limit" in limits or "heavy_per_day" in limits:
+            k["heavy_limit"] = self._normalize_limit(limits.get("heavy_limit", limits.get("heavy_per_day")))
+        if "image_limit" in limits or "image_per_day" in limits:
+            k["image_limit"] = self._normalize_limit(limits.get("image_limit", limits.get("image_per_day")))
+        if "video_limit" in limits or "video_per_day" in limits:
+            k["video_limit"] = self._normalize_limit(limits.get("video_limit", limits.get("video_per_day")))
+        self._schedule_flush()
+        return True
 
     def get_key_row(self, key: str) -> Optional[Dict[str, Any]]:
         """获取 Key 原始记录（不要求 active）"""
-        for k in self._keys:
-            if k.get("key") == key:
-                return self._normalize_key_row(k)
-        return None
+        k = self._index.get(key)
+        return self._normalize_key_row(k) if k is not None else None
 
     async def usage_for_day(self, day: str) -> Dict[str, Dict[str, int]]:
         """返回指定 day 的 usage map: { key: {chat_used,...} }"""
-        await self.init()
-        if not self._usage_loaded:
-            await self._load_usage_data()
+        if not self._ready:
+            await self.init()
         day_map = self._usage.get(day)
         return day_map if isinstance(day_map, dict) else {}
 
@@ -344,15 +486,13 @@ class ApiKeyManager:
 
         incs keys: chat_used/heavy_used/image_used/video_used
         """
-        await self.init()
+        if not self._ready:
+            await self.init()
         row = self.get_key_row(key)
         if not row or not row.get("is_active"):
             # Unknown/disabled keys are already rejected by auth; keep best-effort safe here.
             return True
 
-        if not self._usage_loaded:
-            await self._load_usage_data()
-
         day = self._day_str(tz_offset_minutes=tz_offset_minutes)
         at_ms = int(time.time() * 1000)
 
@@ -384,7 +524,7 @@ class ApiKeyManager:
 
             usage = day_map.get(key)
             if not isinstance(usage, dict):
-                usage = {"chat_used": 0, "heavy_used": 0, "image_used": 0, "video_used": 0, "updated_at": at_ms}
+                usage = _new_usage_row(at_ms)
                 day_map[key] = usage  # type: ignore[assignment]
 
             # Check all limits first (atomic for multi-bucket)
@@ -398,8 +538,14 @@ class ApiKeyManager:
             for bucket, inc in normalized.items():
                 usage[bucket] = int(usage.get(bucket, 0) or 0) + inc
             usage["updated_at"] = at_ms
-
-        await self._save_usage_data()
+            # 代数在同一把锁内取值，保证与快照的先后关系一致
+            line = orjson.dumps(
+                {"g": self._wal_gen, "day": day, "key": key, "incs": normalized, "ts": at_ms},
+                option=orjson.OPT_APPEND_NEWLINE,
+            )
+            self._wal_buffer.append(line)
+
+        self._schedule_wal_flush()
         return True
 
     def validate_key(self, key: str) -> Optional[Dict]:
@@ -415,12 +561,9 @@ class ApiKeyManager:
             }
             
         # 2. 检查多 Key 列表
-        for k in self._keys:
-            if k["key"] == key:
-                if k["is_active"]:
-                    return {**k, "is_admin": False} # 普通 Key 也可以视为非管理员? 暂不区分权限，只做身份识别
-                return None
-                
+        k = self._index.get(key)
+        if k is not None and k["is_active"]:
+            return {**k, "is_admin": False} # 普通 Key 也可以视为非管理员? 暂不区分权限，只做身份识别
         return None
 
     def get_all_keys(self) -> List[Dict]:
@@ -7,7 +7,6 @@ import base64
 import os
 import time
 import hashlib
-import re
 import uuid
 from pathlib import Path
 from contextlib import asynccontextmanager
@@ -15,14 +14,14 @@ try:
     import fcntl
 except ImportError:  # pragma: no cover - non-posix platforms
     fcntl = None
-from typing import Tuple, List, Dict, Optional, Any
+from typing import Tuple, List, Dict, Optional, Any, Set
 from urllib.parse import urlparse
 
 import aiofiles
 from curl_cffi.requests import AsyncSession
 
 from app.core.logger import logger
-from app.core.config import get_config
+from app.core.config import config, get_config
 from app.core.exceptions import (
     AppException, 
     UpstreamException, 
@@ -225,6 +224,9 @@ class BaseService:
     @staticmethod
     def is_url(input_str: str) -> bool:
         """检查是否为 URL"""
+        # 先做前缀判断，避免对 MB 级 data URI 做完整 urlparse
+        if not input_str.startswith(("http://", "https://")):
+            return False
         try:
             result = urlparse(input_str)
             return all([result.scheme, result.netloc]) and result.scheme in ['http', 'https']
@@ -264,12 +266,16 @@ class BaseService:
     def parse_b64(data_uri: str) -> Tuple[str, str, str]:
         """解析 Base64 数据"""
         if data_uri.startswith("data:"):
-            match = re.match(r"data:([^;]+);base64,(.+)", data_uri)
-            if match:
-                mime = match.group(1)
-                b64 = match.group(2)
-                ext = mime.split('/')[-1] if '/' in mime else 'bin'
-                return f"file.{ext}", b64, mime
+            # 用 partition 代替正则，避免对大字符串做分组匹配与额外拷贝
+            header, sep, b64 = data_uri.partition(";base64,")
+            mime = header[5:]
+            if sep and mime and ";" not in mime:
+                newline = b64.find("\n")
+                if newline != -1:
+                    b64 = b64[:newline]
+                if b64:
+                    ext = mime.split('/')[-1] if '/' in mime else 'bin'
+                    return f"file.{ext}", b64, mime
         return "file.bin", data_uri, DEFAULT_MIME
     
     @staticmethod
@@ -288,6 +294,25 @@ class BaseService:
 class UploadService(BaseService):
     """文件上传服务"""
     
+    def __init__(self, proxy: str = None):
+        super().__init__(proxy)
+        self._inflight = 0
+        self._retired = False
+    
+    async def retire(self):
+        """标记为退役：空闲时立即关闭，否则由最后一个进行中的上传关闭"""
+        self._retired = True
+        if self._inflight == 0:
+            await self._release()
+    
+    async def _release(self):
+        if self in _retired_uploads:
+            _retired_uploads.remove(self)
+        try:
+            await self.close()
+        except Exception as e:
+            logger.debug(f"Close upload service failed: {e}")
+    
     async def upload(self, file_input: str, token: str) -> Tuple[str, str]:
         """
         上传文件到 Grok
@@ -299,6 +324,15 @@ class UploadService(BaseService):
             ValidationException: 输入无效
             UpstreamException: 上传失败
         """
+        self._inflight += 1
+        try:
+            return await self._upload(file_input, token)
+        finally:
+            self._inflight -= 1
+            if self._retired and self._inflight == 0:
+                await self._release()
+    
+    async def _upload(self, file_input: str, token: str) -> Tuple[str, str]:
         async with _get_assets_semaphore():
             try:
                 # 处理输入
@@ -352,6 +386,52 @@ class UploadService(BaseService):
                 raise UpstreamException(f"Upload process error: {str(e)}")
 
 
+# 进程级共享的上传服务：复用 keep-alive 连接，避免每次上传重新握手
+_shared_upload: Optional[Tuple[int, UploadService]] = None
+_retired_uploads: List[UploadService] = []
+
+
+_retire_tasks: Set[asyncio.Task] = set()
+
+
+def get_upload_service() -> UploadService:
+    """获取共享 UploadService，配置变更后重建（旧实例在上传结束后关闭）"""
+    global _shared_upload
+    cached = _shared_upload
+    if cached is not None and cached[0] == config.version:
+        return cached[1]
+    if cached is not None:
+        # 旧实例可能仍有进行中的上传，由最后一个上传结束时关闭
+        old = cached[1]
+        _retired_uploads.append(old)
+        try:
+            task = asyncio.get_running_loop().create_task(old.retire())
+        except RuntimeError:
+            # 无事件循环时留给 close_upload_service 统一释放
+            old._retired = True
+        else:
+            _retire_tasks.add(task)
+            task.add_done_callback(_retire_tasks.discard)
+    service = UploadService()
+    _shared_upload = (config.version, service)
+    return service
+
+
+async def close_upload_service():
+    """关闭共享 UploadService（应用关闭时调用）"""
+    global _shared_upload
+    services = list(_retired_uploads)
+    _retired_uploads.clear()
+    if _shared_upload is not None:
+        services.append(_shared_upload[1])
+        _shared_upload = None
+    for service in services:
+        try:
+            await service.close()
+        except Exception as e:
+            logger.debug(f"Close upload service failed: {e}")
+
+
 # ==================== 列表服务 ====================
 
 class ListService(BaseService):
@@ -371,39 +451,40 @@ class ListService(BaseService):
         page_token = None
         seen_tokens = set()
 
-        async with AsyncSession() as session:
-            while True:
-                params = dict(base_params)
-                if page_token:
-                    if page_token in seen_tokens:
-                        logger.warning("List pagination stopped due to repeated page token")
-                        break
-                    seen_tokens.add(page_token)
-                    params["pageToken"] = page_token
-
-                response = await session.get(
-                    LIST_API,
-                    headers=headers,
-                    params=params,
-                    impersonate=BROWSER,
-                    timeout=self.timeout,
-                    proxies=self._proxies(),
+        # 复用实例级 Session（keep-alive），同一服务实例查询多个 token 时不再重复握手
+        session = await self._get_session()
+        while True:
+            params = dict(base_params)
+            if page_token:
+                if page_token in seen_tokens:
+                    logger.warning("List pagination stopped due to repeated page token")
+                    break
+                seen_tokens.add(page_token)
+                params["pageToken"] = page_token
+
+            response = await session.get(
+                LIST_API,
+                headers=headers,
+                params=params,
+                impersonate=BROWSER,
+                timeout=self.timeout,
+                proxies=self._proxies(),
+            )
+
+            if response.status_code != 200:
+                logger.error(f"List failed: {response.status_code}")
+                raise UpstreamException(
+                    message=f"List assets failed: {response.status_code}",
+                    details={"status": response.status_code}
                 )
 
-                if response.status_code != 200:
-                    logger.error(f"List failed: {response.status_code}")
-                    raise UpstreamException(
-                        message=f"List assets failed: {response.status_code}",
-                        details={"status": response.status_code}
-                    )
-
-                result = response.json()
-                page_assets = result.get("assets", [])
-                yield page_assets
+            result = response.json()
+            page_assets = result.get("assets", [])
+            yield page_assets
 
-                page_token = result.get("nextPageToken")
-                if not page_token:
-                    break
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
 
     async def list(self, token: str) -> List[Dict]:
         """
@@ -869,6 +950,8 @@ class DownloadService(BaseService):
 __all__ = [
     "BaseService",
     "UploadService",
+    "get_upload_service",
+    "close_upload_service",
     "ListService",
     "DeleteService",
     "DownloadService",
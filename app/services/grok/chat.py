@@ -20,7 +20,7 @@ from app.core.exceptions import (
 )
 from app.services.grok.statsig import StatsigService
 from app.services.grok.model import ModelService
-from app.services.grok.assets import UploadService
+from app.services.grok.assets import get_upload_service
 from app.services.grok.processor import StreamProcessor, CollectProcessor
 from app.services.grok.retry import retry_on_status
 from app.services.token import get_token_manager
@@ -410,22 +410,19 @@ class GrokChatService:
         image_ids = []
         
         if attachments:
-            upload_service = UploadService()
-            try:
-                for attach_type, attach_data in attachments:
-                    # 获取 ID
-                    file_id, _ = await upload_service.upload(attach_data, token)
-                    
-                    if attach_type == "image":
-                        # 图片 imageAttachments
-                        image_ids.append(file_id)
-                        logger.debug(f"Image uploaded: {file_id}")
-                    else:
-                        # 文件 fileAttachments
-                        file_ids.append(file_id)
-                        logger.debug(f"File uploaded: {file_id}")
-            finally:
-                await upload_service.close()
+            upload_service = get_upload_service()
+            for attach_type, attach_data in attachments:
+                # 获取 ID
+                file_id, _ = await upload_service.upload(attach_data, token)
+                
+                if attach_type == "image":
+                    # 图片 imageAttachments
+                    image_ids.append(file_id)
+                    logger.debug(f"Image uploaded: {file_id}")
+                else:
+                    # 文件 fileAttachments
+                    file_ids.append(file_id)
+                    logger.debug(f"File uploaded: {file_id}")
         
         stream = request.stream if request.stream is not None else get_config("grok.stream", True)
         think = request.think if request.think is not None else get_config("grok.thinking", False)
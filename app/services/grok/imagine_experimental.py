@@ -33,6 +33,8 @@ IMAGE_METHOD_ALIASES = {
     "new": IMAGE_METHOD_IMAGINE_WS_EXPERIMENTAL,
     "new_method": IMAGE_METHOD_IMAGINE_WS_EXPERIMENTAL,
 }
+# 正式名称与别名合并为一张表，解析只需一次查找
+_METHOD_TABLE = {**{m: m for m in IMAGE_METHODS}, **IMAGE_METHOD_ALIASES}
 
 IMAGINE_WS_API = "wss://grok.com/ws/imagine/listen"
 ASSET_API = "https://assets.grok.com"
@@ -43,13 +45,8 @@ CompletedCallback = Callable[[int, str], Optional[Awaitable[None] | None]]
 
 
 def resolve_image_generation_method(raw: Any) -> str:
-    candidate = str(raw or "").strip().lower()
-    if candidate in IMAGE_METHODS:
-        return candidate
-    mapped = IMAGE_METHOD_ALIASES.get(candidate)
-    if mapped:
-        return mapped
-    return IMAGE_METHOD_LEGACY
+    candidate = raw.strip().lower() if type(raw) is str else str(raw or "").strip().lower()
+    return _METHOD_TABLE.get(candidate, IMAGE_METHOD_LEGACY)
 
 
 def _normalize_asset_path(raw_url: str) -> str:
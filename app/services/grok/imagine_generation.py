@@ -5,37 +5,42 @@ Shared helpers for experimental imagine generation flows.
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Awaitable, Callable, List, Optional
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
 
+from app.core.config import config, get_config
 from app.core.exceptions import UpstreamException
 from app.core.logger import logger
 from app.services.grok.imagine_experimental import ImagineExperimentalService
 
 
+_ASPECT_RATIOS = frozenset(("16:9", "9:16", "1:1", "2:3", "3:2"))
+_ASPECT_MAP = {
+    "1024x1024": "1:1",
+    "512x512": "1:1",
+    "1024x576": "16:9",
+    "1280x720": "16:9",
+    "1536x864": "16:9",
+    "576x1024": "9:16",
+    "720x1280": "9:16",
+    "864x1536": "9:16",
+    "1024x1536": "2:3",
+    "1024x1792": "2:3",
+    "512x768": "2:3",
+    "768x1024": "2:3",
+    "1536x1024": "3:2",
+    "1792x1024": "3:2",
+    "768x512": "3:2",
+    "1024x768": "3:2",
+}
+
+
+@lru_cache(maxsize=64)
 def resolve_aspect_ratio(size: Optional[str]) -> str:
     value = str(size or "").strip().lower()
-    if value in {"16:9", "9:16", "1:1", "2:3", "3:2"}:
+    if value in _ASPECT_RATIOS:
         return value
-
-    mapping = {
-        "1024x1024": "1:1",
-        "512x512": "1:1",
-        "1024x576": "16:9",
-        "1280x720": "16:9",
-        "1536x864": "16:9",
-        "576x1024": "9:16",
-        "720x1280": "9:16",
-        "864x1536": "9:16",
-        "1024x1536": "2:3",
-        "1024x1792": "2:3",
-        "512x768": "2:3",
-        "768x1024": "2:3",
-        "1536x1024": "3:2",
-        "1792x1024": "3:2",
-        "768x512": "3:2",
-        "1024x768": "3:2",
-    }
-    return mapping.get(value, "2:3")
+    return _ASPECT_MAP.get(value, "2:3")
 
 
 def is_valid_image_value(value: Any) -> bool:
@@ -43,29 +48,71 @@ def is_valid_image_value(value: Any) -> bool:
 
 
 def dedupe_images(images: List[str]) -> List[str]:
-    out: List[str] = []
-    seen: set[str] = set()
-    for image in images:
-        if not isinstance(image, str):
-            continue
-        if image in seen:
-            continue
-        seen.add(image)
-        out.append(image)
-    return out
+    # dict.fromkeys 在 C 层完成保序去重
+    return list(dict.fromkeys(image for image in images if isinstance(image, str)))
+
+
+async def _bounded(sem: asyncio.Semaphore, factory: Callable[[], Awaitable[List[str]]]) -> Any:
+    async with sem:
+        return await factory()
 
 
 async def gather_limited(
     task_factories: List[Callable[[], Awaitable[List[str]]]],
     max_concurrency: int,
 ) -> List[Any]:
-    sem = asyncio.Semaphore(max(1, int(max_concurrency or 1)))
+    # 单任务直接执行，省去信号量和 gather
+    if len(task_factories) == 1:
+        try:
+            return [await task_factories[0]()]
+        except Exception as exc:
+            return [exc]
+
+    limit = max(1, int(max_concurrency or 1))
+    if limit >= len(task_factories):
+        return await asyncio.gather(*(factory() for factory in task_factories), return_exceptions=True)
+
+    sem = asyncio.Semaphore(limit)
+    return await asyncio.gather(
+        *(_bounded(sem, factory) for factory in task_factories), return_exceptions=True
+    )
 
-    async def _run(factory: Callable[[], Awaitable[List[str]]]) -> Any:
-        async with sem:
-            return await factory()
 
-    return await asyncio.gather(*[_run(factory) for factory in task_factories], return_exceptions=True)
+# (config.version, service)：服务只持有代理/超时配置，按配置版本复用同一实例
+_service_cache: Optional[tuple[int, ImagineExperimentalService]] = None
+
+
+def get_imagine_service() -> ImagineExperimentalService:
+    global _service_cache
+    cached = _service_cache
+    if cached is not None and cached[0] == config.version:
+        return cached[1]
+    service = ImagineExperimentalService()
+    _service_cache = (config.version, service)
+    return service
+
+
+DEFAULT_IMAGES_PER_CALL = 4
+
+
+def _images_per_call() -> int:
+    value = get_config("grok.imagine_images_per_call", DEFAULT_IMAGES_PER_CALL)
+    try:
+        value = int(value)
+    except Exception:
+        value = DEFAULT_IMAGES_PER_CALL
+    return max(1, value)
+
+
+def split_generation_targets(n: int) -> List[int]:
+    """按单次 websocket 会话可生成的张数拆分 n，返回每次调用的目标张数"""
+    per_call = _images_per_call()
+    targets: List[int] = []
+    remain = n
+    for _ in range(max(1, (n + per_call - 1) // per_call)):
+        targets.append(max(1, min(per_call, remain)))
+        remain -= targets[-1]
+    return targets
 
 
 async def call_experimental_generation_once(
@@ -75,7 +122,7 @@ async def call_experimental_generation_once(
     n: int = 4,
     aspect_ratio: str = "2:3",
 ) -> List[str]:
-    service = ImagineExperimentalService()
+    service = get_imagine_service()
     raw_urls = await service.generate_ws(
         token=token,
         prompt=prompt,
@@ -93,12 +140,10 @@ async def collect_experimental_generation_images(
     aspect_ratio: str,
     concurrency: int,
 ) -> List[str]:
-    calls_needed = max(1, (n + 3) // 4)
+    targets = split_generation_targets(n)
+    calls_needed = len(targets)
     task_factories: List[Callable[[], Awaitable[List[str]]]] = []
-    remain = n
-    for _ in range(calls_needed):
-        target_n = max(1, min(4, remain))
-        remain -= target_n
+    for target_n in targets:
         task_factories.append(
             lambda target_n=target_n: call_experimental_generation_once(
                 token,
@@ -127,11 +172,82 @@ async def collect_experimental_generation_images(
     return all_images
 
 
+async def iter_experimental_generation_images(
+    token: str,
+    prompt: str,
+    n: int,
+    response_format: str,
+    aspect_ratio: str,
+    concurrency: int,
+) -> AsyncIterator[str]:
+    """
+    Yield images as soon as each upstream image completes instead of waiting
+    for the whole batch, so conversion overlaps with remaining generation.
+    """
+    service = get_imagine_service()
+    completed: asyncio.Queue[Optional[str]] = asyncio.Queue()
+    sem = asyncio.Semaphore(max(1, int(concurrency or 1)))
+
+    targets = split_generation_targets(n)
+
+    async def _generate(target_n: int) -> None:
+        async with sem:
+            try:
+                await service.generate_ws(
+                    token=token,
+                    prompt=prompt,
+                    n=target_n,
+                    aspect_ratio=aspect_ratio,
+                    completed_cb=lambda _index, url: completed.put_nowait(url),
+                )
+            except Exception as e:
+                logger.warning(f"Experimental imagine websocket call failed: {e}")
+
+    async def _produce() -> None:
+        try:
+            await asyncio.gather(*[_generate(target_n) for target_n in targets])
+        finally:
+            completed.put_nowait(None)
+
+    producer = asyncio.create_task(_produce())
+    seen: set[str] = set()
+    yielded = 0
+    try:
+        while True:
+            url = await completed.get()
+            if url is None:
+                break
+            if url in seen:
+                continue
+            seen.add(url)
+            try:
+                image = await service.convert_url(token=token, url=url, response_format=response_format)
+            except Exception as e:
+                logger.warning(f"Experimental imagine image conversion failed: {e}")
+                continue
+            if is_valid_image_value(image):
+                yielded += 1
+                yield image
+    finally:
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+    if not yielded:
+        raise UpstreamException("Experimental imagine websocket returned no images")
+
+
 __all__ = [
     "resolve_aspect_ratio",
     "is_valid_image_value",
     "dedupe_images",
     "gather_limited",
+    "get_imagine_service",
+    "split_generation_targets",
     "call_experimental_generation_once",
     "collect_experimental_generation_images",
+    "iter_experimental_generation_images",
 ]
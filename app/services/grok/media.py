@@ -434,7 +434,7 @@ class VideoService:
         
         # 提取内容
         from app.services.grok.chat import MessageExtractor
-        from app.services.grok.assets import UploadService
+        from app.services.grok.assets import get_upload_service
         
         try:
             prompt, attachments = MessageExtractor.extract(messages, is_video=True)
@@ -444,17 +444,14 @@ class VideoService:
         # 处理图片附件
         image_url = None
         if attachments:
-            upload_service = UploadService()
-            try:
-                for attach_type, attach_data in attachments:
-                    if attach_type == "image":
-                        # 上传图片
-                        _, file_uri = await upload_service.upload(attach_data, token)
-                        image_url = f"https://assets.grok.com/{file_uri}"
-                        logger.info(f"Image uploaded for video: {image_url}")
-                        break  # 视频模型只使用第一张图片
-            finally:
-                await upload_service.close()
+            upload_service = get_upload_service()
+            for attach_type, attach_data in attachments:
+                if attach_type == "image":
+                    # 上传图片
+                    _, file_uri = await upload_service.upload(attach_data, token)
+                    image_url = f"https://assets.grok.com/{file_uri}"
+                    logger.info(f"Image uploaded for video: {image_url}")
+                    break  # 视频模型只使用第一张图片
         
         # 生成视频
         service = VideoService()
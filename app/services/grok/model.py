@@ -171,6 +171,8 @@ class ModelService:
     ]
     
     _map = {m.model_id: m for m in MODELS}
+    # 模型表运行期不变，列表一次性冻结为 tuple，调用方直接复用
+    _all: Tuple[ModelInfo, ...] = tuple(_map.values())
     
     @classmethod
     def get(cls, model_id: str) -> Optional[ModelInfo]:
@@ -178,9 +180,9 @@ class ModelService:
         return cls._map.get(model_id)
     
     @classmethod
-    def list(cls) -> list[ModelInfo]:
-        """获取所有模型"""
-        return list(cls._map.values())
+    def list(cls) -> Tuple[ModelInfo, ...]:
+        """获取所有模型（只读快照）"""
+        return cls._all
     
     @classmethod
     def valid(cls, model_id: str) -> bool:
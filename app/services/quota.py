@@ -4,14 +4,49 @@ API Key daily quota enforcement (local/docker runtime)
 
 from __future__ import annotations
 
-from typing import Optional, Dict
+from functools import lru_cache
+from typing import Optional, Dict, Tuple
 
-from app.core.config import get_config
+from app.core.config import config, get_config
 from app.core.exceptions import AppException, ErrorType
 from app.services.api_keys import api_key_manager
 from app.services.grok.model import ModelService
 
 
+# 各计费桶的固定扣减量与名称；image 桶按张数计，另行计算
+_STATIC_INCS: Dict[str, Tuple[Dict[str, int], str]] = {
+    "heavy": ({"heavy_used": 1, "chat_used": 1}, "heavy/chat"),
+    "video": ({"video_used": 1}, "video"),
+    "chat": ({"chat_used": 1}, "chat"),
+}
+
+# (config.version, app.api_key)
+_global_key_cache: Optional[Tuple[int, str]] = None
+
+
+def _global_api_key() -> str:
+    global _global_key_cache
+    cached = _global_key_cache
+    if cached is not None and cached[0] == config.version:
+        return cached[1]
+    key = str(get_config("app.api_key", "") or "").strip()
+    _global_key_cache = (config.version, key)
+    return key
+
+
+@lru_cache(maxsize=128)
+def _model_bucket(model: str) -> str:
+    """模型对应的计费桶（模型表为静态，按名称缓存）"""
+    if model == "grok-4-heavy":
+        return "heavy"
+    model_info = ModelService.get(model)
+    if model_info and model_info.is_video:
+        return "video"
+    if model_info and model_info.is_image:
+        return "image"
+    return "chat"
+
+
 async def enforce_daily_quota(
     api_key: Optional[str],
     model: str,
@@ -32,27 +67,18 @@ async def enforce_daily_quota(
     if not token:
         return
 
-    global_key = str(get_config("app.api_key", "") or "").strip()
+    global_key = _global_api_key()
     if global_key and token == global_key:
         return
 
-    model_info = ModelService.get(model)
-    incs: Dict[str, int] = {}
-    bucket_name = "chat"
-
-    if model == "grok-4-heavy":
-        incs = {"heavy_used": 1, "chat_used": 1}
-        bucket_name = "heavy/chat"
-    elif model_info and model_info.is_video:
-        incs = {"video_used": 1}
-        bucket_name = "video"
-    elif model_info and model_info.is_image:
+    bucket = _model_bucket(model)
+    if bucket == "image":
         # grok image model via chat endpoint: upstream usually returns up to 2 images
-        incs = {"image_used": max(1, int(image_count or 2))}
+        incs: Dict[str, int] = {"image_used": max(1, int(image_count or 2))}
         bucket_name = "image"
     else:
-        incs = {"chat_used": 1}
-        bucket_name = "chat"
+        # consume_daily_usage 只读取 incs，直接复用共享模板
+        incs, bucket_name = _STATIC_INCS[bucket]
 
     ok = await api_key_manager.consume_daily_usage(token, incs)
     if ok:
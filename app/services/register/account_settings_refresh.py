@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Iterable, Any
+import random
+import re
+from typing import Iterable, Any, Optional
+
+from curl_cffi.requests import AsyncSession
 
 from app.core.config import get_config
 from app.core.logger import logger
@@ -17,17 +21,17 @@ DEFAULT_NSFW_REFRESH_CONCURRENCY = 10
 DEFAULT_NSFW_REFRESH_RETRIES = 3
 DEFAULT_IMPERSONATE = "chrome120"
 
+# 失败重试的指数退避（秒）：上界 min(base * 2^(attempt-1), max_delay)，
+# 在 [上界 * (1 - jitter), 上界] 内随机取值；jitter=1 即 full jitter
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+JITTER = 1.0
+# 4xx 中仍值得重试的状态码（超时/过早/限流），其余 4xx 视为不可恢复
+_RETRYABLE_4XX = frozenset((408, 425, 429))
+
 
-def _extract_cookie_value(cookie_str: str, name: str) -> str | None:
-    needle = f"{name}="
-    if needle not in cookie_str:
-        return None
-    for part in cookie_str.split(";"):
-        part = part.strip()
-        if part.startswith(needle):
-            value = part[len(needle):].strip()
-            return value or None
-    return None
+# 一次扫描取出 sso / sso-rw，避免按 ";" 切分整个 Cookie 串
+_SSO_COOKIE_RE = re.compile(r"(?:^|;)\s*(sso(?:-rw)?)=([^;]*)")
 
 
 def parse_sso_pair(raw_token: str) -> tuple[str, str]:
@@ -36,8 +40,12 @@ def parse_sso_pair(raw_token: str) -> tuple[str, str]:
         return "", ""
 
     if ";" in raw:
-        sso = _extract_cookie_value(raw, "sso") or ""
-        sso_rw = _extract_cookie_value(raw, "sso-rw") or sso
+        found: dict[str, str] = {}
+        for match in _SSO_COOKIE_RE.finditer(raw):
+            # 同名 Cookie 以第一次出现为准
+            found.setdefault(match.group(1), match.group(2).strip())
+        sso = found.get("sso") or ""
+        sso_rw = found.get("sso-rw") or sso
         return sso.strip(), sso_rw.strip()
 
     sso = raw[4:].strip() if raw.startswith("sso=") else raw
@@ -89,47 +97,99 @@ def _format_step_error(result: dict, fallback: str = "unknown error") -> str:
     return fallback
 
 
+def _is_retryable_status(status_code: Any) -> bool:
+    try:
+        code = int(status_code)
+    except (TypeError, ValueError):
+        return True
+    return not (400 <= code < 500) or code in _RETRYABLE_4XX
+
+
+def _backoff_delay(
+    attempt: int,
+    base_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+    jitter: Optional[float] = None,
+) -> float:
+    base = BASE_DELAY if base_delay is None else base_delay
+    cap = MAX_DELAY if max_delay is None else max_delay
+    spread = JITTER if jitter is None else min(1.0, max(0.0, jitter))
+    ceiling = max(0.0, min(cap, base * (2 ** (attempt - 1))))
+    return random.uniform(ceiling * (1 - spread), ceiling)
+
+
 class AccountSettingsRefreshService:
-    def __init__(self, token_manager: TokenManager, cf_clearance: str = "") -> None:
+    def __init__(
+        self,
+        token_manager: TokenManager,
+        cf_clearance: str = "",
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        jitter: Optional[float] = None,
+    ) -> None:
         self.token_manager = token_manager
         self.cf_clearance = (cf_clearance or "").strip()
-
-    def _apply_once(self, raw_token: str) -> tuple[bool, str, str]:
+        self.base_delay = BASE_DELAY if base_delay is None else float(base_delay)
+        self.max_delay = MAX_DELAY if max_delay is None else float(max_delay)
+        self.jitter = JITTER if jitter is None else float(jitter)
+        # 三个服务对象无状态，按实例构造一次，所有 token 复用
+        self._user_service = UserAgreementService(cf_clearance=self.cf_clearance)
+        self._birth_service = BirthDateService(cf_clearance=self.cf_clearance)
+        self._nsfw_service = NsfwSettingsService(cf_clearance=self.cf_clearance)
+
+    async def _apply_once(self, raw_token: str) -> tuple[bool, str, str, Any]:
+        """依次执行 TOS/生日/NSFW；返回 (ok, step, error, status_code)"""
         sso, sso_rw = parse_sso_pair(raw_token)
         if not sso:
-            return False, "parse", "missing sso"
+            return False, "parse", "missing sso", None
         if not sso_rw:
             sso_rw = sso
 
-        user_service = UserAgreementService(cf_clearance=self.cf_clearance)
-        birth_service = BirthDateService(cf_clearance=self.cf_clearance)
-        nsfw_service = NsfwSettingsService(cf_clearance=self.cf_clearance)
-
-        tos_result = user_service.accept_tos_version(
-            sso=sso,
-            sso_rw=sso_rw,
-            impersonate=DEFAULT_IMPERSONATE,
-        )
-        if not tos_result.get("ok"):
-            return False, "tos", _format_step_error(tos_result, "accept_tos failed")
+        # 三个步骤共用一个会话，复用同一条 TLS 连接
+        async with AsyncSession() as session:
+            tos_result = await self._user_service.accept_tos_version_async(
+                sso=sso,
+                sso_rw=sso_rw,
+                impersonate=DEFAULT_IMPERSONATE,
+                session=session,
+            )
+            if not tos_result.get("ok"):
+                return (
+                    False,
+                    "tos",
+                    _format_step_error(tos_result, "accept_tos failed"),
+                    tos_result.get("status_code"),
+                )
 
-        birth_result = birth_service.set_birth_date(
-            sso=sso,
-            sso_rw=sso_rw,
-            impersonate=DEFAULT_IMPERSONATE,
-        )
-        if not birth_result.get("ok"):
-            return False, "birth", _format_step_error(birth_result, "set_birth_date failed")
+            birth_result = await self._birth_service.set_birth_date_async(
+                sso=sso,
+                sso_rw=sso_rw,
+                impersonate=DEFAULT_IMPERSONATE,
+                session=session,
+            )
+            if not birth_result.get("ok"):
+                return (
+                    False,
+                    "birth",
+                    _format_step_error(birth_result, "set_birth_date failed"),
+                    birth_result.get("status_code"),
+                )
 
-        nsfw_result = nsfw_service.enable_nsfw(
-            sso=sso,
-            sso_rw=sso_rw,
-            impersonate=DEFAULT_IMPERSONATE,
-        )
-        if not nsfw_result.get("ok"):
-            return False, "nsfw", _format_step_error(nsfw_result, "enable_nsfw failed")
+            nsfw_result = await self._nsfw_service.enable_nsfw_async(
+                sso=sso,
+                sso_rw=sso_rw,
+                impersonate=DEFAULT_IMPERSONATE,
+                session=session,
+            )
+            if not nsfw_result.get("ok"):
+                return (
+                    False,
+                    "nsfw",
+                    _format_step_error(nsfw_result, "enable_nsfw failed"),
+                    nsfw_result.get("status_code"),
+                )
 
-        return True, "", ""
+        return True, "", "", None
 
     async def refresh_tokens(
         self,
@@ -141,9 +201,15 @@ class AccountSettingsRefreshService:
         resolved_retries = _coerce_retries(retries)
 
         unique_tokens: list[str] = []
+        seen_raw: set[str] = set()
         seen: set[str] = set()
         for token in tokens:
-            normalized = normalize_sso_token(str(token or "").strip())
+            raw = str(token or "").strip()
+            # 原始串完全重复时直接跳过，避免重复解析 cookie
+            if not raw or raw in seen_raw:
+                continue
+            seen_raw.add(raw)
+            normalized = normalize_sso_token(raw)
             if not normalized or normalized in seen:
                 continue
             seen.add(normalized)
@@ -155,66 +221,106 @@ class AccountSettingsRefreshService:
                 "failed": [],
             }
 
-        semaphore = asyncio.Semaphore(resolved_concurrency)
-
         async def _run_one(token: str) -> dict[str, Any]:
             max_attempts = resolved_retries + 1
             last_step = "unknown"
             last_error = "unknown error"
+            attempts = 0
+            terminal = False
+
+            for attempt in range(1, max_attempts + 1):
+                attempts = attempt
+                try:
+                    ok, step, error, status_code = await self._apply_once(token)
+                except Exception as exc:
+                    ok, step, error, status_code = False, "exception", str(exc), None
+
+                if ok:
+                    return {
+                        "token": token,
+                        "ok": True,
+                        "attempts": attempt,
+                    }
+
+                last_step = step or "unknown"
+                last_error = error or "unknown error"
+                if not _is_retryable_status(status_code):
+                    # 不可恢复的状态码（如 SSO 已失效），不再重试
+                    terminal = True
+                    break
+                if attempt < max_attempts:
+                    await asyncio.sleep(
+                        _backoff_delay(attempt, self.base_delay, self.max_delay, self.jitter)
+                    )
 
-            async with semaphore:
-                for attempt in range(1, max_attempts + 1):
-                    try:
-                        ok, step, error = await asyncio.to_thread(self._apply_once, token)
-                    except Exception as exc:
-                        ok, step, error = False, "exception", str(exc)
-
-                    if ok:
-                        updated = await self.token_manager.mark_token_account_settings_success(
-                            token,
-                            save=False,
-                        )
-                        if not updated:
-                            logger.warning(
-                                "Account settings refresh succeeded but token not found: {}...",
-                                token[:10],
-                            )
-                        return {
-                            "token": token,
-                            "ok": True,
-                            "attempts": attempt,
-                        }
-
-                    last_step = step or "unknown"
-                    last_error = error or "unknown error"
-
-                reason = (
-                    f"account_settings_refresh_failed step={last_step} "
-                    f"attempts={max_attempts} error={last_error}"
-                )
-                invalidated = await self.token_manager.set_token_invalid(
-                    token,
-                    reason=reason,
-                    save=False,
-                )
-                return {
-                    "token": token,
-                    "ok": False,
-                    "attempts": max_attempts,
-                    "step": last_step,
-                    "error": last_error,
-                    "invalidated": bool(invalidated),
-                }
+            return {
+                "token": token,
+                "ok": False,
+                "attempts": attempts,
+                "step": last_step,
+                "error": last_error,
+                "terminal": terminal,
+            }
+
+        # 固定数量的 worker 共享同一个迭代器取 token：任务对象数量为 O(并发)，
+        # 且单线程事件循环下 next() 无竞争，省去队列的 put/get 等待
+        results: list[dict[str, Any]] = [{} for _ in unique_tokens]
+        pending = iter(enumerate(unique_tokens))
+
+        async def _worker() -> None:
+            for index, token in pending:
+                try:
+                    results[index] = await _run_one(token)
+                except Exception as exc:
+                    results[index] = {
+                        "token": token,
+                        "ok": False,
+                        "attempts": 0,
+                        "step": "exception",
+                        "error": str(exc),
+                        "terminal": False,
+                    }
+
+        await asyncio.gather(
+            *(_worker() for _ in range(min(resolved_concurrency, len(unique_tokens))))
+        )
 
-        results = await asyncio.gather(*[_run_one(token) for token in unique_tokens])
+        # 刷新结束后一次性批量更新 Token 状态，而不是每个 token 单独写
+        success_tokens = [item["token"] for item in results if item.get("ok")]
+        failed_items = [item for item in results if not item.get("ok")]
+        if success_tokens:
+            updated = await self.token_manager.mark_tokens_account_settings_success(
+                success_tokens,
+                save=False,
+            )
+            for token in success_tokens:
+                if token not in updated:
+                    logger.warning(
+                        "Account settings refresh succeeded but token not found: {}...",
+                        token[:10],
+                    )
+        invalidated_tokens: set[str] = set()
+        if failed_items:
+            invalidated_tokens = await self.token_manager.set_tokens_invalid(
+                [
+                    (
+                        item["token"],
+                        f"account_settings_refresh_failed step={item['step']} "
+                        f"attempts={item['attempts']} error={item['error']}",
+                    )
+                    for item in failed_items
+                ],
+                save=False,
+            )
+        for item in failed_items:
+            item["invalidated"] = item["token"] in invalidated_tokens
 
         try:
             await self.token_manager.commit()
         except Exception as exc:
             logger.warning("Account settings refresh commit failed: {}", exc)
 
-        success = sum(1 for item in results if item.get("ok"))
-        failed_items = [item for item in results if not item.get("ok")]
+        success = len(success_tokens)
         invalidated = sum(1 for item in failed_items if item.get("invalidated"))
 
         summary = {
@@ -362,37 +362,42 @@ class RegisterRunner:
                             self._record_error("sign_up missing sso cookie")
                             break
 
-                        tos_result = user_agreement_service.accept_tos_version(
-                            sso=sso,
-                            sso_rw=sso_rw or "",
-                            impersonate=impersonate_fingerprint,
-                            user_agent=account_user_agent,
-                        )
-                        if not tos_result.get("ok") or not tos_result.get("hex_reply"):
-                            self._record_error(f"accept_tos failed: {tos_result.get('error') or 'unknown'}")
-                            break
+                        # 账号设置三步使用独立会话（不沿用注册会话的 Cookie），复用同一条 TLS 连接
+                        with curl_requests.Session(impersonate=impersonate_fingerprint) as settings_session:
+                            tos_result = user_agreement_service.accept_tos_version(
+                                sso=sso,
+                                sso_rw=sso_rw or "",
+                                impersonate=impersonate_fingerprint,
+                                user_agent=account_user_agent,
+                                session=settings_session,
+                            )
+                            if not tos_result.get("ok") or not tos_result.get("hex_reply"):
+                                self._record_error(f"accept_tos failed: {tos_result.get('error') or 'unknown'}")
+                                break
 
-                        birth_result = birth_date_service.set_birth_date(
-                            sso=sso,
-                            sso_rw=sso_rw or "",
-                            impersonate=impersonate_fingerprint,
-                            user_agent=account_user_agent,
-                        )
-                        if not birth_result.get("ok"):
-                            self._record_error(
-                                f"set_birth_date failed: {birth_result.get('error') or 'unknown'}"
+                            birth_result = birth_date_service.set_birth_date(
+                                sso=sso,
+                                sso_rw=sso_rw or "",
+                                impersonate=impersonate_fingerprint,
+                                user_agent=account_user_agent,
+                                session=settings_session,
                             )
-                            break
+                            if not birth_result.get("ok"):
+                                self._record_error(
+                                    f"set_birth_date failed: {birth_result.get('error') or 'unknown'}"
+                                )
+                                break
 
-                        nsfw_result = nsfw_service.enable_nsfw(
-                            sso=sso,
-                            sso_rw=sso_rw or "",
-                            impersonate=impersonate_fingerprint,
-                            user_agent=account_user_agent,
-                        )
-                        if not nsfw_result.get("ok") or not nsfw_result.get("hex_reply"):
-                            self._record_error(f"enable_nsfw failed: {nsfw_result.get('error') or 'unknown'}")
-                            break
+                            nsfw_result = nsfw_service.enable_nsfw(
+                                sso=sso,
+                                sso_rw=sso_rw or "",
+                                impersonate=impersonate_fingerprint,
+                                user_agent=account_user_agent,
+                                session=settings_session,
+                            )
+                            if not nsfw_result.get("ok") or not nsfw_result.get("hex_reply"):
+                                self._record_error(f"enable_nsfw failed: {nsfw_result.get('error') or 'unknown'}")
+                                break
 
                         self._record_success(email, password, sso)
                         break
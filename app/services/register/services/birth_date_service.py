@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import datetime
 import random
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, Optional, Tuple
 
 from curl_cffi import requests
 
@@ -12,15 +13,38 @@ DEFAULT_USER_AGENT = (
     "Chrome/120.0.0.0 Safari/537.36"
 )
 
+# Static request headers; only user-agent varies per call.
+_BASE_HEADERS = {
+    "content-type": "application/json",
+    "origin": "https://grok.com",
+    "referer": "https://grok.com/",
+}
+
+
+_BIRTH_SUFFIX = "T16:00:00.000Z"
+
+# Current year is cached briefly; refreshed so long batches still roll over at midnight.
+_YEAR_TTL_S = 60.0
+_year_cache: list[float] = [0.0, 0.0]  # [expires_at, year]
+
+
+def _current_year() -> int:
+    now = time.monotonic()
+    if now >= _year_cache[0]:
+        _year_cache[0] = now + _YEAR_TTL_S
+        _year_cache[1] = datetime.date.today().year
+    return int(_year_cache[1])
+
 
 def generate_random_birthdate() -> str:
     """Generate a random birth date between 20 and 40 years old."""
-    today = datetime.date.today()
-    age = random.randint(20, 40)
-    birth_year = today.year - age
-    birth_month = random.randint(1, 12)
-    birth_day = random.randint(1, 28)
-    return f"{birth_year}-{birth_month:02d}-{birth_day:02d}T16:00:00.000Z"
+    # One 32-bit draw split by mixed radix (21 ages x 12 months x 28 days).
+    bits = random.getrandbits(32)
+    bits, age_offset = divmod(bits, 21)
+    bits, month_offset = divmod(bits, 12)
+    day_offset = bits % 28
+    birth_year = _current_year() - (20 + age_offset)
+    return f"{birth_year:04d}-{month_offset + 1:02d}-{day_offset + 1:02d}{_BIRTH_SUFFIX}"
 
 
 class BirthDateService:
@@ -37,22 +61,80 @@ class BirthDateService:
         user_agent: Optional[str] = None,
         cf_clearance: Optional[str] = None,
         timeout: int = 15,
+        session: Optional[requests.Session] = None,
+    ) -> Dict[str, Any]:
+        error = self._check_tokens(sso, sso_rw)
+        if error is not None:
+            return error
+
+        url, kwargs = self._build_request(sso, sso_rw, user_agent, cf_clearance)
+        try:
+            post = session.post if session is not None else requests.post
+            response = post(
+                url,
+                **kwargs,
+                impersonate=impersonate or "chrome120",
+                timeout=timeout,
+            )
+            return self._parse_response(response)
+        except Exception as e:
+            return self._error_result(str(e))
+
+    async def set_birth_date_async(
+        self,
+        sso: str,
+        sso_rw: str,
+        impersonate: str,
+        user_agent: Optional[str] = None,
+        cf_clearance: Optional[str] = None,
+        timeout: int = 15,
+        session: Optional[requests.AsyncSession] = None,
     ) -> Dict[str, Any]:
+        """Async variant of set_birth_date; reuses the given session when provided."""
+        error = self._check_tokens(sso, sso_rw)
+        if error is not None:
+            return error
+
+        url, kwargs = self._build_request(sso, sso_rw, user_agent, cf_clearance)
+        own_session = requests.AsyncSession() if session is None else None
+        try:
+            response = await (session or own_session).post(
+                url,
+                **kwargs,
+                impersonate=impersonate or "chrome120",
+                timeout=timeout,
+            )
+            return self._parse_response(response)
+        except Exception as e:
+            return self._error_result(str(e))
+        finally:
+            if own_session is not None:
+                await own_session.close()
+
+    @staticmethod
+    def _error_result(error: str) -> Dict[str, Any]:
+        return {
+            "ok": False,
+            "status_code": None,
+            "response_text": "",
+            "error": error,
+        }
+
+    @classmethod
+    def _check_tokens(cls, sso: str, sso_rw: str) -> Optional[Dict[str, Any]]:
         if not sso:
-            return {
-                "ok": False,
-                "status_code": None,
-                "response_text": "",
-                "error": "missing sso",
-            }
+            return cls._error_result("missing sso")
         if not sso_rw:
-            return {
-                "ok": False,
-                "status_code": None,
-                "response_text": "",
-                "error": "missing sso-rw",
-            }
+            return cls._error_result("missing sso-rw")
+        return None
 
+    def _build_request(
+        self,
+        sso: str,
+        sso_rw: str,
+        user_agent: Optional[str],
+        cf_clearance: Optional[str],
+    ) -> Tuple[str, Dict[str, Any]]:
         url = "https://grok.com/rest/auth/set-birth-date"
         cookies = {
             "sso": sso,
@@ -62,36 +144,18 @@ class BirthDateService:
         if clearance:
             cookies["cf_clearance"] = clearance
 
-        headers = {
-            "content-type": "application/json",
-            "origin": "https://grok.com",
-            "referer": "https://grok.com/",
-            "user-agent": user_agent or DEFAULT_USER_AGENT,
-        }
+        headers = {**_BASE_HEADERS, "user-agent": user_agent or DEFAULT_USER_AGENT}
         payload = {"birthDate": generate_random_birthdate()}
+        return url, {"headers": headers, "cookies": cookies, "json": payload}
 
-        try:
-            response = requests.post(
-                url,
-                headers=headers,
-                cookies=cookies,
-                json=payload,
-                impersonate=impersonate or "chrome120",
-                timeout=timeout,
-            )
-            status_code = response.status_code
-            response_text = response.text or ""
-            ok = status_code == 200
-            return {
-                "ok": ok,
-                "status_code": status_code,
-                "response_text": response_text,
-                "error": None if ok else f"HTTP {status_code}",
-            }
-        except Exception as e:
-            return {
-                "ok": False,
-                "status_code": None,
-                "response_text": "",
-                "error": str(e),
-            }
+    @staticmethod
+    def _parse_response(response: Any) -> Dict[str, Any]:
+        status_code = response.status_code
+        response_text = response.text or ""
+        ok = status_code == 200
+        return {
+            "ok": ok,
+            "status_code": status_code,
+            "response_text": response_text,
+            "error": None if ok else f"HTTP {status_code}",
+        }
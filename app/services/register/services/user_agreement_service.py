@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 from curl_cffi import requests
 
@@ -10,6 +10,14 @@ DEFAULT_USER_AGENT = (
     "Chrome/120.0.0.0 Safari/537.36"
 )
 
+# 固定请求头，每次调用只覆盖 user-agent
+_BASE_HEADERS = {
+    "content-type": "application/grpc-web+proto",
+    "origin": "https://accounts.x.ai",
+    "referer": "https://accounts.x.ai/accept-tos",
+    "x-grpc-web": "1",
+}
+
 
 class UserAgreementService:
     """处理账号协议同意流程（线程安全，无全局状态）。"""
@@ -25,6 +33,7 @@ class UserAgreementService:
         user_agent: Optional[str] = None,
         cf_clearance: Optional[str] = None,
         timeout: int = 15,
+        session: Optional[requests.Session] = None,
     ) -> Dict[str, Any]:
         """
         同意 TOS 版本。
@@ -36,23 +45,79 @@ class UserAgreementService:
             error: str | None
         }
         """
+        error = self._check_tokens(sso, sso_rw)
+        if error is not None:
+            return error
+
+        url, kwargs = self._build_request(sso, sso_rw, user_agent, cf_clearance)
+        try:
+            post = session.post if session is not None else requests.post
+            response = post(
+                url,
+                **kwargs,
+                impersonate=impersonate or "chrome120",
+                timeout=timeout,
+            )
+            return self._parse_response(response)
+        except Exception as e:
+            return self._error_result(str(e))
+
+    async def accept_tos_version_async(
+        self,
+        sso: str,
+        sso_rw: str,
+        impersonate: str,
+        user_agent: Optional[str] = None,
+        cf_clearance: Optional[str] = None,
+        timeout: int = 15,
+        session: Optional[requests.AsyncSession] = None,
+    ) -> Dict[str, Any]:
+        """accept_tos_version 的异步版本；传入 session 时复用其连接。"""
+        error = self._check_tokens(sso, sso_rw)
+        if error is not None:
+            return error
+
+        url, kwargs = self._build_request(sso, sso_rw, user_agent, cf_clearance)
+        own_session = requests.AsyncSession() if session is None else None
+        try:
+            response = await (session or own_session).post(
+                url,
+                **kwargs,
+                impersonate=impersonate or "chrome120",
+                timeout=timeout,
+            )
+            return self._parse_response(response)
+        except Exception as e:
+            return self._error_result(str(e))
+        finally:
+            if own_session is not None:
+                await own_session.close()
+
+    @staticmethod
+    def _error_result(error: str) -> Dict[str, Any]:
+        return {
+            "ok": False,
+            "hex_reply": "",
+            "status_code": None,
+            "grpc_status": None,
+            "error": error,
+        }
+
+    @classmethod
+    def _check_tokens(cls, sso: str, sso_rw: str) -> Optional[Dict[str, Any]]:
         if not sso:
-            return {
-                "ok": False,
-                "hex_reply": "",
-                "status_code": None,
-                "grpc_status": None,
-                "error": "缺少 sso",
-            }
+            return cls._error_result("缺少 sso")
         if not sso_rw:
-            return {
-                "ok": False,
-                "hex_reply": "",
-                "status_code": None,
-                "grpc_status": None,
-                "error": "缺少 sso-rw",
-            }
+            return cls._error_result("缺少 sso-rw")
+        return None
 
+    def _build_request(
+        self,
+        sso: str,
+        sso_rw: str,
+        user_agent: Optional[str],
+        cf_clearance: Optional[str],
+    ) -> Tuple[str, Dict[str, Any]]:
         url = "https://accounts.x.ai/auth_mgmt.AuthManagement/SetTosAcceptedVersion"
 
         cookies = {
@@ -63,53 +128,33 @@ class UserAgreementService:
         if clearance:
             cookies["cf_clearance"] = clearance
 
-        headers = {
-            "content-type": "application/grpc-web+proto",
-            "origin": "https://accounts.x.ai",
-            "referer": "https://accounts.x.ai/accept-tos",
-            "x-grpc-web": "1",
-            "user-agent": user_agent or DEFAULT_USER_AGENT,
-        }
+        headers = {**_BASE_HEADERS, "user-agent": user_agent or DEFAULT_USER_AGENT}
 
         data = (
             b"\x00\x00\x00\x00"  # 头部
             b"\x02"  # 长度
             b"\x10\x01"  # Field 2 = 1
         )
+        return url, {"headers": headers, "cookies": cookies, "data": data}
 
-        try:
-            response = requests.post(
-                url,
-                headers=headers,
-                cookies=cookies,
-                data=data,
-                impersonate=impersonate or "chrome120",
-                timeout=timeout,
-            )
-            hex_reply = response.content.hex()
-            grpc_status = response.headers.get("grpc-status")
-
-            error = None
-            ok = response.status_code == 200 and (grpc_status in (None, "0"))
-            if response.status_code == 403:
-                error = "403 Forbidden"
-            elif response.status_code != 200:
-                error = f"HTTP {response.status_code}"
-            elif grpc_status not in (None, "0"):
-                error = f"gRPC {grpc_status}"
-
-            return {
-                "ok": ok,
-                "hex_reply": hex_reply,
-                "status_code": response.status_code,
-                "grpc_status": grpc_status,
-                "error": error,
-            }
-        except Exception as e:
-            return {
-                "ok": False,
-                "hex_reply": "",
-                "status_code": None,
-                "grpc_status": None,
-                "error": str(e),
-            }
+    @staticmethod
+    def _parse_response(response: Any) -> Dict[str, Any]:
+        hex_reply = response.content.hex()
+        grpc_status = response.headers.get("grpc-status")
+
+        error = None
+        ok = response.status_code == 200 and (grpc_status in (None, "0"))
+        if response.status_code == 403:
+            error = "403 Forbidden"
+        elif response.status_code != 200:
+            error = f"HTTP {response.status_code}"
+        elif grpc_status not in (None, "0"):
+            error = f"gRPC {grpc_status}"
+
+        return {
+            "ok": ok,
+            "hex_reply": hex_reply,
+            "status_code": response.status_code,
+            "grpc_status": grpc_status,
+            "error": error,
+        }
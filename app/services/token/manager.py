@@ -2,8 +2,11 @@
 
 import asyncio
 import time
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
 
 from app.core.logger import logger
 from app.services.token.models import TokenInfo, EffortType, TokenPoolStats, FAIL_THRESHOLD, TokenStatus
@@ -17,6 +20,23 @@ REFRESH_BATCH_SIZE = 10
 REFRESH_CONCURRENCY = 5
 
 
+@lru_cache(maxsize=4096)
+def _mask_token(raw_token: str) -> str:
+    return f"{raw_token[:8]}...{raw_token[-16:]}" if len(raw_token) > 24 else raw_token
+
+
+@dataclass(frozen=True, slots=True)
+class PoolSnapshot:
+    """全部 Token 池的只读快照（按列存储，供后台列表类接口复用）"""
+
+    version: int
+    pools: List[str]
+    tokens: List[str]
+    masked: List[str]
+    statuses: List[TokenStatus]
+    last_clear: List[Optional[int]]
+
+
 class TokenManager:
     """管理 Token 的增删改查和配额同步"""
     
@@ -31,6 +51,11 @@ class TokenManager:
         self._save_task: Optional[asyncio.Task] = None
         self._save_delay = 0.5
         self._last_reload_at = 0.0
+        # 池内容/状态每次变更递增，用于快照失效
+        self._version = 0
+        self._snapshot: Optional[PoolSnapshot] = None
+        self._counts: Optional[tuple[int, Counter]] = None
+        self._accounts: Optional[tuple[int, tuple[dict, ...]]] = None
     
     @classmethod
     async def get_instance(cls) -> "TokenManager":
@@ -81,12 +106,14 @@ class TokenManager:
                     
                 self.initialized = True
                 self._last_reload_at = time.monotonic()
+                self._version += 1
                 total = sum(p.count() for p in self.pools.values())
                 logger.info(f"TokenManager initialized: {len(self.pools)} pools with {total} tokens")
             except Exception as e:
                 logger.error(f"Failed to initialize TokenManager: {e}")
                 self.pools = {}
                 self.initialized = True
+                self._version += 1
 
     async def reload(self):
         """重新加载 Token 池数据"""
@@ -109,13 +136,12 @@ class TokenManager:
 
     async def _save(self):
         """保存变更"""
+        self._version += 1
         async with self._save_lock:
             try:
                 data = {}
                 for pool_name, pool in self.pools.items():
-                    data[pool_name] = [
-                        info.model_dump() for info in pool.list()
-                    ]
+                    data[pool_name] = [info.model_dump() for info in pool]
                 
                 storage = get_storage()
                 async with storage.acquire_lock("tokens_save", timeout=10):
@@ -132,6 +158,7 @@ class TokenManager:
             delay_ms = 500
         self._save_delay = max(0.0, delay_ms / 1000.0)
         self._dirty = True
+        self._version += 1
         if self._save_delay == 0:
             if self._save_task and not self._save_task.done():
                 return
@@ -410,6 +437,22 @@ class TokenManager:
             return True
         return False
 
+    @staticmethod
+    def _apply_invalid(token: TokenInfo, reason: str, now_ms: int):
+        token.status = TokenStatus.EXPIRED
+        token.fail_count = max(token.fail_count, FAIL_THRESHOLD)
+        token.last_fail_at = now_ms
+        if reason:
+            token.last_fail_reason = str(reason)[:500]
+
+    @staticmethod
+    def _apply_account_settings_success(token: TokenInfo, now_ms: int):
+        token.fail_count = 0
+        token.last_fail_at = None
+        token.last_fail_reason = None
+        token.last_sync_at = now_ms
+        token.status = TokenStatus.COOLING if token.quota == 0 else TokenStatus.ACTIVE
+
     async def set_token_invalid(self, token_str: str, reason: str = "", save: bool = True) -> bool:
         """Mark a token as expired/invalid."""
         token, raw_token = self._find_token_info(token_str)
@@ -417,16 +460,30 @@ class TokenManager:
             logger.warning(f"Token {raw_token[:10]}...: not found for invalidation")
             return False
 
-        token.status = TokenStatus.EXPIRED
-        token.fail_count = max(token.fail_count, FAIL_THRESHOLD)
-        token.last_fail_at = int(datetime.now().timestamp() * 1000)
-        if reason:
-            token.last_fail_reason = str(reason)[:500]
+        self._apply_invalid(token, reason, int(datetime.now().timestamp() * 1000))
+        self._version += 1
 
         if save:
             await self._save()
         return True
 
+    async def set_tokens_invalid(self, items: Iterable[tuple[str, str]], save: bool = True) -> set[str]:
+        """批量标记 Token 失效，返回实际更新的输入 token 集合"""
+        now_ms = int(datetime.now().timestamp() * 1000)
+        updated: set[str] = set()
+        for token_str, reason in items:
+            token, raw_token = self._find_token_info(token_str)
+            if not token:
+                logger.warning(f"Token {raw_token[:10]}...: not found for invalidation")
+                continue
+            self._apply_invalid(token, reason, now_ms)
+            updated.add(token_str)
+        if updated:
+            self._version += 1
+            if save:
+                await self._save()
+        return updated
+
     async def mark_token_account_settings_success(self, token_str: str, save: bool = True) -> bool:
         """Reset failure state after account-settings flow succeeded."""
         token, raw_token = self._find_token_info(token_str)
@@ -434,16 +491,32 @@ class TokenManager:
             logger.warning(f"Token {raw_token[:10]}...: not found for account-settings success")
             return False
 
-        token.fail_count = 0
-        token.last_fail_at = None
-        token.last_fail_reason = None
-        token.last_sync_at = int(datetime.now().timestamp() * 1000)
-        token.status = TokenStatus.COOLING if token.quota == 0 else TokenStatus.ACTIVE
+        self._apply_account_settings_success(token, int(datetime.now().timestamp() * 1000))
+        self._version += 1
 
         if save:
             await self._save()
         return True
 
+    async def mark_tokens_account_settings_success(
+        self, token_strs: Iterable[str], save: bool = True
+    ) -> set[str]:
+        """批量重置账户设置刷新成功的 Token，返回实际更新的输入 token 集合"""
+        now_ms = int(datetime.now().timestamp() * 1000)
+        updated: set[str] = set()
+        for token_str in token_strs:
+            token, raw_token = self._find_token_info(token_str)
+            if not token:
+                logger.warning(f"Token {raw_token[:10]}...: not found for account-settings success")
+                continue
+            self._apply_account_settings_success(token, now_ms)
+            updated.add(token_str)
+        if updated:
+            self._version += 1
+            if save:
+                await self._save()
+        return updated
+
     async def commit(self):
         """Persist current in-memory token state."""
         await self._save()
@@ -501,6 +574,70 @@ class TokenManager:
         logger.warning(f"Token {raw_token[:10]}...: not found for reset")
         return False
 
+    def pool_snapshot(self) -> PoolSnapshot:
+        """获取池快照，未发生变更时直接复用上次结果"""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+
+        pools: List[str] = []
+        tokens: List[str] = []
+        masked: List[str] = []
+        statuses: List[TokenStatus] = []
+        last_clear: List[Optional[int]] = []
+        for pool_name, pool in self.pools.items():
+            for info in pool:
+                raw_token = info.token[4:] if info.token.startswith("sso=") else info.token
+                pools.append(pool_name)
+                tokens.append(raw_token)
+                masked.append(_mask_token(raw_token))
+                statuses.append(info.status)
+                last_clear.append(info.last_asset_clear_at)
+
+        snapshot = PoolSnapshot(
+            version=self._version,
+            pools=pools,
+            tokens=tokens,
+            masked=masked,
+            statuses=statuses,
+            last_clear=last_clear,
+        )
+        self._snapshot = snapshot
+        return snapshot
+
+    def accounts_snapshot(self) -> tuple[dict, ...]:
+        """后台账号列表（token/token_masked/pool/status/last_asset_clear_at），按版本缓存，调用方只读"""
+        cached = self._accounts
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        snap = self.pool_snapshot()
+        accounts = tuple(
+            {
+                "token": token,
+                "token_masked": masked,
+                "pool": pool_name,
+                "status": status,
+                "last_asset_clear_at": last_clear,
+            }
+            for pool_name, token, masked, status, last_clear in zip(
+                snap.pools, snap.tokens, snap.masked, snap.statuses, snap.last_clear
+            )
+        )
+        self._accounts = (snap.version, accounts)
+        return accounts
+
+    def status_counts(self) -> Counter:
+        """汇总各池计数（total/active/cooling/expired/disabled/chat_quota/total_calls），按版本缓存"""
+        cached = self._counts
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        counts: Counter = Counter()
+        for pool in self.pools.values():
+            # update 保留零值，不用 Counter 加法
+            counts.update(pool.snapshot_counts())
+        self._counts = (self._version, counts)
+        return counts
+
     def get_stats(self) -> Dict[str, dict]:
         """获取统计信息"""
         stats = {}
@@ -651,4 +788,4 @@ async def get_token_manager() -> TokenManager:
     return await TokenManager.get_instance()
 
 
-__all__ = ["TokenManager", "get_token_manager"]
+__all__ = ["TokenManager", "PoolSnapshot", "get_token_manager"]
@@ -1,6 +1,7 @@
 """Token 池管理"""
 
 import random
+from collections import Counter
 from typing import Dict, List, Optional, Iterator
 
 from app.services.token.models import TokenInfo, TokenStatus, TokenPoolStats
@@ -101,6 +102,17 @@ class TokenPool:
             
         return stats
         
+    def snapshot_counts(self) -> Counter:
+        """单次遍历统计状态数量、活跃额度与累计调用次数"""
+        counts: Counter = Counter()
+        for token in self._tokens.values():
+            counts["total"] += 1
+            counts["total_calls"] += int(token.use_count or 0)
+            counts[token.status.value] += 1
+            if token.status == TokenStatus.ACTIVE:
+                counts["chat_quota"] += int(token.quota or 0)
+        return counts
+
     def _rebuild_index(self):
         """重建索引（预留接口，用于加载时调用）"""
         pass
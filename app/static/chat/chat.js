@@ -542,7 +542,10 @@ function appendWaterfallImage(item, connectionIndex) {
   updateImageContinuousStats();
 }
 
+const imageBlobUrls = [];
+
 function clearImageWaterfall() {
+  imageBlobUrls.splice(0).forEach((url) => URL.revokeObjectURL(url));
   const waterfall = q('image-waterfall');
   const emptyState = q('image-empty-state');
   if (waterfall) waterfall.innerHTML = '';
@@ -570,6 +573,7 @@ function parseWsMessage(raw) {
 function openImageContinuousSocket(socketIndex, runToken, prompt, aspectRatio, attempt = 0) {
   const wsUrl = buildImagineWsUrl();
   const ws = new WebSocket(wsUrl);
+  ws.binaryType = 'arraybuffer';
   const socketState = {
     index: socketIndex,
     ws,
@@ -580,6 +584,7 @@ function openImageContinuousSocket(socketIndex, runToken, prompt, aspectRatio, a
     hadError: false,
     lastError: '',
     runId: '',
+    pendingImage: null,
   };
   imageContinuousSockets.push(socketState);
   updateImageContinuousStats();
@@ -590,10 +595,28 @@ function openImageContinuousSocket(socketIndex, runToken, prompt, aspectRatio, a
       return;
     }
     clearImageContinuousError();
-    ws.send(JSON.stringify({ type: 'start', prompt, aspect_ratio: aspectRatio }));
+    ws.send(JSON.stringify({ type: 'start', prompt, aspect_ratio: aspectRatio, binary: true }));
   };
 
   ws.onmessage = (event) => {
+    // Binary image mode: a text header frame is followed by the raw image bytes.
+    // Control messages are always text frames, so binary frames only ever carry image bytes.
+    if (event?.data instanceof ArrayBuffer) {
+      const header = socketState.pendingImage;
+      socketState.pendingImage = null;
+      if (!header) return;
+      if (runToken !== imageContinuousRunToken) return;
+      const url = URL.createObjectURL(new Blob([event.data], { type: header.mime || 'image/png' }));
+      imageBlobUrls.push(url);
+      socketState.active = true;
+      clearImageContinuousError();
+      appendWaterfallImage({ ...header, url }, socketIndex);
+      if (imageContinuousRunning) setImageStatusText('Running');
+      updateImageContinuousButtons();
+      return;
+    }
+    // A text frame after an image header means the bytes never came; drop the header.
+    socketState.pendingImage = null;
     const data = parseWsMessage(event?.data);
     if (!data || runToken !== imageContinuousRunToken) return;
     const msgType = String(data?.type || '').trim();
@@ -614,6 +637,11 @@ function openImageContinuousSocket(socketIndex, runToken, prompt, aspectRatio, a
       return;
     }
 
+    if (msgType === 'image' && data?.binary) {
+      socketState.pendingImage = data;
+      return;
+    }
+
     if (msgType === 'image') {
       socketState.active = true;
       clearImageContinuousError();
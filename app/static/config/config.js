@@ -44,7 +44,8 @@ const LOCALE_MAP = {
     "cf_clearance": { title: "CF Clearance", desc: "Cloudflare 验证 Cookie，用于验证 Cloudflare 的验证。" },
     "max_retry": { title: "最大重试", desc: "请求 Grok 服务失败时的最大重试次数。" },
     "retry_status_codes": { title: "重试状态码", desc: "触发重试的 HTTP 状态码列表。" },
-    "image_generation_method": { title: "生图调用方式", desc: "旧方法稳定；新方法为实验性方法。" }
+    "image_generation_method": { title: "生图调用方式", desc: "旧方法稳定；新方法为实验性方法。" },
+    "imagine_images_per_call": { title: "单次生图张数", desc: "新方法单个 websocket 会话最多等待的图片数，上游支持更多时可调大以减少会话数。" }
   },
   "token": {
     "label": "Token 池设置",
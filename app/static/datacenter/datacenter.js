@@ -178,18 +178,76 @@ async function loadLogFiles() {
   }
 }
 
-async function fetchTail(file, lines) {
+// The Workers backend has no NDJSON tail route; after a 404 stick to the JSON endpoint.
+let logStreamSupported = true;
+let logRefreshSeq = 0;
+
+function buildTailParams(file, lines) {
   const params = new URLSearchParams();
   if (file) params.set('file', file);
   params.set('lines', String(lines || 500));
-  const url = `/api/v1/admin/logs/tail?${params.toString()}`;
-  const res = await fetch(url, { headers: buildAuthHeaders(apiKey) });
+  return params.toString();
+}
+
+async function fetchTailJson(file, lines, onLines) {
+  const res = await fetch(`/api/v1/admin/logs/tail?${buildTailParams(file, lines)}`, {
+    headers: buildAuthHeaders(apiKey),
+  });
   if (res.status === 401) {
     logout();
     return null;
   }
   if (!res.ok) throw new Error(`HTTP ${res.status}`);
-  return await res.json();
+  const data = await res.json();
+  onLines(Array.isArray(data.lines) ? data.lines : []);
+  return { file: data.file || null };
+}
+
+async function fetchTail(file, lines, onLines) {
+  if (!logStreamSupported) return await fetchTailJson(file, lines, onLines);
+
+  const res = await fetch(`/api/v1/admin/logs/tail/stream?${buildTailParams(file, lines)}`, {
+    headers: buildAuthHeaders(apiKey),
+  });
+  if (res.status === 401) {
+    logout();
+    return null;
+  }
+  if (res.status === 404 || !res.body) {
+    const data = await fetchTailJson(file, lines, onLines);
+    logStreamSupported = false;
+    return data;
+  }
+  if (!res.ok) throw new Error(`HTTP ${res.status}`);
+
+  // NDJSON: first record is { file }, then one { line } per log line; parse and render incrementally.
+  const result = { file: null };
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  const flush = (rows) => {
+    const batch = [];
+    rows.forEach((row) => {
+      if (!row) return;
+      try {
+        const rec = JSON.parse(row);
+        if ('line' in rec) batch.push(rec.line);
+        else if ('file' in rec) result.file = rec.file;
+      } catch (e) {}
+    });
+    if (batch.length) onLines(batch);
+  };
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const rows = buffered.split('\n');
+    buffered = rows.pop();
+    flush(rows);
+  }
+  buffered += decoder.decode();
+  flush([buffered]);
+  return result;
 }
 
 function applyLogFilter(rawLines) {
@@ -204,15 +262,29 @@ async function refreshLogsOnce(silent = false) {
   const linesEl = $('log-lines');
   const content = $('log-content');
   if (!content) return;
+  const seq = ++logRefreshSeq;
   try {
     const wasAtBottom = content.scrollTop + content.clientHeight >= content.scrollHeight - 10;
     const file = sel ? sel.value : '';
     const n = linesEl ? Math.max(50, Math.min(5000, Number(linesEl.value || 500))) : 500;
-    const data = await fetchTail(file, n);
-    if (!data) return;
-    const rawLines = Array.isArray(data.lines) ? data.lines : [];
-    const lines = applyLogFilter(rawLines);
-    content.textContent = lines.length ? lines.join('\n') : '(空)';
+    let started = false;
+    let shown = 0;
+    const render = (batch) => {
+      // Drop output from a refresh that has been superseded.
+      if (seq !== logRefreshSeq) return;
+      if (!started) {
+        content.textContent = '';
+        started = true;
+      }
+      const lines = applyLogFilter(batch);
+      if (!lines.length) return;
+      content.append((shown ? '\n' : '') + lines.join('\n'));
+      shown += lines.length;
+      if (wasAtBottom) content.scrollTop = content.scrollHeight;
+    };
+    const data = await fetchTail(file, n, render);
+    if (!data || seq !== logRefreshSeq) return;
+    if (!shown) content.textContent = '(空)';
     if (wasAtBottom) content.scrollTop = content.scrollHeight;
   } catch (e) {
     if (!silent) showToast(`日志刷新失败: ${e.message || e}`, 'error');
@@ -18,6 +18,7 @@ if env_file.exists():
     load_dotenv(env_file)
 
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import Depends
 
@@ -91,6 +92,27 @@ async def lifespan(app: FastAPI):
     except Exception:
         pass
 
+    try:
+        from app.services.api_keys import api_key_manager
+
+        await api_key_manager.flush()
+    except Exception:
+        pass
+
+    try:
+        from app.api.v1.image import drain_accounting
+
+        await drain_accounting()
+    except Exception:
+        pass
+
+    try:
+        from app.services.grok.assets import close_upload_service
+
+        await close_upload_service()
+    except Exception:
+        pass
+
     from app.core.storage import StorageFactory
 
     if StorageFactory._instance:
@@ -106,6 +128,7 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="Grok2API",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     @app.get("/health")
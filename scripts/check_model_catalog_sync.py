@@ -9,9 +9,21 @@ Checks:
 
 from __future__ import annotations
 
+import bisect
+import mmap
+import os
 import re
+import string
 import sys
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
+
+try:
+    import ahocorasick
+except ImportError:  # optional accelerator
+    ahocorasick = None
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -42,30 +54,96 @@ def _collect_workers_model_ids(text: str) -> set[str]:
     return {m.group("id") for m in TS_MODEL_ID_RE.finditer(text)}
 
 
-def _build_token_pattern(token: str) -> re.Pattern[str]:
-    # Exact token match (avoid matching prefixes like `grok-4.1-mini` for `grok-4.1`).
-    escaped = re.escape(token)
-    return re.compile(rf"(?<![A-Za-z0-9_.-]){escaped}(?![A-Za-z0-9_.-])")
+# Exact token match (avoid matching prefixes like `grok-4.1-mini` for `grok-4.1`).
+# One alternation compiled once, so each file is walked by a single regex scan.
+REMOVED_IDENTIFIERS_RE = re.compile(
+    rf"(?<![A-Za-z0-9_.-])(?P<tok>{'|'.join(re.escape(t) for t in REMOVED_IDENTIFIERS)})(?![A-Za-z0-9_.-])"
+)
+# Same pattern over raw bytes (identifiers and boundary classes are ASCII-only).
+REMOVED_IDENTIFIERS_BYTES_RE = re.compile(REMOVED_IDENTIFIERS_RE.pattern.encode("ascii"))
+_TOKEN_ORDER = {token: idx for idx, token in enumerate(REMOVED_IDENTIFIERS)}
+_TOKEN_BOUNDARY_CHARS = frozenset(string.ascii_letters + string.digits + "_.-")
+
+# Optional: pyahocorasick walks the text once for all tokens; fall back to the regex otherwise.
+if ahocorasick is not None:
+    _REMOVED_AUTOMATON = ahocorasick.Automaton()
+    for _token in REMOVED_IDENTIFIERS:
+        _REMOVED_AUTOMATON.add_word(_token, _token)
+    _REMOVED_AUTOMATON.make_automaton()
+else:
+    _REMOVED_AUTOMATON = None
+
+
+def _iter_removed_matches(text: str) -> Iterator[tuple[int, int, str]]:
+    """Yield (start, end, token) for exact removed-identifier matches."""
+    if _REMOVED_AUTOMATON is None:
+        for match in REMOVED_IDENTIFIERS_RE.finditer(text):
+            yield match.start(), match.end(), match.group("tok")
+        return
+    size = len(text)
+    for end_idx, token in _REMOVED_AUTOMATON.iter(text):
+        start = end_idx - len(token) + 1
+        end = end_idx + 1
+        if start > 0 and text[start - 1] in _TOKEN_BOUNDARY_CHARS:
+            continue
+        if end < size and text[end] in _TOKEN_BOUNDARY_CHARS:
+            continue
+        yield start, end, token
+
+
+def _newline_offsets(text: str) -> array:
+    offsets = array("q")
+    pos = text.find("\n")
+    while pos != -1:
+        offsets.append(pos)
+        pos = text.find("\n", pos + 1)
+    return offsets
+
+
+def _may_contain_removed(ts_file: Path) -> bool:
+    """Zero-copy pre-check: search the mmapped bytes without decoding the file."""
+    with open(ts_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return REMOVED_IDENTIFIERS_BYTES_RE.search(mm) is not None
+
+
+def _scan_one_file(ts_file: Path) -> list[tuple[str, int, str, str]]:
+    # Clean files (the normal case) are never decoded into a Python str.
+    if not _may_contain_removed(ts_file):
+        return []
+    text = _read_text(ts_file)
+    rel_path = ts_file.relative_to(ROOT).as_posix()
+    hits: dict[tuple[int, str], str] = {}
+    newlines: array | None = None
+    for start, _end, token in _iter_removed_matches(text):
+        # Newline offsets are built once, on the first hit; line lookups are a bisect.
+        if newlines is None:
+            newlines = _newline_offsets(text)
+        idx = bisect.bisect_left(newlines, start)
+        line_no = idx + 1
+        if (line_no, token) in hits:
+            continue
+        line_start = newlines[idx - 1] + 1 if idx > 0 else 0
+        line_end = newlines[idx] if idx < len(newlines) else len(text)
+        hits[(line_no, token)] = text[line_start:line_end].strip()
+    return [
+        (rel_path, line_no, token, snippet)
+        for (line_no, token), snippet in sorted(hits.items(), key=lambda kv: (kv[0][0], _TOKEN_ORDER[kv[0][1]]))
+    ]
 
 
 def _scan_removed_identifiers() -> list[tuple[str, int, str, str]]:
-    patterns = [(token, _build_token_pattern(token)) for token in REMOVED_IDENTIFIERS]
-    findings: list[tuple[str, int, str, str]] = []
-
-    for ts_file in sorted(TS_SRC_DIR.rglob("*.ts")):
-        text = _read_text(ts_file)
-        for line_no, line in enumerate(text.splitlines(), start=1):
-            for token, pat in patterns:
-                if pat.search(line):
-                    findings.append(
-                        (
-                            ts_file.relative_to(ROOT).as_posix(),
-                            line_no,
-                            token,
-                            line.strip(),
-                        ),
-                    )
-    return findings
+    ts_files = sorted(TS_SRC_DIR.rglob("*.ts"))
+    if len(ts_files) <= 1:
+        return [hit for ts_file in ts_files for hit in _scan_one_file(ts_file)]
+
+    # Files are independent: read + scan them concurrently, map() keeps the sorted order.
+    workers = min(32, (os.cpu_count() or 4) * 4, len(ts_files))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        per_file = list(executor.map(_scan_one_file, ts_files))
+    return [hit for hits in per_file for hit in hits]
 
 
 def main() -> int:
@@ -1,24 +1,72 @@
 import argparse
+import http.client
 import json
 import os
 import sys
 from typing import Any
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+from urllib.error import URLError
+from urllib.parse import urlsplit
 
+# One keep-alive connection per (scheme, host) so checks share a single TCP/TLS handshake.
+_CONNECTIONS: dict[tuple[str, str], http.client.HTTPConnection] = {}
 
-def http_get(url: str, *, headers: dict[str, str] | None = None, timeout: float = 5.0) -> tuple[int, bytes]:
-    req = Request(url, headers=headers or {}, method="GET")
-    try:
-        with urlopen(req, timeout=timeout) as resp:
-            return int(getattr(resp, "status", 200)), resp.read()
-    except HTTPError as e:
-        body = b""
+
+def _connection(scheme: str, netloc: str, timeout: float) -> http.client.HTTPConnection:
+    key = (scheme, netloc)
+    conn = _CONNECTIONS.get(key)
+    if conn is None:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = cls(netloc, timeout=timeout)
+        _CONNECTIONS[key] = conn
+    conn.timeout = timeout
+    return conn
+
+
+def close_connections() -> None:
+    for conn in _CONNECTIONS.values():
+        conn.close()
+    _CONNECTIONS.clear()
+
+
+def _request(
+    method: str,
+    url: str,
+    *,
+    body: bytes | None = None,
+    headers: dict[str, str] | None = None,
+    timeout: float = 5.0,
+) -> tuple[int, dict[str, str], bytes]:
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    # Retry once on a fresh socket when the server dropped the idle keep-alive connection.
+    for attempt in range(2):
+        conn = _connection(parts.scheme, parts.netloc, timeout)
         try:
-            body = e.read()
-        except Exception:
-            pass
-        return int(getattr(e, "code", 0) or 0), body
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+            conn.close()
+            _CONNECTIONS.pop((parts.scheme, parts.netloc), None)
+            if attempt == 0:
+                continue
+            raise URLError(e) from e
+        except OSError as e:
+            conn.close()
+            _CONNECTIONS.pop((parts.scheme, parts.netloc), None)
+            raise URLError(e) from e
+        if resp.will_close:
+            conn.close()
+            _CONNECTIONS.pop((parts.scheme, parts.netloc), None)
+        return int(resp.status), {k.lower(): v for k, v in resp.getheaders()}, data
+    raise URLError("unreachable")
+
+
+def http_get(url: str, *, headers: dict[str, str] | None = None, timeout: float = 5.0) -> tuple[int, bytes]:
+    status, _, body = _request("GET", url, headers=headers, timeout=timeout)
+    return status, body
 
 
 def http_post(
@@ -28,25 +76,7 @@ def http_post(
     headers: dict[str, str] | None = None,
     timeout: float = 5.0,
 ) -> tuple[int, dict[str, str], bytes]:
-    req = Request(url, data=body, headers=headers or {}, method="POST")
-    try:
-        with urlopen(req, timeout=timeout) as resp:
-            return (
-                int(getattr(resp, "status", 200)),
-                {k.lower(): v for k, v in dict(resp.headers).items()},
-                resp.read(),
-            )
-    except HTTPError as e:
-        body_bytes = b""
-        try:
-            body_bytes = e.read()
-        except Exception:
-            pass
-        return (
-            int(getattr(e, "code", 0) or 0),
-            {k.lower(): v for k, v in dict(e.headers).items()} if e.headers else {},
-            body_bytes,
-        )
+    return _request("POST", url, body=body, headers=headers, timeout=timeout)
 
 
 def require_ok(name: str, status: int, body: bytes, *, allow: set[int] | None = None) -> None:
@@ -162,4 +192,7 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    try:
+        raise SystemExit(main())
+    finally:
+        close_connections()
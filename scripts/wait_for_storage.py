@@ -1,4 +1,6 @@
+import errno
 import os
+import select
 import socket
 import sys
 import time
@@ -42,6 +44,39 @@ def _get_target(storage_type: str, storage_url: str) -> tuple[str, int] | None:
     return host, int(port)
 
 
+# Re-resolve periodically so a restarted container with a new IP is still picked up.
+RESOLVE_TTL_S = 5.0
+# Same bound as the old create_connection probe; remote storage can take well over 200ms to accept.
+PROBE_TIMEOUT_S = 2.0
+
+AddrInfo = tuple[int, int, int, str, tuple]
+
+
+def _resolve(host: str, port: int) -> list[AddrInfo]:
+    return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+
+
+def _probe(info: AddrInfo, timeout: float = PROBE_TIMEOUT_S) -> None:
+    """Non-blocking connect probe; raises OSError when the port is not accepting."""
+    family, socktype, proto, _, sockaddr = info
+    sock = socket.socket(family, socktype, proto)
+    try:
+        sock.setblocking(False)
+        rc = sock.connect_ex(sockaddr)
+        if rc in (0, errno.EISCONN):
+            return
+        if rc not in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+            raise OSError(rc, os.strerror(rc))
+        _, writable, _ = select.select([], [sock], [], timeout)
+        if not writable:
+            raise TimeoutError("connect probe timed out")
+        err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            raise OSError(err, os.strerror(err))
+    finally:
+        sock.close()
+
+
 def main() -> int:
     storage_type = (os.getenv("SERVER_STORAGE_TYPE", "local") or "local").lower().strip()
     if storage_type in {"", "local"}:
@@ -64,11 +99,23 @@ def main() -> int:
     deadline = time.monotonic() + max(1, timeout_s)
     last_log_at = 0.0
 
+    infos: list[AddrInfo] = []
+    resolved_at = 0.0
+
     while time.monotonic() < deadline:
         try:
-            with socket.create_connection((host, port), timeout=2):
-                _log("ready")
-                return 0
+            if not infos or time.monotonic() - resolved_at >= RESOLVE_TTL_S:
+                infos = _resolve(host, port)
+                resolved_at = time.monotonic()
+            last_error: OSError | None = None
+            for info in infos:
+                try:
+                    _probe(info)
+                    _log("ready")
+                    return 0
+                except OSError as e:
+                    last_error = e
+            raise last_error or OSError("no addresses resolved")
         except OSError as e:
             now = time.monotonic()
             if now - last_log_at >= 3:
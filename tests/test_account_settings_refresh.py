@@ -9,13 +9,14 @@ class _DummyTokenManager:
         self.invalid_calls = []
         self.commit_calls = 0
 
-    async def mark_token_account_settings_success(self, token: str, save: bool = True) -> bool:
-        self.success_calls.append((token, save))
-        return True
+    async def mark_tokens_account_settings_success(self, tokens, save: bool = True) -> set:
+        self.success_calls.extend((token, save) for token in tokens)
+        return set(tokens)
 
-    async def set_token_invalid(self, token: str, reason: str = "", save: bool = True) -> bool:
-        self.invalid_calls.append((token, reason, save))
-        return True
+    async def set_tokens_invalid(self, items, save: bool = True) -> set:
+        items = list(items)
+        self.invalid_calls.extend((token, reason, save) for token, reason in items)
+        return {token for token, _ in items}
 
     async def commit(self):
         self.commit_calls += 1
@@ -29,14 +30,14 @@ def test_parse_sso_pair_variants():
     assert refresh_module.parse_sso_pair("foo=bar") == ("foo=bar", "foo=bar")
 
 
-def test_refresh_tokens_runs_tos_birth_nsfw_in_order(monkeypatch):
+def test_refresh_tokens_runs_tos_birth_nsfw_in_order(monkeypatch, run):
     calls = []
 
     class _UserAgreementService:
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def accept_tos_version(self, sso, sso_rw, impersonate):
+        async def accept_tos_version_async(self, sso, sso_rw, impersonate, session=None):
             calls.append(f"tos:{sso}:{sso_rw}:{impersonate}")
             return {"ok": True}
 
@@ -44,7 +45,7 @@ def test_refresh_tokens_runs_tos_birth_nsfw_in_order(monkeypatch):
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def set_birth_date(self, sso, sso_rw, impersonate):
+        async def set_birth_date_async(self, sso, sso_rw, impersonate, session=None):
             calls.append(f"birth:{sso}:{sso_rw}:{impersonate}")
             return {"ok": True}
 
@@ -52,7 +53,7 @@ def test_refresh_tokens_runs_tos_birth_nsfw_in_order(monkeypatch):
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def enable_nsfw(self, sso, sso_rw, impersonate):
+        async def enable_nsfw_async(self, sso, sso_rw, impersonate, session=None):
             calls.append(f"nsfw:{sso}:{sso_rw}:{impersonate}")
             return {"ok": True}
 
@@ -62,7 +63,7 @@ def test_refresh_tokens_runs_tos_birth_nsfw_in_order(monkeypatch):
 
     mgr = _DummyTokenManager()
     service = refresh_module.AccountSettingsRefreshService(mgr, cf_clearance="")
-    result = asyncio.run(service.refresh_tokens(tokens=["sso=token-a"], concurrency=1, retries=3))
+    result = run(service.refresh_tokens(tokens=["sso=token-a"], concurrency=1, retries=3))
 
     assert result["summary"] == {"total": 1, "success": 1, "failed": 0, "invalidated": 0}
     assert result["failed"] == []
@@ -76,14 +77,14 @@ def test_refresh_tokens_runs_tos_birth_nsfw_in_order(monkeypatch):
     ]
 
 
-def test_refresh_tokens_retries_then_invalidates(monkeypatch):
+def test_refresh_tokens_retries_then_invalidates(monkeypatch, run):
     attempt = {"count": 0}
 
     class _UserAgreementService:
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def accept_tos_version(self, sso, sso_rw, impersonate):
+        async def accept_tos_version_async(self, sso, sso_rw, impersonate, session=None):
             attempt["count"] += 1
             return {"ok": False, "error": "forbidden"}
 
@@ -91,31 +92,119 @@ def test_refresh_tokens_retries_then_invalidates(monkeypatch):
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def set_birth_date(self, sso, sso_rw, impersonate):
+        async def set_birth_date_async(self, sso, sso_rw, impersonate, session=None):
             raise AssertionError("birth step should not run when TOS fails")
 
     class _NsfwSettingsService:
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def enable_nsfw(self, sso, sso_rw, impersonate):
+        async def enable_nsfw_async(self, sso, sso_rw, impersonate, session=None):
             raise AssertionError("nsfw step should not run when TOS fails")
 
     monkeypatch.setattr(refresh_module, "UserAgreementService", _UserAgreementService)
     monkeypatch.setattr(refresh_module, "BirthDateService", _BirthDateService)
     monkeypatch.setattr(refresh_module, "NsfwSettingsService", _NsfwSettingsService)
+    monkeypatch.setattr(refresh_module, "BASE_DELAY", 0.0)
 
     mgr = _DummyTokenManager()
     service = refresh_module.AccountSettingsRefreshService(mgr, cf_clearance="")
-    result = asyncio.run(service.refresh_tokens(tokens=["token-a"], concurrency=1, retries=3))
+    result = run(service.refresh_tokens(tokens=["token-a"], concurrency=1, retries=3))
 
     assert result["summary"] == {"total": 1, "success": 0, "failed": 1, "invalidated": 1}
     assert len(result["failed"]) == 1
     assert result["failed"][0]["token"] == "token-a"
     assert result["failed"][0]["step"] == "tos"
     assert result["failed"][0]["attempts"] == 4
+    assert result["failed"][0]["terminal"] is False
     assert attempt["count"] == 4
     assert mgr.success_calls == []
     assert len(mgr.invalid_calls) == 1
     assert mgr.invalid_calls[0][0] == "token-a"
     assert mgr.commit_calls == 1
+
+
+def test_refresh_tokens_stops_on_non_retryable_status(monkeypatch, run):
+    attempt = {"count": 0}
+
+    class _UserAgreementService:
+        def __init__(self, cf_clearance=""):
+            self.cf_clearance = cf_clearance
+
+        async def accept_tos_version_async(self, sso, sso_rw, impersonate, session=None):
+            attempt["count"] += 1
+            return {"ok": False, "status_code": 401, "error": "HTTP 401"}
+
+    monkeypatch.setattr(refresh_module, "UserAgreementService", _UserAgreementService)
+
+    mgr = _DummyTokenManager()
+    service = refresh_module.AccountSettingsRefreshService(mgr, cf_clearance="")
+    result = run(service.refresh_tokens(tokens=["token-a"], concurrency=1, retries=3))
+
+    assert attempt["count"] == 1
+    assert result["failed"][0]["attempts"] == 1
+    assert result["failed"][0]["terminal"] is True
+    assert len(mgr.invalid_calls) == 1
+
+
+def test_backoff_delay_is_capped_full_jitter(monkeypatch):
+    bounds = []
+
+    def _uniform(a, b):
+        bounds.append((a, b))
+        return b
+
+    monkeypatch.setattr(refresh_module.random, "uniform", _uniform)
+    assert refresh_module._backoff_delay(1) == refresh_module.BASE_DELAY
+    assert refresh_module._backoff_delay(3) == refresh_module.BASE_DELAY * 4
+    assert refresh_module._backoff_delay(20) == refresh_module.MAX_DELAY
+    assert bounds[0] == (0.0, refresh_module.BASE_DELAY)
+
+    assert refresh_module._backoff_delay(2, base_delay=0.5, max_delay=0.8, jitter=0.5) == 0.8
+    assert bounds[-1] == (0.4, 0.8)
+
+
+def test_refresh_tokens_bounds_in_flight_workers(monkeypatch, run):
+    state = {"active": 0, "peak": 0}
+
+    async def _fake_apply_once(self, token):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return True, "", "", None
+
+    monkeypatch.setattr(refresh_module.AccountSettingsRefreshService, "_apply_once", _fake_apply_once)
+
+    mgr = _DummyTokenManager()
+    service = refresh_module.AccountSettingsRefreshService(mgr, cf_clearance="")
+    tokens = [f"token-{i}" for i in range(7)]
+    result = run(service.refresh_tokens(tokens=tokens, concurrency=2, retries=0))
+
+    assert result["summary"]["success"] == 7
+    assert state["peak"] == 2
+    assert [token for token, _ in mgr.success_calls] == tokens
+
+
+def test_refresh_tokens_dedupes_raw_and_normalized(monkeypatch, run):
+    parsed = []
+    original = refresh_module.normalize_sso_token
+
+    def _counting_normalize(raw):
+        parsed.append(raw)
+        return original(raw)
+
+    async def _fake_apply_once(self, token):
+        return True, "", "", None
+
+    monkeypatch.setattr(refresh_module, "normalize_sso_token", _counting_normalize)
+    monkeypatch.setattr(refresh_module.AccountSettingsRefreshService, "_apply_once", _fake_apply_once)
+
+    mgr = _DummyTokenManager()
+    service = refresh_module.AccountSettingsRefreshService(mgr, cf_clearance="")
+    tokens = ["sso=token-a", " sso=token-a ", "token-a", "sso=token-b", "", None]
+    result = run(service.refresh_tokens(tokens=tokens, concurrency=2, retries=0))
+
+    assert result["summary"]["total"] == 2
+    assert parsed == ["sso=token-a", "token-a", "sso=token-b"]
+    assert [token for token, _ in mgr.success_calls] == ["token-a", "token-b"]
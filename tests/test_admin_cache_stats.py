@@ -0,0 +1,110 @@
+import asyncio
+
+from app.api.v1 import admin as admin_module
+
+
+class _DummyListService:
+    async def close(self):
+        return None
+
+
+def _setup(monkeypatch, accounts, calls):
+    class _DummyManager:
+        def accounts_snapshot(self):
+            return tuple(accounts)
+
+    async def _fake_get_token_manager():
+        return _DummyManager()
+
+    async def _fake_local_stats(kind):
+        return {"count": 0, "size_mb": 0.0}
+
+    async def _fake_detail(list_service, token, account):
+        calls.append(token)
+        return admin_module._AssetDetail(token, token, 2, "ok", None)
+
+    monkeypatch.setattr(admin_module, "get_token_manager", _fake_get_token_manager)
+    monkeypatch.setattr(admin_module, "ListService", _DummyListService)
+    monkeypatch.setattr(admin_module, "_cached_local_stats", _fake_local_stats)
+    monkeypatch.setattr(admin_module, "_fetch_asset_detail", _fake_detail)
+    monkeypatch.setattr(admin_module, "_all_scope_snapshot", None)
+
+
+def _account(token, last_clear=None):
+    return {
+        "token": token,
+        "token_masked": token,
+        "pool": "ssoBasic",
+        "status": "active",
+        "last_asset_clear_at": last_clear,
+    }
+
+
+def test_cache_stats_all_scope_reuses_snapshot_until_refresh(monkeypatch):
+    calls = []
+    accounts = [_account("token-a"), _account("token-b")]
+    _setup(monkeypatch, accounts, calls)
+
+    first = asyncio.run(admin_module._compute_cache_stats("all", None, []))
+    second = asyncio.run(admin_module._compute_cache_stats("all", None, []))
+
+    assert first["online"]["count"] == 4
+    assert second["online"] == first["online"]
+    assert calls == ["token-a", "token-b"]
+
+    asyncio.run(admin_module._compute_cache_stats("all", None, [], refresh=True))
+    assert calls == ["token-a", "token-b", "token-a", "token-b"]
+
+
+def test_cache_stats_all_scope_snapshot_invalidated_by_asset_clear(monkeypatch):
+    calls = []
+    accounts = [_account("token-a"), _account("token-b")]
+    _setup(monkeypatch, accounts, calls)
+
+    asyncio.run(admin_module._compute_cache_stats("all", None, []))
+    accounts[1] = _account("token-b", last_clear=1700000000000)
+    asyncio.run(admin_module._compute_cache_stats("all", None, []))
+
+    assert calls == ["token-a", "token-b", "token-a", "token-b"]
+
+
+def test_single_flight_waiter_takes_over_when_runner_cancelled():
+    inflight = {}
+    runs = []
+
+    async def _factory():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return len(runs)
+
+    async def _main():
+        runner = asyncio.create_task(admin_module._single_flight(inflight, "k", _factory))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(admin_module._single_flight(inflight, "k", _factory))
+        await asyncio.sleep(0)
+        runner.cancel()
+        return await waiter
+
+    assert asyncio.run(_main()) == 2
+    assert inflight == {}
+
+
+def test_run_unless_disconnected_cancels_work(monkeypatch):
+    monkeypatch.setattr(admin_module, "_DISCONNECT_POLL_INTERVAL", 0.01)
+    cancelled = []
+
+    class _DisconnectedRequest:
+        async def is_disconnected(self):
+            return True
+
+    async def _slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    result = asyncio.run(admin_module._run_unless_disconnected(_DisconnectedRequest(), _slow()))
+
+    assert result is None
+    assert cancelled == [True]
@@ -0,0 +1,89 @@
+import io
+
+import orjson
+import pytest
+
+from app.api.v1 import admin as admin_module
+
+
+def _collect_stream(run, **kwargs):
+    async def _read():
+        response = await admin_module.stream_tail_log_api(**kwargs)
+        body = b""
+        async for chunk in response.body_iterator:
+            body += chunk
+        return response, body
+
+    response, body = run(_read())
+    records = [orjson.loads(row) for row in body.split(b"\n") if row]
+    return response, records
+
+
+def _write_log(monkeypatch, tmp_path, content: bytes, name: str = "app.log"):
+    monkeypatch.setattr(admin_module, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(admin_module, "_log_listing_cache", None)
+    path = tmp_path / name
+    path.write_bytes(content)
+    return path
+
+
+@pytest.mark.parametrize("block_size", [3, 4, 7, 1024])
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_stream_tail_matches_last_lines_across_blocks(monkeypatch, tmp_path, run, block_size, trailing_newline):
+    monkeypatch.setattr(admin_module, "_TAIL_BLOCK_SIZE", block_size)
+    rows = [f"line-{i}" for i in range(12)]
+    content = "\n".join(rows).encode() + (b"\n" if trailing_newline else b"")
+    _write_log(monkeypatch, tmp_path, content)
+
+    response, records = _collect_stream(run, file="app.log", lines=5)
+
+    assert response.media_type == "application/x-ndjson"
+    assert records[0] == {"file": "app.log"}
+    assert [r["line"] for r in records[1:]] == rows[-5:]
+
+
+def test_stream_tail_defaults_to_latest_file_and_handles_empty_dir(monkeypatch, tmp_path, run):
+    monkeypatch.setattr(admin_module, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(admin_module, "_log_listing_cache", None)
+    _, records = _collect_stream(run, file=None, lines=10)
+    assert records == [{"file": None}]
+
+    _write_log(monkeypatch, tmp_path, b"a\nb\n")
+    _, records = _collect_stream(run, file=None, lines=10)
+    assert records == [{"file": "app.log"}, {"line": "a"}, {"line": "b"}]
+
+
+def test_tail_start_offset_respects_max_bytes_window(monkeypatch):
+    monkeypatch.setattr(admin_module, "_TAIL_BLOCK_SIZE", 4)
+    content = b"aaaa\nbbbb\ncccc\ndddd\n"
+    f = io.BytesIO(content)
+
+    # 窗口内只有完整的 cccc/dddd，窗口开头的残行被丢弃
+    start, end = admin_module._tail_start_offset(f, max_lines=10, max_bytes=12)
+    assert end == len(content)
+    assert content[start:end] == b"cccc\ndddd\n"
+
+    start, _ = admin_module._tail_start_offset(f, max_lines=10, max_bytes=len(content))
+    assert start == 0
+
+    start, _ = admin_module._tail_start_offset(f, max_lines=1, max_bytes=len(content))
+    assert content[start:] == b"dddd\n"
+
+    assert admin_module._tail_start_offset(io.BytesIO(b""), 5, 100) == (0, 0)
+
+
+def test_read_tail_block_is_bounded_by_block_and_end(monkeypatch):
+    monkeypatch.setattr(admin_module, "_TAIL_BLOCK_SIZE", 4)
+    f = io.BytesIO(b"0123456789")
+    assert admin_module._read_tail_block(f, 2, 10) == b"2345"
+    assert admin_module._read_tail_block(f, 8, 9) == b"8"
+
+
+def test_stream_tail_drops_partial_line_at_max_bytes_window(monkeypatch, tmp_path, run):
+    monkeypatch.setattr(admin_module, "_TAIL_BLOCK_SIZE", 4)
+    monkeypatch.setattr(admin_module, "_TAIL_MAX_BYTES", 12)
+    _write_log(monkeypatch, tmp_path, b"aaaa\nbbbb\ncccc\ndddd")
+
+    _, records = _collect_stream(run, file="app.log", lines=100)
+
+    assert [r["line"] for r in records[1:]] == ["cccc", "dddd"]
@@ -1,23 +1,29 @@
-import asyncio
-from types import SimpleNamespace
+from typing import NamedTuple
 
 from app.api.v1 import admin as admin_module
 
 
+class _Tok(NamedTuple):
+    token: str
+
+
 class _DummyPool:
     def __init__(self, tokens):
-        self._tokens = [SimpleNamespace(token=t) for t in tokens]
+        self._tokens = tuple(map(_Tok, tokens))
 
     def list(self):
         return list(self._tokens)
 
+    def __iter__(self):
+        return iter(self._tokens)
+
 
 class _DummyManager:
     def __init__(self, pools):
         self.pools = pools
 
 
-def test_nsfw_refresh_api_all_mode_uses_all_tokens(monkeypatch):
+def test_nsfw_refresh_api_all_mode_uses_all_tokens(monkeypatch, run):
     captured = {}
     mgr = _DummyManager(
         pools={
@@ -41,7 +47,7 @@ def test_nsfw_refresh_api_all_mode_uses_all_tokens(monkeypatch):
     monkeypatch.setattr(admin_module, "get_token_manager", _fake_get_token_manager)
     monkeypatch.setattr(admin_module, "refresh_account_settings_for_tokens", _fake_refresh)
 
-    result = asyncio.run(
+    result = run(
         admin_module.refresh_tokens_nsfw_api({"all": True, "concurrency": 5, "retries": 1})
     )
 
@@ -53,7 +59,7 @@ def test_nsfw_refresh_api_all_mode_uses_all_tokens(monkeypatch):
     assert captured["retries"] == 1
 
 
-def test_nsfw_refresh_api_token_list_mode_normalizes_tokens(monkeypatch):
+def test_nsfw_refresh_api_token_list_mode_normalizes_tokens(monkeypatch, run):
     captured = {}
     mgr = _DummyManager(pools={})
 
@@ -71,7 +77,7 @@ def test_nsfw_refresh_api_token_list_mode_normalizes_tokens(monkeypatch):
     monkeypatch.setattr(admin_module, "refresh_account_settings_for_tokens", _fake_refresh)
 
     payload = {"tokens": ["sso=token-a", "sso=token-a;sso-rw=token-rw", "token-b"]}
-    result = asyncio.run(admin_module.refresh_tokens_nsfw_api(payload))
+    result = run(admin_module.refresh_tokens_nsfw_api(payload))
 
     assert result["status"] == "success"
     assert result["summary"]["total"] == 2
@@ -1,4 +1,3 @@
-import asyncio
 from contextlib import asynccontextmanager
 
 from app.api.v1 import admin as admin_module
@@ -27,7 +26,7 @@ class _DummyTokenManager:
         self.reload_calls += 1
 
 
-def test_update_tokens_api_triggers_background_for_new_tokens(monkeypatch):
+def test_update_tokens_api_triggers_background_for_new_tokens(monkeypatch, run):
     storage = _DummyStorage({"ssoBasic": [{"token": "token-a", "status": "active", "quota": 80}]})
     mgr = _DummyTokenManager()
     captured = {}
@@ -41,7 +40,7 @@ def test_update_tokens_api_triggers_background_for_new_tokens(monkeypatch):
         captured["retries"] = retries
 
     monkeypatch.setattr(admin_module, "get_storage", lambda: storage)
-    monkeypatch.setattr("app.services.token.manager.get_token_manager", _fake_get_mgr)
+    monkeypatch.setattr(admin_module, "get_token_manager", _fake_get_mgr)
     monkeypatch.setattr(admin_module, "_trigger_account_settings_refresh_background", _fake_trigger)
     monkeypatch.setattr(admin_module, "_resolve_nsfw_refresh_concurrency", lambda override=None: 10)
     monkeypatch.setattr(admin_module, "_resolve_nsfw_refresh_retries", lambda override=None: 3)
@@ -52,7 +51,7 @@ def test_update_tokens_api_triggers_background_for_new_tokens(monkeypatch):
             {"token": "token-b", "status": "active", "quota": 80},
         ]
     }
-    result = asyncio.run(admin_module.update_tokens_api(payload))
+    result = run(admin_module.update_tokens_api(payload))
 
     assert result["status"] == "success"
     assert result["nsfw_refresh"]["mode"] == "background"
@@ -63,7 +62,7 @@ def test_update_tokens_api_triggers_background_for_new_tokens(monkeypatch):
     assert mgr.reload_calls == 1
 
 
-def test_update_tokens_api_does_not_trigger_when_no_new_tokens(monkeypatch):
+def test_update_tokens_api_does_not_trigger_when_no_new_tokens(monkeypatch, run):
     storage = _DummyStorage({"ssoBasic": [{"token": "token-a", "status": "active", "quota": 80}]})
     mgr = _DummyTokenManager()
     captured = {}
@@ -77,13 +76,13 @@ def test_update_tokens_api_does_not_trigger_when_no_new_tokens(monkeypatch):
         captured["retries"] = retries
 
     monkeypatch.setattr(admin_module, "get_storage", lambda: storage)
-    monkeypatch.setattr("app.services.token.manager.get_token_manager", _fake_get_mgr)
+    monkeypatch.setattr(admin_module, "get_token_manager", _fake_get_mgr)
     monkeypatch.setattr(admin_module, "_trigger_account_settings_refresh_background", _fake_trigger)
     monkeypatch.setattr(admin_module, "_resolve_nsfw_refresh_concurrency", lambda override=None: 10)
     monkeypatch.setattr(admin_module, "_resolve_nsfw_refresh_retries", lambda override=None: 3)
 
     payload = {"ssoBasic": [{"token": "token-a", "status": "active", "quota": 70, "note": "edited"}]}
-    result = asyncio.run(admin_module.update_tokens_api(payload))
+    result = run(admin_module.update_tokens_api(payload))
 
     assert result["status"] == "success"
     assert result["nsfw_refresh"]["triggered"] == 0
@@ -0,0 +1,174 @@
+import asyncio
+
+from app.services import api_keys as api_keys_module
+from app.services.api_keys import ApiKeyManager
+
+
+def _new_manager(tmp_path) -> ApiKeyManager:
+    # 绕过单例，每个用例使用独立的数据目录
+    mgr = object.__new__(ApiKeyManager)
+    mgr.__init__()
+    mgr.file_path = tmp_path / "api_keys.json"
+    mgr.usage_path = tmp_path / "api_key_usage.json"
+    mgr.usage_wal_path = tmp_path / "api_key_usage.wal"
+    return mgr
+
+
+def _consume(mgr: ApiKeyManager, key: str, times: int):
+    async def _run():
+        for _ in range(times):
+            assert await mgr.consume_daily_usage(key, {"chat_used": 1})
+        await mgr._flush_usage_wal()
+
+    asyncio.run(_run())
+
+
+def _chat_used(mgr: ApiKeyManager, key: str) -> int:
+    _, usage = asyncio.run(mgr.usage_today())
+    return usage[key]["chat_used"]
+
+
+def test_usage_is_replayed_from_wal(tmp_path):
+    mgr = _new_manager(tmp_path)
+    row = asyncio.run(mgr.add_key(name="demo"))
+    _consume(mgr, row["key"], 3)
+
+    assert not mgr.usage_path.exists()
+    assert len(mgr.usage_wal_path.read_bytes().splitlines()) == 3
+
+    reloaded = _new_manager(tmp_path)
+    assert _chat_used(reloaded, row["key"]) == 3
+
+
+def test_usage_compaction_does_not_double_count(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_keys_module, "_USAGE_COMPACT_EVERY", 2)
+    mgr = _new_manager(tmp_path)
+    row = asyncio.run(mgr.add_key(name="demo"))
+    _consume(mgr, row["key"], 2)
+
+    # 已合并进快照，WAL 被清空
+    assert mgr.usage_wal_path.read_bytes() == b""
+    stale_wal = mgr.usage_wal_path
+
+    _consume(mgr, row["key"], 1)
+    # 模拟快照写出后、截断 WAL 前崩溃：旧代数的行仍留在 WAL 中
+    old_line = b'{"g":0,"day":"%s","key":"%s","incs":{"chat_used":1},"ts":1}\n' % (
+        mgr._day_str().encode(),
+        row["key"].encode(),
+    )
+    stale_wal.write_bytes(old_line + stale_wal.read_bytes())
+
+    reloaded = _new_manager(tmp_path)
+    assert _chat_used(reloaded, row["key"]) == 3
+
+    asyncio.run(reloaded.flush())
+    assert reloaded.usage_wal_path.read_bytes() == b""
+    assert _chat_used(_new_manager(tmp_path), row["key"]) == 3
+
+
+def test_single_key_updates_are_debounced(tmp_path, monkeypatch):
+    mgr = _new_manager(tmp_path)
+    row = asyncio.run(mgr.add_key(name="demo"))
+    writes = []
+    original_save = mgr._save_data
+
+    async def _counting_save():
+        writes.append(1)
+        await original_save()
+
+    monkeypatch.setattr(mgr, "_save_data", _counting_save)
+
+    async def _run():
+        await mgr.update_key_name(row["key"], "renamed")
+        await mgr.update_key_status(row["key"], False)
+        await mgr.update_key_limits(row["key"], {"chat_limit": 5})
+        assert writes == []
+        await mgr._flush_task
+
+    asyncio.run(_run())
+    assert writes == [1]
+
+    reloaded = _new_manager(tmp_path)
+    asyncio.run(reloaded.init())
+    saved = reloaded.get_key_row(row["key"])
+    assert saved["name"] == "renamed"
+    assert saved["is_active"] is False
+    assert saved["chat_limit"] == 5
+
+
+def test_key_index_tracks_add_and_delete(tmp_path):
+    mgr = _new_manager(tmp_path)
+
+    async def _run():
+        row = await mgr.add_key(name="demo", key="sk-fixed")
+        assert mgr.validate_key("sk-fixed")["name"] == "demo"
+        try:
+            await mgr.add_key(key="sk-fixed")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("duplicate key accepted")
+
+        batch = await mgr.batch_add_keys("bulk", 2)
+        assert all(mgr.get_key_row(r["key"]) for r in batch)
+
+        assert await mgr.delete_key(row["key"]) is True
+        assert mgr.validate_key("sk-fixed") is None
+        assert await mgr.delete_key(row["key"]) is False
+
+        assert await mgr.batch_delete_keys([r["key"] for r in batch]) == 2
+        assert mgr.get_key_row(batch[0]["key"]) is None
+
+    asyncio.run(_run())
+
+
+def test_day_str_cache_rolls_over_at_local_midnight(tmp_path, monkeypatch):
+    mgr = _new_manager(tmp_path)
+    mgr.set_tz_offset_minutes(480)
+    # 2024-01-01T15:59:59Z == 2024-01-01 23:59:59 (UTC+8)
+    now = [1704124799.0]
+    monkeypatch.setattr(api_keys_module.time, "time", lambda: now[0])
+
+    assert mgr._day_str() == "2024-01-01"
+    now[0] += 1
+    assert mgr._day_str() == "2024-01-02"
+    assert mgr._day_str(tz_offset_minutes=0) == "2024-01-01"
+    assert mgr._day_str(at_ms=1704124799000) == "2024-01-01"
+
+
+def test_init_is_skipped_once_ready(tmp_path, monkeypatch):
+    mgr = _new_manager(tmp_path)
+    asyncio.run(mgr.init())
+    assert mgr._ready is True
+
+    async def _fail():
+        raise AssertionError("should not reload")
+
+    monkeypatch.setattr(mgr, "_load_data", _fail)
+    monkeypatch.setattr(mgr, "_load_usage_data", _fail)
+    asyncio.run(mgr.init())
+
+
+def test_usage_wal_appends_are_batched(tmp_path, monkeypatch):
+    mgr = _new_manager(tmp_path)
+    row = asyncio.run(mgr.add_key(name="demo"))
+    appends = []
+    original_append = api_keys_module._append_bytes
+
+    def _counting_append(path, data):
+        appends.append(data.count(b"\n"))
+        original_append(path, data)
+
+    monkeypatch.setattr(api_keys_module, "_append_bytes", _counting_append)
+    monkeypatch.setattr(api_keys_module, "_USAGE_WAL_FLUSH_SECONDS", 0.01)
+
+    async def _run():
+        for _ in range(5):
+            assert await mgr.consume_daily_usage(row["key"], {"chat_used": 1})
+        assert appends == []
+        assert (await mgr.usage_today())[1][row["key"]]["chat_used"] == 5
+        await mgr._wal_flush_task
+
+    asyncio.run(_run())
+    assert appends == [5]
+    assert _chat_used(_new_manager(tmp_path), row["key"]) == 5
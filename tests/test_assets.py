@@ -0,0 +1,68 @@
+import asyncio
+
+from app.services.grok import assets as assets_module
+
+
+def test_upload_service_shared_until_config_changes(monkeypatch):
+    monkeypatch.setattr(assets_module, "_shared_upload", None)
+    monkeypatch.setattr(assets_module, "_retired_uploads", [])
+    monkeypatch.setattr(assets_module.config, "version", 1)
+
+    first = assets_module.get_upload_service()
+    assert assets_module.get_upload_service() is first
+
+    monkeypatch.setattr(assets_module.config, "version", 2)
+    second = assets_module.get_upload_service()
+    assert second is not first
+    assert assets_module._retired_uploads == [first]
+
+    asyncio.run(assets_module.close_upload_service())
+    assert assets_module._shared_upload is None
+    assert assets_module._retired_uploads == []
+
+
+def test_retired_upload_service_closes_after_inflight_upload(monkeypatch, run):
+    monkeypatch.setattr(assets_module, "_shared_upload", None)
+    monkeypatch.setattr(assets_module, "_retired_uploads", [])
+    monkeypatch.setattr(assets_module.config, "version", 1)
+
+    closed = []
+
+    async def fake_close(self):
+        closed.append(self)
+
+    monkeypatch.setattr(assets_module.UploadService, "close", fake_close)
+
+    async def scenario():
+        first = assets_module.get_upload_service()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_upload(self, file_input, token):
+            started.set()
+            await release.wait()
+            return "id", "uri"
+
+        monkeypatch.setattr(assets_module.UploadService, "_upload", slow_upload)
+        pending = asyncio.ensure_future(first.upload("data", "tok"))
+        await started.wait()
+
+        monkeypatch.setattr(assets_module.config, "version", 2)
+        second = assets_module.get_upload_service()
+        await asyncio.sleep(0)
+        assert closed == []
+        assert assets_module._retired_uploads == [first]
+
+        release.set()
+        assert await pending == ("id", "uri")
+        assert closed == [first]
+        assert assets_module._retired_uploads == []
+
+        # 空闲的旧实例在重建时直接关闭
+        monkeypatch.setattr(assets_module.config, "version", 3)
+        assets_module.get_upload_service()
+        await asyncio.sleep(0)
+        assert closed == [first, second]
+        assert assets_module._retired_uploads == []
+
+    run(scenario())
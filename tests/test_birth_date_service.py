@@ -123,3 +123,39 @@ def test_set_birth_date_request_exception(monkeypatch):
     assert result["status_code"] is None
     assert result["response_text"] == ""
     assert "boom" in (result["error"] or "")
+
+
+def test_set_birth_date_uses_given_session(monkeypatch):
+    def _module_post(*args, **kwargs):
+        raise AssertionError("module-level post should not be used")
+
+    class _Session:
+        def __init__(self):
+            self.urls = []
+
+        def post(self, url, **kwargs):
+            self.urls.append(url)
+            return _DummyResponse(200, "ok")
+
+    monkeypatch.setattr(birth_service_module.requests, "post", _module_post)
+
+    session = _Session()
+    service = birth_service_module.BirthDateService()
+    result = service.set_birth_date(sso="s", sso_rw="rw", impersonate="chrome120", session=session)
+
+    assert result["ok"] is True
+    assert session.urls == ["https://grok.com/rest/auth/set-birth-date"]
+
+
+def test_generate_birth_date_uses_single_draw(monkeypatch):
+    draws = []
+
+    def _getrandbits(k):
+        draws.append(k)
+        return 0
+
+    monkeypatch.setattr(birth_service_module.random, "getrandbits", _getrandbits)
+    value = birth_service_module.generate_random_birthdate()
+
+    assert draws == [32]
+    assert value == f"{datetime.date.today().year - 20}-01-01T16:00:00.000Z"
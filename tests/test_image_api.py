@@ -1,12 +1,19 @@
+import asyncio
 from io import BytesIO
 
 import pytest
 from fastapi import UploadFile
 from pydantic import ValidationError
 
+from app.api.v1 import image as image_module
 from app.api.v1.image import (
     ImageEditRequest,
     ImageGenerationRequest,
+    _gather_limited,
+    _pick_images,
+    _process_upload,
+    _read_upload_limited,
+    _sse_event,
     resolve_aspect_ratio,
     validate_edit_request,
 )
@@ -64,3 +71,205 @@ def test_validate_edit_request_accepts_new_model():
     req = ImageEditRequest(prompt="edit", model="grok-imagine-1.0-edit", n=1, stream=False)
     file = UploadFile(filename="a.png", file=BytesIO(b"x"))
     validate_edit_request(req, [file])
+
+
+def test_sse_event_returns_bytes_frame():
+    frame = _sse_event("image_generation.completed", {"index": 0, "b64_json": "abc"})
+    assert frame == b'event: image_generation.completed\ndata: {"index":0,"b64_json":"abc"}\n\n'
+
+    custom = _sse_event("custom", {})
+    assert custom == b"event: custom\ndata: {}\n\n"
+
+
+def test_read_upload_limited_rejects_oversize(monkeypatch):
+    monkeypatch.setattr("app.api.v1.image._UPLOAD_READ_CHUNK", 4)
+    ok = UploadFile(filename="a.png", file=BytesIO(b"12345678"))
+    assert asyncio.run(_read_upload_limited(ok, 8)) == b"12345678"
+
+    big = UploadFile(filename="b.png", file=BytesIO(b"123456789"))
+    with pytest.raises(ValidationException) as exc:
+        asyncio.run(_read_upload_limited(big, 8))
+    assert exc.value.code == "file_too_large"
+
+
+def test_process_upload_builds_data_uri_and_rejects_unknown_type():
+    png = UploadFile(filename="a.png", file=BytesIO(b"abc"))
+    assert asyncio.run(_process_upload(png)) == "data:image/png;base64,YWJj"
+
+    gif = UploadFile(filename="a.gif", file=BytesIO(b"abc"))
+    with pytest.raises(ValidationException) as exc:
+        asyncio.run(_process_upload(gif))
+    assert exc.value.code == "invalid_image_type"
+
+
+def test_pick_images_pads_and_keeps_exact_count():
+    images = ["a", "b"]
+    assert _pick_images(images, 2) is images
+    assert _pick_images(images, 4) == ["a", "b", "error", "error"]
+    assert sorted(_pick_images(["a", "b", "c"], 2)) in (["a", "b"], ["a", "c"], ["b", "c"])
+
+
+def test_gather_limited_returns_exceptions_in_order():
+    async def _ok():
+        return ["a"]
+
+    async def _fail():
+        raise RuntimeError("boom")
+
+    single = asyncio.run(_gather_limited([_fail], 1))
+    assert isinstance(single[0], RuntimeError)
+
+    results = asyncio.run(_gather_limited([_ok, _fail, _ok], 2))
+    assert results[0] == ["a"]
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == ["a"]
+
+
+def test_experimental_stream_generation_yields_progress_and_completed(monkeypatch):
+    class _FakeService:
+        async def generate_ws(self, token, prompt, n, aspect_ratio, progress_cb, completed_cb):
+            await progress_cb(7, 50)
+            await completed_cb(7, "https://assets.grok.com/a.png")
+
+        async def convert_url(self, token, url, response_format):
+            return "aGVsbG8="
+
+    monkeypatch.setattr(image_module, "_imagine_service", _FakeService)
+    state = {"success": False}
+
+    async def _collect():
+        return [
+            frame
+            async for frame in image_module._experimental_stream_generation(
+                token="tok",
+                prompt="cat",
+                n=1,
+                response_format="b64_json",
+                response_field="b64_json",
+                aspect_ratio="1:1",
+                state=state,
+            )
+        ]
+
+    frames = asyncio.run(_collect())
+
+    assert len(frames) == 2
+    assert frames[0].startswith(b"event: image_generation.partial_image\n")
+    assert b'"progress":50' in frames[0]
+    assert frames[1].startswith(b"event: image_generation.completed\n")
+    assert b'"b64_json":"aGVsbG8="' in frames[1]
+    assert state["success"] is True
+
+
+def test_split_frame_slices_large_frames(monkeypatch):
+    monkeypatch.setattr(image_module, "_SSE_WRITE_CHUNK", 4)
+    assert image_module._split_frame(b"abcd") == (b"abcd",)
+    assert image_module._split_frame(b"abcdefghij") == [b"abcd", b"efgh", b"ij"]
+
+
+def test_resolve_image_response_format_reads_default_once(monkeypatch):
+    calls = []
+
+    def _fake_get_config(key, default=None):
+        calls.append(key)
+        return "url"
+
+    monkeypatch.setattr(image_module, "get_config", _fake_get_config)
+
+    experimental = image_module.IMAGE_METHOD_IMAGINE_WS_EXPERIMENTAL
+    assert image_module.resolve_image_response_format(None, experimental) == "b64_json"
+    assert image_module.resolve_image_response_format(None, image_module.IMAGE_METHOD_LEGACY) == "url"
+    assert image_module.resolve_image_response_format("B64_JSON", experimental) == "b64_json"
+    assert calls == ["app.image_format", "app.image_format"]
+
+
+def test_upload_payloads_dedupes_identical_content(monkeypatch):
+    calls = []
+
+    class _FakeUploadService:
+        async def upload(self, payload, token):
+            calls.append(payload)
+            return f"id-{payload}", f"uri-{payload}"
+
+    monkeypatch.setattr(image_module, "get_upload_service", lambda: _FakeUploadService())
+
+    file_ids, file_uris = asyncio.run(image_module._upload_payloads(["a", "b", "a"], "tok"))
+
+    assert calls == ["a", "b"]
+    assert file_ids == ["id-a", "id-b", "id-a"]
+    assert file_uris == ["uri-a", "uri-b", "uri-a"]
+
+
+def test_upload_payloads_raises_first_failure_and_cancels_rest(monkeypatch):
+    cancelled = []
+
+    class _FakeUploadService:
+        async def upload(self, payload, token):
+            if payload == "bad":
+                raise ValidationException("bad upload")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(payload)
+                raise
+            return "id", "uri"
+
+    monkeypatch.setattr(image_module, "get_upload_service", lambda: _FakeUploadService())
+
+    with pytest.raises(ValidationException):
+        asyncio.run(image_module._upload_payloads(["slow", "bad"], "tok"))
+    assert cancelled == ["slow"]
+
+
+def test_collect_images_until_cancels_remaining_calls():
+    cancelled = []
+    errors = []
+
+    async def _fast():
+        return ["img-1", "img-2"]
+
+    async def _failing():
+        raise RuntimeError("boom")
+
+    async def _slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return ["late"]
+
+    images = asyncio.run(
+        image_module._collect_images_until([_failing, _fast, _slow], 2, errors.append)
+    )
+
+    assert images == ["img-1", "img-2"]
+    assert cancelled == [True]
+    assert len(errors) == 1
+
+
+def test_enqueue_accounting_runs_in_background(monkeypatch):
+    usage = []
+    recorded = []
+
+    class _FakeTokenManager:
+        async def sync_usage(self, token, model_id, consume_on_fail=False, is_usage=False):
+            usage.append((token, model_id))
+
+    async def _fake_record(model_id, success):
+        recorded.append((model_id, success))
+
+    monkeypatch.setattr(image_module, "_record_request", _fake_record)
+    monkeypatch.setattr(image_module, "_accounting_state", None)
+
+    async def _main():
+        image_module._enqueue_accounting(_FakeTokenManager(), "tok", "grok-imagine", True)
+        image_module._enqueue_accounting(_FakeTokenManager(), "tok", "grok-imagine", False)
+        assert recorded == []
+        await image_module.drain_accounting()
+
+    asyncio.run(_main())
+
+    assert usage == [("tok", "grok-imagine")]
+    assert recorded == [("grok-imagine", True), ("grok-imagine", False)]
+    assert image_module._accounting_state is None
@@ -1,5 +1,8 @@
+import asyncio
+
 import pytest
 
+from app.services.grok import imagine_generation
 from app.services.grok.imagine_experimental import (
     IMAGE_METHOD_IMAGINE_WS_EXPERIMENTAL,
     IMAGE_METHOD_LEGACY,
@@ -23,3 +26,47 @@ from app.services.grok.imagine_experimental import (
 )
 def test_resolve_image_generation_method(raw, expected):
     assert resolve_image_generation_method(raw) == expected
+
+
+def test_iter_experimental_generation_images_yields_before_round_completes(monkeypatch: pytest.MonkeyPatch):
+    release = asyncio.Event()
+
+    class _FakeService:
+        async def generate_ws(self, token, prompt, n, aspect_ratio, completed_cb=None, **_kwargs):
+            completed_cb(0, "https://assets.grok.com/a.png")
+            completed_cb(1, "https://assets.grok.com/a.png")
+            await release.wait()
+            completed_cb(2, "https://assets.grok.com/b.png")
+            return []
+
+        async def convert_url(self, token, url, response_format="b64_json"):
+            return url.rsplit("/", 1)[-1]
+
+    monkeypatch.setattr(imagine_generation, "ImagineExperimentalService", _FakeService)
+    monkeypatch.setattr(imagine_generation, "_service_cache", None)
+
+    async def _run():
+        out = []
+        async for image in imagine_generation.iter_experimental_generation_images(
+            token="t", prompt="p", n=3, response_format="b64_json", aspect_ratio="1:1", concurrency=1
+        ):
+            out.append(image)
+            release.set()
+        return out
+
+    assert asyncio.run(_run()) == ["a.png", "b.png"]
+
+
+@pytest.mark.parametrize(
+    ("per_call", "n", "expected"),
+    [
+        (4, 1, [1]),
+        (4, 6, [4, 2]),
+        (4, 10, [4, 4, 2]),
+        (10, 10, [10]),
+        ("bad", 5, [4, 1]),
+    ],
+)
+def test_split_generation_targets(monkeypatch: pytest.MonkeyPatch, per_call, n, expected):
+    monkeypatch.setattr(imagine_generation, "get_config", lambda key, default=None: per_call)
+    assert imagine_generation.split_generation_targets(n) == expected
@@ -1,6 +1,7 @@
 import asyncio
 from types import SimpleNamespace
 
+import orjson
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
@@ -8,26 +9,41 @@ from starlette.websockets import WebSocketDisconnect
 
 from app.api.v1 import admin as admin_api
 
+# 路由与 app 不依赖用例内的 monkeypatch（补丁作用于 admin_api 模块全局），模块内复用同一个 client
+_CLIENT_CACHE: dict[str, TestClient] = {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _close_cached_client():
+    yield
+    for client in _CLIENT_CACHE.values():
+        client.close()
+    _CLIENT_CACHE.clear()
+
 
 def _build_client(monkeypatch: pytest.MonkeyPatch, api_key: str = "test-key") -> TestClient:
     async def _fake_legacy_keys():
         return set()
 
     monkeypatch.setattr(admin_api, "_load_legacy_api_keys", _fake_legacy_keys)
+    monkeypatch.setattr(admin_api, "_app_config_cache", {})
     monkeypatch.setattr(
         admin_api,
         "get_config",
         lambda key, default=None: api_key if key == "app.api_key" else default,
     )
 
-    app = FastAPI()
-    app.include_router(admin_api.router)
-    return TestClient(app)
+    client = _CLIENT_CACHE.get("admin")
+    if client is None:
+        app = FastAPI()
+        app.include_router(admin_api.router)
+        client = _CLIENT_CACHE["admin"] = TestClient(app)
+    return client
 
 
 def _recv_until(ws, predicate, max_messages: int = 80):
     for _ in range(max_messages):
-        msg = ws.receive_json()
+        msg = ws.receive_json(mode="text")
         if predicate(msg):
             return msg
     pytest.fail("Did not receive expected websocket message in time")
@@ -45,7 +61,7 @@ def test_imagine_ws_ping_pong(monkeypatch: pytest.MonkeyPatch):
     client = _build_client(monkeypatch, api_key="valid-key")
     with client.websocket_connect("/api/v1/admin/imagine/ws?api_key=valid-key") as ws:
         ws.send_json({"type": "ping"})
-        msg = ws.receive_json()
+        msg = ws.receive_json(mode="text")
     assert msg == {"type": "pong"}
 
 
@@ -64,7 +80,7 @@ def test_imagine_ws_accepts_managed_api_key(monkeypatch: pytest.MonkeyPatch):
 
     with client.websocket_connect("/api/v1/admin/imagine/ws?api_key=managed-key") as ws:
         ws.send_json({"type": "ping"})
-        msg = ws.receive_json()
+        msg = ws.receive_json(mode="text")
     assert msg == {"type": "pong"}
 
 
@@ -72,7 +88,7 @@ def test_imagine_ws_empty_prompt_error(monkeypatch: pytest.MonkeyPatch):
     client = _build_client(monkeypatch, api_key="valid-key")
     with client.websocket_connect("/api/v1/admin/imagine/ws?api_key=valid-key") as ws:
         ws.send_json({"type": "start", "prompt": "   "})
-        msg = ws.receive_json()
+        msg = ws.receive_json(mode="text")
 
     assert msg.get("type") == "error"
     assert msg.get("code") == "empty_prompt"
@@ -102,7 +118,7 @@ def test_imagine_ws_start_stop_message_flow(monkeypatch: pytest.MonkeyPatch):
 
     async def _fake_collect_imagine_batch(_token: str, _prompt: str, _aspect_ratio: str):
         await asyncio.sleep(0.01)
-        return ["ZmFrZV9pbWFnZQ=="]
+        yield "ZmFrZV9pbWFnZQ=="
 
     monkeypatch.setattr(admin_api, "get_token_manager", _fake_get_token_manager)
     monkeypatch.setattr(
@@ -131,8 +147,9 @@ def test_imagine_ws_start_stop_message_flow(monkeypatch: pytest.MonkeyPatch):
 
     assert running.get("aspect_ratio") == "1:1"
     assert isinstance(running.get("run_id"), str) and running.get("run_id")
-    assert image.get("b64_json") == "ZmFrZV9pbWFnZQ=="
     assert image.get("aspect_ratio") == "1:1"
+    assert image.get("run_id") == running.get("run_id")
+    assert image.get("b64_json") == "ZmFrZV9pbWFnZQ=="
     assert int(image.get("sequence") or 0) >= 1
     assert pong == {"type": "pong"}
     assert stopped.get("run_id") == running.get("run_id")
@@ -159,7 +176,7 @@ def test_imagine_ws_stop_immediately_remains_healthy(monkeypatch: pytest.MonkeyP
 
     async def _slow_collect_imagine_batch(_token: str, _prompt: str, _aspect_ratio: str):
         await asyncio.sleep(0.5)
-        return ["ZmFrZV9pbWFnZQ=="]
+        yield "ZmFrZV9pbWFnZQ=="
 
     monkeypatch.setattr(admin_api, "get_token_manager", _fake_get_token_manager)
     monkeypatch.setattr(
@@ -189,3 +206,116 @@ def test_imagine_ws_stop_immediately_remains_healthy(monkeypatch: pytest.MonkeyP
     assert running.get("run_id")
     assert stopped.get("run_id") == running.get("run_id")
     assert pong == {"type": "pong"}
+
+
+def test_imagine_ws_binary_mode_sends_header_then_bytes(monkeypatch: pytest.MonkeyPatch):
+    client = _build_client(monkeypatch, api_key="valid-key")
+
+    class _DummyTokenManager:
+        async def reload_if_stale(self):
+            return None
+
+        def get_token_for_model(self, _model_id: str):
+            return "token-demo"
+
+        async def sync_usage(self, *_args, **_kwargs):
+            return True
+
+    token_mgr = _DummyTokenManager()
+
+    async def _fake_get_token_manager():
+        return token_mgr
+
+    async def _fake_collect_imagine_batch(_token: str, _prompt: str, _aspect_ratio: str):
+        await asyncio.sleep(0.01)
+        yield "data:image/jpeg;base64,ZmFrZV9pbWFnZQ=="
+
+    monkeypatch.setattr(admin_api, "get_token_manager", _fake_get_token_manager)
+    monkeypatch.setattr(
+        admin_api.ModelService,
+        "get",
+        lambda model_id: SimpleNamespace(model_id=model_id, is_image=True),
+    )
+    monkeypatch.setattr(admin_api, "_collect_imagine_batch", _fake_collect_imagine_batch)
+
+    with client.websocket_connect("/api/v1/admin/imagine/ws?api_key=valid-key") as ws:
+        ws.send_json({"type": "start", "prompt": "a cat", "aspect_ratio": "1:1", "binary": True})
+        running = _recv_until(
+            ws,
+            lambda m: m.get("type") == "status" and m.get("status") == "running",
+        )
+        header = ws.receive_json(mode="text")
+        data = ws.receive_bytes()
+        ws.send_json({"type": "stop"})
+
+    assert header.get("type") == "image"
+    assert header.get("binary") is True
+    assert header.get("mime") == "image/jpeg"
+    assert header.get("run_id") == running.get("run_id")
+    assert int(header.get("sequence") or 0) >= 1
+    assert data == b"fake_image"
+
+
+def test_imagine_ws_binary_pair_stays_atomic_when_ping_and_stop_arrive_mid_image(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    client = _build_client(monkeypatch, api_key="valid-key")
+
+    class _DummyTokenManager:
+        async def reload_if_stale(self):
+            return None
+
+        def get_token_for_model(self, _model_id: str):
+            return "token-demo"
+
+        async def sync_usage(self, *_args, **_kwargs):
+            return True
+
+    token_mgr = _DummyTokenManager()
+
+    async def _fake_get_token_manager():
+        return token_mgr
+
+    async def _fake_collect_imagine_batch(_token: str, _prompt: str, _aspect_ratio: str):
+        await asyncio.sleep(0.01)
+        yield "data:image/jpeg;base64,ZmFrZV9pbWFnZQ=="
+
+    original_send_bytes = admin_api.WebSocket.send_bytes
+
+    async def _slow_send_bytes(self, data):
+        # 让 ping/stop 落在图片头与图片字节之间
+        await asyncio.sleep(0.2)
+        await original_send_bytes(self, data)
+
+    monkeypatch.setattr(admin_api, "get_token_manager", _fake_get_token_manager)
+    monkeypatch.setattr(
+        admin_api.ModelService,
+        "get",
+        lambda model_id: SimpleNamespace(model_id=model_id, is_image=True),
+    )
+    monkeypatch.setattr(admin_api, "_collect_imagine_batch", _fake_collect_imagine_batch)
+    monkeypatch.setattr(admin_api.WebSocket, "send_bytes", _slow_send_bytes)
+
+    frames = []
+    with client.websocket_connect("/api/v1/admin/imagine/ws?api_key=valid-key") as ws:
+        ws.send_json({"type": "start", "prompt": "a cat", "aspect_ratio": "1:1", "binary": True})
+        _recv_until(ws, lambda m: m.get("type") == "status" and m.get("status") == "running")
+        header = ws.receive_json(mode="text")
+        assert header.get("type") == "image"
+        ws.send_json({"type": "ping"})
+        ws.send_json({"type": "stop"})
+        for _ in range(20):
+            message = ws.receive()
+            frames.append(message)
+            text = message.get("text")
+            if text and '"stopped"' in text:
+                break
+
+    # 图片头之后紧跟的一定是图片字节；控制消息全部为文本帧
+    assert frames[0].get("bytes") == b"fake_image"
+    texts = [orjson.loads(m["text"]) for m in frames[1:] if m.get("text") is not None]
+    assert {"type": "pong"} in texts
+    assert texts[-1].get("status") == "stopped"
+    for prev, cur in zip(frames, frames[1:]):
+        if prev.get("text") and orjson.loads(prev["text"]).get("type") == "image":
+            assert cur.get("bytes") is not None
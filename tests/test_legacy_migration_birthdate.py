@@ -1,5 +1,3 @@
-import asyncio
-
 from app.core import legacy_migration
 import app.core.config as config_module
 import app.core.storage as storage_module
@@ -14,14 +12,14 @@ class _DummyStorage:
         return self._token_data
 
 
-def test_migration_v2_runs_tos_birth_nsfw_in_order(monkeypatch, tmp_path):
+def test_migration_v2_runs_tos_birth_nsfw_in_order(monkeypatch, tmp_path, run):
     call_order = []
 
     class _UserAgreementService:
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def accept_tos_version(self, sso, sso_rw, impersonate):
+        def accept_tos_version(self, sso, sso_rw, impersonate, session=None):
             call_order.append("tos")
             return {"ok": True}
 
@@ -29,7 +27,7 @@ def test_migration_v2_runs_tos_birth_nsfw_in_order(monkeypatch, tmp_path):
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def set_birth_date(self, sso, sso_rw, impersonate):
+        def set_birth_date(self, sso, sso_rw, impersonate, session=None):
             call_order.append("birth")
             return {"ok": True}
 
@@ -37,7 +35,7 @@ def test_migration_v2_runs_tos_birth_nsfw_in_order(monkeypatch, tmp_path):
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def enable_nsfw(self, sso, sso_rw, impersonate):
+        def enable_nsfw(self, sso, sso_rw, impersonate, session=None):
             call_order.append("nsfw")
             return {"ok": True}
 
@@ -47,7 +45,7 @@ def test_migration_v2_runs_tos_birth_nsfw_in_order(monkeypatch, tmp_path):
     monkeypatch.setattr(services_module, "BirthDateService", _BirthDateService)
     monkeypatch.setattr(services_module, "NsfwSettingsService", _NsfwSettingsService)
 
-    result = asyncio.run(legacy_migration.migrate_legacy_account_settings(concurrency=1, data_dir=tmp_path))
+    result = run(legacy_migration.migrate_legacy_account_settings(concurrency=1, data_dir=tmp_path))
 
     assert result["migrated"] is True
     assert result["total"] == 1
@@ -57,24 +55,24 @@ def test_migration_v2_runs_tos_birth_nsfw_in_order(monkeypatch, tmp_path):
     assert (tmp_path / ".locks" / "legacy_accounts_tos_birth_nsfw_v2.done").exists()
 
 
-def test_migration_v2_skips_when_done_marker_exists(tmp_path):
+def test_migration_v2_skips_when_done_marker_exists(tmp_path, run):
     lock_dir = tmp_path / ".locks"
     lock_dir.mkdir(parents=True, exist_ok=True)
     (lock_dir / "legacy_accounts_tos_birth_nsfw_v2.done").write_text("done", encoding="utf-8")
 
-    result = asyncio.run(legacy_migration.migrate_legacy_account_settings(concurrency=1, data_dir=tmp_path))
+    result = run(legacy_migration.migrate_legacy_account_settings(concurrency=1, data_dir=tmp_path))
 
     assert result == {"migrated": False, "reason": "already_done"}
 
 
-def test_migration_v2_counts_fail_when_birth_step_fails(monkeypatch, tmp_path):
+def test_migration_v2_counts_fail_when_birth_step_fails(monkeypatch, tmp_path, run):
     call_order = []
 
     class _UserAgreementService:
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def accept_tos_version(self, sso, sso_rw, impersonate):
+        def accept_tos_version(self, sso, sso_rw, impersonate, session=None):
             call_order.append(f"tos:{sso}")
             return {"ok": True}
 
@@ -82,7 +80,7 @@ def test_migration_v2_counts_fail_when_birth_step_fails(monkeypatch, tmp_path):
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def set_birth_date(self, sso, sso_rw, impersonate):
+        def set_birth_date(self, sso, sso_rw, impersonate, session=None):
             call_order.append(f"birth:{sso}")
             return {"ok": sso != "token-fail"}
 
@@ -90,7 +88,7 @@ def test_migration_v2_counts_fail_when_birth_step_fails(monkeypatch, tmp_path):
         def __init__(self, cf_clearance=""):
             self.cf_clearance = cf_clearance
 
-        def enable_nsfw(self, sso, sso_rw, impersonate):
+        def enable_nsfw(self, sso, sso_rw, impersonate, session=None):
             call_order.append(f"nsfw:{sso}")
             return {"ok": True}
 
@@ -104,7 +102,7 @@ def test_migration_v2_counts_fail_when_birth_step_fails(monkeypatch, tmp_path):
     monkeypatch.setattr(services_module, "BirthDateService", _BirthDateService)
     monkeypatch.setattr(services_module, "NsfwSettingsService", _NsfwSettingsService)
 
-    result = asyncio.run(legacy_migration.migrate_legacy_account_settings(concurrency=1, data_dir=tmp_path))
+    result = run(legacy_migration.migrate_legacy_account_settings(concurrency=1, data_dir=tmp_path))
 
     assert result["migrated"] is True
     assert result["total"] == 2
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import AppException
+from app.services import quota as quota_module
+
+
+def _patch_consume(monkeypatch, ok=True):
+    calls = []
+
+    async def _fake_consume(key, incs, tz_offset_minutes=None):
+        calls.append((key, incs))
+        return ok
+
+    monkeypatch.setattr(quota_module.api_key_manager, "consume_daily_usage", _fake_consume)
+    monkeypatch.setattr(quota_module, "_global_key_cache", (quota_module.config.version, "admin-key"))
+    return calls
+
+
+@pytest.mark.parametrize(
+    ("model", "image_count", "expected"),
+    [
+        ("grok-4-heavy", None, {"heavy_used": 1, "chat_used": 1}),
+        ("grok-imagine-1.0-video", None, {"video_used": 1}),
+        ("grok-imagine-1.0", None, {"image_used": 2}),
+        ("grok-imagine-1.0", 4, {"image_used": 4}),
+        ("grok-4", None, {"chat_used": 1}),
+    ],
+)
+def test_enforce_daily_quota_buckets(monkeypatch, model, image_count, expected):
+    calls = _patch_consume(monkeypatch)
+    asyncio.run(quota_module.enforce_daily_quota("user-key", model, image_count=image_count))
+    assert calls == [("user-key", expected)]
+
+
+def test_enforce_daily_quota_skips_global_key_and_raises_on_exhaustion(monkeypatch):
+    calls = _patch_consume(monkeypatch, ok=False)
+    asyncio.run(quota_module.enforce_daily_quota("admin-key", "grok-4"))
+    assert calls == []
+
+    with pytest.raises(AppException) as exc:
+        asyncio.run(quota_module.enforce_daily_quota("user-key", "grok-4"))
+    assert exc.value.status_code == 429
+
+
+def test_enforce_daily_quota_reuses_static_incs(monkeypatch):
+    calls = _patch_consume(monkeypatch)
+    asyncio.run(quota_module.enforce_daily_quota("user-key", "grok-4"))
+    asyncio.run(quota_module.enforce_daily_quota("user-key", "grok-4"))
+    assert calls[0][1] is calls[1][1] is quota_module._STATIC_INCS["chat"][0]